@@ -4,6 +4,7 @@ from EventAnalysis_Framework.src.Histogram import ObservableHistogram
 from EventAnalysis_Framework.src.Analysis import EventAnalysis, EventLoop
 from EventAnalysis_Framework.HepMC3.analysis.TGC.ATLAS_WW_1905_04242.fiducial_phase_space import fiducial_phase_space, leading_lepton_pt, FinalStateSelector
 from EventAnalysis_Framework.src.Utilities import read_xsection
+from EventAnalysis_Framework.src.HistogramResult import HistogramResult
 import pyhepmc
 import json
 import sys
@@ -40,3 +41,9 @@ if __name__ == "__main__":
     with open(f"{eft_term}-bin-{bin_number}.json", "w") as file_:
         simuations = {eft_term: hist_pt_lead.tolist()}
         json.dump(simuations, file_, indent=4)
+
+    # Raw contents, so that the outputs of several jobs can be merged with merge_results
+    result = HistogramResult.from_histogram(
+        hist_nevents, number_of_evts, xsection, sample=f"{eft_term}-bin-{bin_number}"
+    )
+    result.save(f"{eft_term}-bin-{bin_number}.npz")
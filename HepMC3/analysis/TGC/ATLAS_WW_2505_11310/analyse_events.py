@@ -1,9 +1,10 @@
 """Event selection for ATLAS 2505.11310"""
 
-from EventAnalysis_Framework.src.Histogram import ObservableHistogram
+from EventAnalysis_Framework.src.Histogram import ObservableHistogram, HistogramCompound
 from EventAnalysis_Framework.src.Analysis import EventAnalysis, EventLoop
 from EventAnalysis_Framework.src.Utilities import read_xsection
 from EventAnalysis_Framework.HepMC3.analysis.TGC.ATLAS_WW_2505_11310.fidutial_phase_space import FinalStates, event_selection
+from EventAnalysis_Framework.HepMC3.src.Skim import EventSkim, KeepEventWeights
 import pyhepmc
 import json
 import numpy as np
@@ -34,10 +35,14 @@ if __name__ == "__main__":
     mTemu_hist = ObservableHistogram(bin_edges=bin_edges_mTemu, observable=mTemu)
 
     # Constructs the event analysis
-    event_analysis = EventAnalysis(cuts=[event_selection], particles_selection=FinalStates())
+    # (the weights of the events are attached to the selected objects to be stored in the skim)
+    event_analysis = EventAnalysis(cuts=[event_selection], particles_selection=KeepEventWeights(FinalStates()))
 
-    # Performs the loop over the events
-    event_loop = EventLoop(file_reader=pyhepmc.open, histogram=mTemu_hist)
+    # Performs the loop over the events, also storing the selected objects of the events that pass the cuts
+    # (the skim can be analysed again with read_skim as the file reader)
+    event_loop = EventLoop(
+        file_reader=pyhepmc.open, histogram=HistogramCompound({"mTemu": mTemu_hist, "skim": EventSkim()})
+    )
 
     # Cross-section
     xsection = read_xsection(
@@ -46,9 +51,11 @@ if __name__ == "__main__":
     )
 
     # Performs the event analysis
-    current_hist, number_of_evts = event_loop.analyse_events(
+    analysis_hists, number_of_evts = event_loop.analyse_events(
         filename=f"{folderpath}/hepmc_files/{filename}.hepmc", event_analysis=event_analysis
     )
+    current_hist = analysis_hists.get_hist("mTemu")
+    analysis_hists.get_hist("skim").save(f"{filename}-skim.npz", number_of_evts)
     print(current_hist, xsection)
     print(number_of_evts)
 
@@ -2,7 +2,7 @@
 """Constructs the invariant mass distribution for the WW production"""
 
 from EventAnalysis_Framework.src.Histogram import ObservableHistogram
-from EventAnalysis_Framework.src.Analysis import EventAnalysis, EventLoop
+from EventAnalysis_Framework.src.ObservableCache import ObservableCache
 from EventAnalysis_Framework.HepMC3.analysis.TGC.ATLAS_WZ_2507_03500.phase_space_cuts import (ParticleSelectorATLAS,
                                                                                               fiducial_cuts,
                                                                                               transverse_mass)
@@ -26,11 +26,12 @@ if __name__ == "__main__":
         bin_edges=bin_edges_mTWZ, observable=transverse_mass
     )
 
-    # Constructs the event analysis
-    event_analysis = EventAnalysis(cuts=[fiducial_cuts], particles_selection=ParticleSelectorATLAS())
-
-    # Performs the loop over the events
-    event_loop = EventLoop(file_reader=pyhepmc.open, histogram=mtWZ_hist)
+    # Evaluates the selection and the observable once per file, so that changes of the binning
+    # (or of the cuts that are applied) do not need to read the events again
+    observable_cache = ObservableCache(
+        file_reader=pyhepmc.open, observables=[transverse_mass], cuts=[fiducial_cuts],
+        particles_selection=ParticleSelectorATLAS()
+    )
 
     # Book the histogram for the signal
     histograms_mtWZ_efts = {
@@ -49,8 +50,10 @@ if __name__ == "__main__":
                 path_to_file=f"{folderpath}/banner_files/{filename}.txt",
                 default_line="#  Matched Integrated weight (pb)  :"
             )
-            # Run the analysis on the file
-            current_hist, number_of_evts = event_loop.analyse_events(hepmc_file, event_analysis)
+            # Run the analysis on the file (or read the cached columns)
+            event_columns = observable_cache.columns(hepmc_file)
+            current_hist = event_columns.fill(mtWZ_hist, "transverse_mass")
+            number_of_evts = len(event_columns)
             histograms_mtWZ_efts[eft_term] += (xsection / number_of_evts) * current_hist
             print(current_hist, xsection)
 
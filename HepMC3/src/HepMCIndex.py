@@ -0,0 +1,106 @@
+"""
+    Random access to the events of a HepMC ASCII file.
+    The byte offset of every event record (lines starting with "E ") is found once and stored in a sidecar file
+    next to the .hepmc file (see src/FileCache.py). The events in any range [start, stop) can then be read with
+    pyhepmc from the memory-mapped file, parsing only the header of the file and the requested events.
+"""
+
+import io
+import re
+import mmap
+import pyhepmc
+import numpy as np
+from typing import Iterator, List
+from EventAnalysis_Framework.src.FileCache import load_cached, save_cached
+
+# Beginning of an event record
+_EVENT_START_PATTERN = re.compile(rb"^E ", re.MULTILINE)
+# Last line of the file, e.g. HepMC::Asciiv3-END_EVENT_LISTING
+_END_LISTING_PATTERN = re.compile(rb"^HepMC::\S*END_EVENT_LISTING", re.MULTILINE)
+
+# Suffix of the sidecar files
+_INDEX_SUFFIX = ".index.npz"
+
+
+def build_hepmc_index(filename: str, use_cache: bool = True) -> np.ndarray:
+    """
+    Returns an array with the byte offset of the record of each event, followed by the offset of the end of
+    the last event. The events in [start, stop) are then in the bytes offsets[start]:offsets[stop], the header
+    of the file is in the bytes before offsets[0] and the end of the listing is after offsets[-1].
+    Only uncompressed files can be indexed.
+    """
+    if filename.endswith((".gz", ".bz2", ".xz", ".zst")):
+        raise ValueError(f"Compressed file '{filename}' cannot be indexed.")
+
+    if use_cache:
+        cached = load_cached(filename, _INDEX_SUFFIX)
+        if cached is not None:
+            return cached["offsets"]
+
+    with open(filename, "rb") as hepmc_file, mmap.mmap(hepmc_file.fileno(), 0, access=mmap.ACCESS_READ) as content:
+        offsets = [match.start() for match in _EVENT_START_PATTERN.finditer(content)]
+        # End of the last event
+        end_listing = _END_LISTING_PATTERN.search(content, offsets[-1] if offsets else 0)
+        offsets.append(end_listing.start() if end_listing is not None else len(content))
+    offsets = np.array(offsets, dtype=np.int64)
+
+    if use_cache:
+        save_cached(filename, _INDEX_SUFFIX, {"offsets": offsets})
+    return offsets
+
+
+def number_of_events(filename: str) -> int:
+    """Number of events in the file, from its index."""
+    return len(build_hepmc_index(filename)) - 1
+
+
+def read_hepmc_range(filename: str, start: int = 0, stop: int = None) -> Iterator[pyhepmc.GenEvent]:
+    """
+    Yields the events with index in [start, stop) as pyhepmc.GenEvent objects.
+    pyhepmc reads a stream made of the header of the file, the bytes of the events in the range,
+    and the end of the listing, so the events before start are never parsed.
+    """
+    offsets = build_hepmc_index(filename)
+    start, stop, _ = slice(start, stop).indices(len(offsets) - 1)
+    stop = max(start, stop)
+
+    with open(filename, "rb") as hepmc_file, mmap.mmap(hepmc_file.fileno(), 0, access=mmap.ACCESS_READ) as content:
+        file_bytes = memoryview(content)
+        parts = [file_bytes[:offsets[0]], file_bytes[offsets[start]:offsets[stop]], file_bytes[offsets[-1]:]]
+        # pyhepmc cannot detect the format of a stream that is not seekable
+        hepmc_format = "hepmc2" if b"HepMC::IO_GenEvent" in parts[0].tobytes() else "hepmc3"
+        try:
+            with pyhepmc.open(io.BufferedReader(_ConcatenatedStream(parts)), format=hepmc_format) as hepmc_events:
+                yield from hepmc_events
+        finally:
+            # The memory map can only be closed once no views of it remain
+            for part in parts:
+                part.release()
+            file_bytes.release()
+
+
+class _ConcatenatedStream(io.RawIOBase):
+    """Read-only stream over several blocks of bytes, read one after the other without copying them together."""
+
+    def __init__(self, parts: List[memoryview]):
+        super().__init__()
+        self._parts = parts
+        self._part_index = 0
+        self._position = 0
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer) -> int:
+        """Copies the next bytes into the buffer. Returns 0 at the end of the stream."""
+        while self._part_index < len(self._parts):
+            part = self._parts[self._part_index]
+            if self._position < len(part):
+                size = min(len(buffer), len(part) - self._position)
+                buffer[:size] = part[self._position:self._position + size]
+                self._position += size
+                return size
+            # Next block
+            self._part_index += 1
+            self._position = 0
+        return 0
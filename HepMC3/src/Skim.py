@@ -0,0 +1,183 @@
+"""
+    Compact storage of the physics objects selected by the analysis (skimming).
+    EventSkim is booked by the EventLoop like a histogram, so it receives the events that pass the cuts after the
+    particle selection (e.g. the dictionary of dressed leptons, neutrinos, jets and MET built by FinalStates).
+    It stores the kinematics, pid, status and tag of each object, and the weights of each event, as flat columns in
+    a compressed .npz file. read_skim reads them back as a file_reader for the EventLoop, rebuilding the objects
+    (pyhepmc.GenParticle, fastjet.PseudoJet or pyhepmc.FourVector), so that the cuts and observables can be
+    applied again without the full shower history.
+    The skim only receives the selected objects, so the weights of the original event are attached to them by
+    wrapping the particle selection with KeepEventWeights.
+"""
+
+import fastjet
+import pyhepmc
+import numpy as np
+from typing import Callable, Dict, Iterator
+from EventAnalysis_Framework.src.Histogram import Histogram
+
+# Kind of each stored object
+_PARTICLE, _JET, _FOUR_VECTOR = 0, 1, 2
+
+# Columns stored for each object
+_object_fields = ["category", "kind", "px", "py", "pz", "e", "pid", "status", "tag"]
+
+# Number of events whose objects are converted at once by read_skim
+_read_block_size = 1000
+
+
+def _object_row(category: int, physics_object) -> tuple:
+    """Values of the columns for the object (a particle, a jet or a four-vector)."""
+    if isinstance(physics_object, fastjet.PseudoJet):
+        return (category, _JET, physics_object.px(), physics_object.py(), physics_object.pz(), physics_object.E(),
+                0, 0, physics_object.user_index())
+    if isinstance(physics_object, pyhepmc.FourVector):
+        return (category, _FOUR_VECTOR, physics_object.px, physics_object.py, physics_object.pz, physics_object.e,
+                0, 0, 0)
+    momentum = physics_object.momentum
+    return (category, _PARTICLE, momentum.px, momentum.py, momentum.pz, momentum.e, physics_object.pid,
+            physics_object.status, 0)
+
+
+class SkimEvent(dict):
+    """Objects of a skimmed event for each category, with the weights of the event in the attribute weights."""
+
+    def __init__(self, objects, weights: np.ndarray):
+        super().__init__(objects)
+        self.weights = weights
+
+
+class KeepEventWeights:
+    """
+    Particle selection that attaches the weights of the original event (e.g. pyhepmc.GenEvent.weights) to the
+    selected objects, so that they are stored by the EventSkim.
+    """
+
+    def __init__(self, particles_selection: Callable):
+        """
+        :param particles_selection: Returns a dictionary with a list of objects for each category.
+        """
+        self._particles_selection = particles_selection
+        # Name of the step in the cut flow
+        self.__name__ = getattr(particles_selection, "__name__", type(particles_selection).__name__)
+
+    def __call__(self, event) -> SkimEvent:
+        return SkimEvent(self._particles_selection(event), np.asarray(event.weights, dtype=float))
+
+
+def event_weights(event):
+    """Weights attached to the selected event (see KeepEventWeights), or 1 if there are none."""
+    return getattr(event, "weights", 1)
+
+
+class EventSkim(Histogram):
+    """
+    Collects the selected objects of the events that pass the analysis.
+    The events are dictionaries with a list of objects for each category (or a single list of objects).
+    """
+
+    def __init__(self, get_weights: Callable = event_weights):
+        """
+        :param get_weights: Returns the weight, or the array of weights, of the selected event.
+                            By default, the weights attached by KeepEventWeights (or by read_skim) are stored.
+        """
+        self.get_weights = get_weights
+        # Code of each category of objects
+        self._categories = {}
+        # Columns of each object, number of objects and weights of each event
+        self._rows = []
+        self._number_of_objects = []
+        self._weights = []
+
+    def update_hist(self, event):
+        """Stores the objects and the weights of the event."""
+        objects = event.items() if isinstance(event, dict) else [("", event)]
+        number_of_objects = len(self._rows)
+        for category, category_objects in objects:
+            category = self._categories.setdefault(category, len(self._categories))
+            self._rows.extend(_object_row(category, physics_object) for physics_object in category_objects)
+        self._number_of_objects.append(len(self._rows) - number_of_objects)
+        self._weights.append(np.atleast_1d(np.asarray(self.get_weights(event), dtype=float)))
+
+    def __len__(self) -> int:
+        """Number of stored events."""
+        return len(self._number_of_objects)
+
+    def merge(self, other: "EventSkim"):
+        """Appends the events of another skim. Returns self."""
+        # Codes of the categories of the other skim in this one
+        categories = {code: self._categories.setdefault(category, len(self._categories))
+                      for category, code in other._categories.items()}
+        self._rows.extend((categories[row[0]],) + row[1:] for row in other._rows)
+        self._number_of_objects.extend(other._number_of_objects)
+        self._weights.extend(other._weights)
+        return self
+
+    def scale(self, factor: float):
+        """Multiplies the weights of the events by factor. Returns self."""
+        self._weights = [weights * factor for weights in self._weights]
+        return self
+
+    def contents(self) -> Dict[str, Dict[str, np.ndarray]]:
+        """The skim does not hold histograms."""
+        return {}
+
+    def arrays(self) -> Dict[str, np.ndarray]:
+        """Columns of the objects, number of objects and weights of each event, and names of the categories."""
+        rows = np.array(self._rows, dtype=float).reshape(len(self._rows), len(_object_fields))
+        arrays = {field: rows[:, index] for index, field in enumerate(_object_fields)}
+        for field in ["category", "kind", "pid", "status", "tag"]:
+            arrays[field] = arrays[field].astype(np.int32)
+        arrays["number_of_objects"] = np.array(self._number_of_objects, dtype=np.int64)
+        arrays["weights"] = np.array(self._weights, dtype=float).reshape(len(self), -1)
+        arrays["categories"] = np.array(list(self._categories), dtype=str)
+        return arrays
+
+    def save(self, path: str, number_of_evts: int = None):
+        """
+        Writes the skim to a compressed .npz file.
+        :param number_of_evts: Number of events analysed to build the skim (e.g. to normalize by the cross-section).
+        """
+        np.savez_compressed(path, number_of_evts=-1 if number_of_evts is None else number_of_evts, **self.arrays())
+
+    def __copy__(self):
+        """Returns an empty skim."""
+        return self.__class__(get_weights=self.get_weights)
+
+
+def skim_number_of_events(filename: str) -> int:
+    """Number of events analysed to build the skim (None if it was not saved)."""
+    with np.load(filename) as skim_file:
+        number_of_evts = int(skim_file["number_of_evts"])
+    return None if number_of_evts < 0 else number_of_evts
+
+
+def read_skim(filename: str, start: int = 0, stop: int = None) -> Iterator[SkimEvent]:
+    """Yields the events of the skim with index in [start, stop) as SkimEvent objects."""
+    with np.load(filename) as skim_file:
+        categories = skim_file["categories"].tolist()
+        offsets = np.concatenate([[0], np.cumsum(skim_file["number_of_objects"])])
+        start, stop, _ = slice(start, stop).indices(len(offsets) - 1)
+        # Only the objects of the events in [start, stop) are kept
+        columns = {field: skim_file[field][offsets[start]:offsets[stop]] for field in _object_fields}
+        weights = skim_file["weights"][start:stop]
+    offsets = offsets[start:stop + 1] - offsets[start]
+
+    for block_start in range(0, stop - start, _read_block_size):
+        block_stop = min(block_start + _read_block_size, stop - start)
+        # The values of the block are converted once to Python numbers
+        rows = list(zip(*(columns[field][offsets[block_start]:offsets[block_stop]].tolist()
+                          for field in _object_fields)))
+        block_offsets = (offsets[block_start:block_stop + 1] - offsets[block_start]).tolist()
+        for event_index, first_row, last_row in zip(range(block_start, block_stop), block_offsets, block_offsets[1:]):
+            objects = {category: [] for category in categories}
+            for category, kind, px, py, pz, e, pid, status, tag in rows[first_row:last_row]:
+                if kind == _JET:
+                    physics_object = fastjet.PseudoJet(px, py, pz, e)
+                    physics_object.set_user_index(tag)
+                elif kind == _FOUR_VECTOR:
+                    physics_object = pyhepmc.FourVector(px, py, pz, e)
+                else:
+                    physics_object = pyhepmc.GenParticle(pyhepmc.FourVector(px, py, pz, e), pid, status)
+                objects[categories[category]].append(physics_object)
+            yield SkimEvent(objects, weights[event_index])
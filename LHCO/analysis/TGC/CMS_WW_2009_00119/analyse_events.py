@@ -4,7 +4,7 @@
 from EventAnalysis_Framework.src.Histogram import ObservableHistogram
 from EventAnalysis_Framework.src.Analysis import EventAnalysis, EventLoop
 from EventAnalysis_Framework.src.Utilities import read_xsection
-from EventAnalysis_Framework.LHCO.src.LHCOReader import read_LHCO
+from EventAnalysis_Framework.LHCO.src.FastLHCOReader import read_LHCO_fast
 from EventAnalysis_Framework.LHCO.src.Observables import InvariantMass
 from EventAnalysis_Framework.LHCO.analysis.TGC.CMS_WW_2009_00119 import selection_cuts
 import copy
@@ -79,7 +79,7 @@ if __name__ == "__main__":
     )
 
     # Constructs the EventLoop object
-    event_loop = EventLoop(file_reader=read_LHCO, histogram=mll_hist)
+    event_loop = EventLoop(file_reader=read_LHCO_fast, histogram=mll_hist)
 
     # Book the histogram for the signal
     histograms_efts = {
@@ -2,52 +2,50 @@
 
 
 from EventAnalysis_Framework.LHCO.src.EventInfo import Event
+from EventAnalysis_Framework.LHCO.src.FastLHCOReader import EventView, concatenate_columns
+from EventAnalysis_Framework.LHCO.src.OverlapRemoval import OverlapRemoval, as_array
+from typing import Union
 import numpy as np
 import vector
 
 
-def select_objects(event: Event):
-    """Selects all the objects needed for the event analysis."""
-    # Particles for the analysis
-    selected_particles = Event([])
+def btagged(jets: np.ndarray) -> np.ndarray:
+    """Jets tagged as b-jets."""
+    return jets["btag"] > 0
+
+
+# Removes the jets close to the selected leptons, except the b-tagged ones
+jet_lepton_overlap = OverlapRemoval(delta_r=0.4, winner="second", exempt=btagged)
+
+
+def select_objects(event: Union[Event, EventView]) -> EventView:
+    """Selects all the objects needed for the event analysis, using the columns of the particles of each type."""
+    if not isinstance(event, EventView):
+        event = EventView(as_array(event), event.weights)
 
     # Electrons for the event
-    for electron in event.electrons:
-        if electron.pt > 10 and (abs(electron.eta) < 1.479 or 1.566 < abs(electron.eta) < 2.5):
-            selected_particles.append(electron)
+    electrons = event.columns("electrons")
+    electrons_eta = np.abs(electrons["eta"])
+    good_electrons = ((electrons["pt"] > 10)
+                      & ((electrons_eta < 1.479) | ((1.566 < electrons_eta) & (electrons_eta < 2.5))))
 
     # Muons for the event
-    for muon in event.muons:
-        if muon.pt > 10 and abs(muon.eta) < 2.4:
-            selected_particles.append(muon)
-
-    # Missing energy
-    selected_particles.extend(event.met)
+    muons = event.columns("muons")
+    good_muons = (muons["pt"] > 10) & (np.abs(muons["eta"]) < 2.4)
 
     # Jets
-    for jet in event.jets:
-        # jets tagged as b-jets must be included - later we must veto events with b-tagged jets
-        if jet.btag > 0:
-            selected_particles.append(jet)
-        else:
-            # pT of the jets must be greater than 30 GeV and |eta| < 4.7
-            if jet.pt < 30 or abs(jet.eta) > 4.7:
-                continue
-
-            # jet momentum
-            jet_momentum = jet.momentum()
-
-            # Only include jets with DeltaR(j, l) > 0.4
-            include_jet = True
-            for lepton in selected_particles.electrons + selected_particles.muons:
-                if jet_momentum.deltaR(lepton.momentum()) < 0.4:
-                    include_jet = False
-                    break
-
-            if include_jet:
-                selected_particles.append(jet)
-
-    return selected_particles
+    # jets tagged as b-jets must be included - later we must veto events with b-tagged jets
+    # other jets must have pT of at least 30 GeV and |eta| <= 4.7
+    jets = event.columns("jets")
+    good_jets = btagged(jets) | ((jets["pt"] >= 30) & (np.abs(jets["eta"]) <= 4.7))
+
+    # Only include jets with DeltaR(j, l) >= 0.4
+    leptons = concatenate_columns(electrons[good_electrons], muons[good_muons])
+    good_jets[good_jets], _ = jet_lepton_overlap.masks(jets[good_jets], leptons)
+
+    # Missing energy is always included
+    return event.select({"photons": None, "electrons": good_electrons, "muons": good_muons, "tauhads": None,
+                         "jets": good_jets})
 
 
 def opposite_sign_lepton_pair(event: Event) -> bool:
@@ -2,10 +2,10 @@
 
 from EventAnalysis_Framework.src.Histogram import ObservableHistogram
 from EventAnalysis_Framework.src.Analysis import EventAnalysis, EventLoop
+from EventAnalysis_Framework.src.BatchRunner import BatchRunner, Sample
 from EventAnalysis_Framework.LHCO.src.LHCOReader import read_LHCO_with_weight
 from EventAnalysis_Framework.LHCO.src.Observables import InvariantMass
 from EventAnalysis_Framework.LHCO.src.EventInfo import Event
-import copy
 import math
 import json
 
@@ -70,30 +70,25 @@ if __name__ == "__main__":
     # Iterates over all the events in the file
     event_loop = EventLoop(file_reader=read_LHCO_with_weight, histogram=mee_hist)
 
-    # Books the histogram for each eft term
-    eft_hists = {eft_term: copy.copy(mee_hist) for eft_term in eft_terms}
-
-    # Iterates over all EFT terms
-    for eft_term in eft_terms:
-        # Iterates over the number of bins
-        for bin_index in range(1, n_bins + 1):
-            # Prefix of the files
-            file_prefix = f"{eft_term}-bin-{bin_index}"
-
-            # files needed to perform the analysis
-            input_files = {
-                "LHE": f"{folderpath}/lhe_files/{file_prefix}.lhe",
-                "LHCO": f"{folderpath}/lhco_files/{file_prefix}.lhco"
-            }
-
-            # Run the analysis on the file
-            current_hist, number_of_evts = event_loop.analyse_events(input_files, event_analysis)
-            print(current_hist, number_of_evts)
-
-            # Updates the histogram for the current term (in fb)
-            eft_hists[eft_term] += 1e3 * current_hist / number_of_evts
+    # All the simulated bins of each EFT term (cross-section in the event weights, histograms in fb)
+    samples = [
+        Sample(
+            label=eft_term,
+            files=[
+                {
+                    "LHE": f"{folderpath}/lhe_files/{eft_term}-bin-{bin_index}.lhe",
+                    "LHCO": f"{folderpath}/lhco_files/{eft_term}-bin-{bin_index}.lhco"
+                }
+                for bin_index in range(1, n_bins + 1)
+            ],
+            scale=1e3
+        )
+        for eft_term in eft_terms
+    ]
 
-        print(eft_hists[eft_term])
+    # Runs the analysis on all the files
+    eft_hists = BatchRunner(event_loop=event_loop, event_analysis=event_analysis, n_workers=16).run(samples)
+    print(eft_hists)
 
     # Saves the json file
     with open(f"{folderpath}/NCDY.json", "w") as file_:
@@ -5,11 +5,13 @@
     - Event:
         Behaves like a Python list of particles.
         Specific particles can be extracted using as attrs, e.g. event.electrons
+        (the particles of each type are found once and cached until the event is modified)
 """
 
 from collections import UserList
 from typing import List
 import copy
+import math
 from vector import MomentumNumpy4D
 
 
@@ -22,36 +24,63 @@ class Particle:
     """
     # Information avalilable about the particle
     _particle_info_attrs = "typ eta phi pt jmass ntrk btag had/em dum1 dum2".split()
+    # Attributes where the information is stored (had/em is stored as had_em)
+    _info_slots = tuple(info.replace("/", "_") for info in _particle_info_attrs)
+
+    # Fixed attributes instead of a per-instance __dict__, plus the cached four-momentum
+    __slots__ = _info_slots + ("_momentum",)
 
     def __init__(self, particle_info: str):
         """The particle_info param represents one line from the .lhco file with only the information on
         _particle_info_attrs"""
-        for info_value, info in zip(particle_info.split(), self._particle_info_attrs):
+        for info_value, info in zip(particle_info.split(), self._info_slots):
             setattr(self, info, float(info_value))
+        self._momentum = None
+
+    @classmethod
+    def from_values(cls, particle_values):
+        """Creates the particle from the numerical values of _particle_info_attrs, without parsing a string."""
+        particle = cls.__new__(cls)
+        for info_value, info in zip(particle_values, cls._info_slots):
+            setattr(particle, info, float(info_value))
+        particle._momentum = None
+        return particle
 
     def __getattr__(self, info):
         """
         Handles the acess of the particle infos.
-        Note: had/em ratio must be acess as had_em
+        Note: had/em ratio is stored as had_em
         """
-        if info == "had_em":
-            return self.__getattribute__("had/em")
+        if info == "had/em":
+            return self.had_em
         raise AttributeError(f"'{type(self).__name__}' object has no attribute '{info}'")
 
     def __repr__(self):
         """For nice printing"""
-        display_info = [f"{info}:{self.__dict__[info]}" for info in "typ eta phi pt jmass ntrk btag".split()]
+        display_info = [f"{info}:{getattr(self, info)}" for info in "typ eta phi pt jmass ntrk btag".split()]
         return "Particle(" + ", ".join(display_info) + ")"
 
     def __copy__(self):
         """Returns a copy of the object."""
-        return self.__class__(" ".join([f"{self.__dict__[info]}" for info in self._particle_info_attrs]))
+        particle = self.__class__.__new__(self.__class__)
+        for info in self.__slots__:
+            setattr(particle, info, getattr(self, info))
+        return particle
 
     def momentum(self):
-        """Creates the four-momentum for the particle"""
-        particle_mass = 0 if self.typ != 4 else self.jmass
-        return MomentumNumpy4D((self.pt, self.phi, self.eta, particle_mass),
-                               dtype=[("pt", float), ("phi", float), ("eta", float), ("mass", float)]).to_pxpypzenergy()
+        """
+        Creates the four-momentum for the particle.
+        It is computed only once, so the returned momentum is read-only.
+        """
+        if self._momentum is None:
+            particle_mass = 0 if self.typ != 4 else self.jmass
+            # Cartesian components from (pt, phi, eta, mass)
+            px, py, pz = self.pt * math.cos(self.phi), self.pt * math.sin(self.phi), self.pt * math.sinh(self.eta)
+            energy = math.sqrt(px**2 + py**2 + pz**2 + particle_mass**2)
+            self._momentum = MomentumNumpy4D([(px, py, pz, energy)],
+                                             dtype=[("x", float), ("y", float), ("z", float), ("t", float)])
+            self._momentum.flags.writeable = False
+        return self._momentum
 
 
 class Event(UserList):
@@ -63,6 +92,8 @@ class Event(UserList):
     }
 
     def __init__(self, list_particle: List[Particle], event_weights=None):
+        # Cached particles of each type
+        self._type_views = None
         # List with particles sorted by pT
         super().__init__(self._sort_by_pt(list_particle))
         # Stores the weights of the event
@@ -77,11 +108,27 @@ class Event(UserList):
         return cls([Particle(particle_info) for particle_info in list_particles_info], event_weights)
 
     def __getattr__(self, part_type: str) -> List[Particle]:
-        """Returns only the particles of a given type."""
+        """Returns a new list with only the particles of a given type, sorted by pT."""
         if part_type not in self.particles_type:
             raise AttributeError(f"'{type(self).__name__}' object has no attribute '{part_type}'")
+        if self.__dict__.get("_type_views") is None:
+            self._type_views = self._build_type_views()
+        # The cached particles are copied, so that changes of the returned list do not affect the event
+        return list(self._type_views[part_type])
+
+    def _build_type_views(self):
+        """Splits the particles by type in a single pass over the event."""
+        type_names = {type_code: type_name for type_name, type_code in self.particles_type.items()}
+        type_views = {type_name: [] for type_name in self.particles_type}
         # Ensures that particles are sorted by pT
-        return self._sort_by_pt([particle for particle in self.data if particle.typ == self.particles_type[part_type]])
+        for particle in self._sort_by_pt(self.data):
+            if particle.typ in type_names:
+                type_views[type_names[particle.typ]].append(particle)
+        return {type_name: tuple(particles) for type_name, particles in type_views.items()}
+
+    def _invalidate_type_views(self):
+        """The particles of each type must be found again after the event is modified."""
+        self._type_views = None
 
     @staticmethod
     def _sort_by_pt(part_list: List[Particle]):
@@ -104,4 +151,43 @@ class Event(UserList):
         """Removes the particles of a given type."""
         if parts_type in self.particles_type:
             self.data = [particle for particle in self.data if particle.typ != self.particles_type[parts_type]]
+            self._invalidate_type_views()
+
+    # Methods that modify the list of particles must invalidate the cached types
+
+    def append(self, particle: Particle):
+        super().append(particle)
+        self._invalidate_type_views()
+
+    def extend(self, particles):
+        super().extend(particles)
+        self._invalidate_type_views()
+
+    def insert(self, index: int, particle: Particle):
+        super().insert(index, particle)
+        self._invalidate_type_views()
+
+    def remove(self, particle: Particle):
+        super().remove(particle)
+        self._invalidate_type_views()
+
+    def pop(self, index: int = -1) -> Particle:
+        self._invalidate_type_views()
+        return super().pop(index)
+
+    def clear(self):
+        super().clear()
+        self._invalidate_type_views()
+
+    def __setitem__(self, index, particle):
+        super().__setitem__(index, particle)
+        self._invalidate_type_views()
+
+    def __delitem__(self, index):
+        super().__delitem__(index)
+        self._invalidate_type_views()
+
+    def __iadd__(self, particles):
+        self._invalidate_type_views()
+        return super().__iadd__(particles)
 
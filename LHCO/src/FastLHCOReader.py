@@ -0,0 +1,274 @@
+"""
+    Fast reader of .lhco files.
+    The lines of each block of the file are converted into numbers at once and split into events with numpy,
+    giving a structured array with one row per particle, and each event is a lightweight view over its rows:
+    - EventView:
+        Same interface as Event (e.g. event.electrons), but the particles of each type are found once for the
+        whole block, and the Particle objects are only created for the types that are accessed.
+        The particles of each type are also available as structured arrays (event.columns("electrons")),
+        so that the selections can use numpy masks and build a new view with event.select.
+"""
+
+import numpy as np
+from typing import Dict, Iterator, List, Tuple
+from EventAnalysis_Framework.LHCO.src.EventInfo import Particle, Event
+from EventAnalysis_Framework.LHE.src.read_lhe_weights import read_lhe_weights
+
+# Information stored for each particle, in the same order as in the .lhco file
+LHCO_DTYPE = np.dtype([(info.replace("/", "_"), float) for info in Particle._particle_info_attrs])
+
+# Number of columns of the particle lines (the position of the particle followed by its information)
+_PARTICLE_COLUMNS = len(LHCO_DTYPE) + 1
+
+
+class EventView:
+    """
+    Event stored as a structured array with the particles sorted by pT.
+    The particles of a given type can be accessed as attributes, e.g. event.electrons,
+    which returns a new list of Particle objects, also sorted by pT, or as a structured array with columns.
+    """
+
+    particles_type = Event.particles_type
+    # Position of each type in the particles grouped by type
+    _type_positions = {type_name: position for position, type_name in enumerate(particles_type)}
+
+    def __init__(self, particles: np.ndarray = None, event_weights=None, by_type: np.ndarray = None,
+                 type_offsets: List[int] = None):
+        """
+        :param particles: Structured array with dtype LHCO_DTYPE, sorted by pT.
+                          It is found from by_type if not given.
+        :param event_weights: Weights of the event.
+        :param by_type: The particles grouped by type, in the order of particles_type, each type sorted by pT,
+                        followed by the particles of other types. It is found from particles if not given.
+        :param type_offsets: The particles of the i-th type are in by_type[type_offsets[i]:type_offsets[i + 1]].
+        """
+        self._particles = particles
+        self.weights = event_weights
+        self._by_type, self._type_offsets = by_type, type_offsets
+        # Cached Particle objects of each type
+        self._type_particles = {}
+
+    @property
+    def particles(self) -> np.ndarray:
+        """Structured array with all the particles, sorted by pT."""
+        if self._particles is None:
+            self._particles = self._by_type[np.argsort(-self._by_type["pt"], kind="stable")]
+        return self._particles
+
+    def _find_types(self):
+        """Groups the particles by type, if they were not given grouped."""
+        if self._by_type is None:
+            self._by_type, type_offsets = _group_by_type(self._particles, [0, len(self._particles)])
+            self._type_offsets = type_offsets[0]
+
+    def columns(self, part_type: str) -> np.ndarray:
+        """Structured array with only the particles of the given type."""
+        self._find_types()
+        position = self._type_positions[part_type]
+        return self._by_type[self._type_offsets[position]:self._type_offsets[position + 1]]
+
+    def select(self, type_masks: Dict[str, np.ndarray]) -> "EventView":
+        """
+        New view with only the particles of each type where the mask (over the rows of columns(type)) is True.
+        The types without a mask are kept whole, and the types with a mask of None are removed.
+        """
+        self._find_types()
+        keep = np.ones(len(self._by_type), dtype=bool)
+        for type_name, type_mask in type_masks.items():
+            position = self._type_positions[type_name]
+            keep[self._type_offsets[position]:self._type_offsets[position + 1]] = (
+                False if type_mask is None else type_mask)
+        # Number of particles kept before each offset
+        kept = np.zeros(len(keep) + 1, dtype=np.int64)
+        np.cumsum(keep, out=kept[1:])
+        return self.__class__(None, self.weights, self._by_type[keep], kept[self._type_offsets].tolist())
+
+    def __getattr__(self, part_type: str) -> List[Particle]:
+        """Returns a new list with only the particles of a given type."""
+        if part_type not in self.particles_type:
+            raise AttributeError(f"'{type(self).__name__}' object has no attribute '{part_type}'")
+        if part_type not in self._type_particles:
+            self._type_particles[part_type] = tuple(
+                Particle.from_values(particle_values) for particle_values in self.columns(part_type).tolist()
+            )
+        return list(self._type_particles[part_type])
+
+    def __len__(self):
+        return len(self._by_type) if self._particles is None else len(self._particles)
+
+    def __iter__(self) -> Iterator[Particle]:
+        return iter(self.to_event())
+
+    def to_event(self) -> Event:
+        """Converts the view into an Event object."""
+        return Event([Particle.from_values(particle_values) for particle_values in self.particles.tolist()],
+                     self.weights)
+
+
+def concatenate_columns(*columns: np.ndarray) -> np.ndarray:
+    """Concatenates structured arrays with dtype LHCO_DTYPE (np.concatenate is slow for small structured arrays)."""
+    concatenated = np.empty(sum(map(len, columns)), dtype=LHCO_DTYPE)
+    position = 0
+    for column in columns:
+        concatenated[position:position + len(column)] = column
+        position += len(column)
+    return concatenated
+
+
+def _group_by_type(particles: np.ndarray, offsets) -> Tuple[np.ndarray, List[List[int]]]:
+    """
+    Groups the particles of each event by type, in the order of EventView.particles_type, keeping the pT order.
+    Returns the grouped particles and, for each event, the offsets of the types relative to the event start.
+    """
+    number_of_evts, number_of_types = len(offsets) - 1, len(EventView.particles_type)
+    # Position of the type of each particle (number_of_types for the other types)
+    type_positions = np.full(len(particles), number_of_types)
+    for position, type_code in enumerate(EventView.particles_type.values()):
+        type_positions[particles["typ"] == type_code] = position
+    event_index = np.repeat(np.arange(number_of_evts), np.diff(offsets))
+    by_type = particles[np.lexsort((type_positions, event_index))]
+    counts = np.bincount(event_index * (number_of_types + 1) + type_positions,
+                         minlength=number_of_evts * (number_of_types + 1)).reshape(number_of_evts, -1)
+    type_offsets = np.zeros((number_of_evts, number_of_types + 1), dtype=np.int64)
+    np.cumsum(counts[:, :number_of_types], axis=1, out=type_offsets[:, 1:])
+    return by_type, type_offsets.tolist()
+
+
+def parse_LHCO(filename: str, block_size: int = 1 << 24) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+    """
+    Parses the file in blocks of about block_size bytes, each one holding only complete events.
+    Yields the structured array with the particles of the events in the block, where each event is sorted by pT,
+    and the offsets such that the particles of the i-th event are in the rows offsets[i]:offsets[i + 1].
+    """
+    with open(filename, "rb") as lhco_file:
+        # Lines of the last event of the previous block, which may continue in the next block
+        remainder = b""
+        while True:
+            block = lhco_file.read(block_size)
+            if not block:
+                break
+            # Completes the last line and keeps the last event for the next block
+            text = remainder + block + lhco_file.readline()
+            last_event = _last_event_start(text)
+            remainder = text[last_event:]
+            if last_event > 0:
+                yield _parse_block(text[:last_event], filename)
+        # Remaining events
+        if remainder:
+            yield _parse_block(remainder, filename)
+
+
+def _is_event_line(line: bytes) -> bool:
+    """Checks if the line starts a new event, i.e. its first column is 0."""
+    return line.split(None, 1)[:1] == [b"0"]
+
+
+def _last_event_start(text: bytes) -> int:
+    """Position of the first line of the last event in the text (0 if there is no event)."""
+    line_end = len(text)
+    while line_end > 0:
+        line_start = text.rfind(b"\n", 0, line_end - 1) + 1
+        if _is_event_line(text[line_start:line_end]):
+            return line_start
+        line_end = line_start
+    return 0
+
+
+def _remove_comments(text: bytes) -> bytes:
+    """Removes the lines starting with #."""
+    parts, position = [], 0
+    comment = text.find(b"#")
+    while comment >= 0:
+        line_start = text.rfind(b"\n", 0, comment) + 1
+        line_end = text.find(b"\n", comment)
+        line_end = len(text) if line_end < 0 else line_end
+        if not text[line_start:comment].strip():
+            parts.append(text[position:line_start])
+            position = line_end
+        comment = text.find(b"#", line_end)
+    return b"".join(parts) + text[position:] if parts else text
+
+
+def _parse_block(text: bytes, filename: str) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Converts all the lines of the block into numbers at once, and then splits them into events and particles.
+    Raises a ValueError if a particle line does not have the expected number of columns.
+    """
+    text = _remove_comments(text)
+    # Line of each column, from the positions where a column starts in the text
+    characters = np.frombuffer(text, dtype=np.uint8)
+    # Spaces and control characters separate the columns
+    is_space = characters <= ord(" ")
+    column_starts = np.flatnonzero(~is_space & np.concatenate([[True], is_space[:-1]]))
+    if not len(column_starts):
+        return _build_arrays(np.zeros((0, len(LHCO_DTYPE))), np.zeros(0, dtype=int))
+    value_lines = np.searchsorted(np.flatnonzero(characters == ord("\n")), column_starts)
+    values = np.fromstring(text, sep=" ")
+    if len(values) != len(column_starts):
+        raise ValueError(f"Only {len(values)} of the {len(column_starts)} columns of '{filename}' are numbers.")
+    line_starts = np.flatnonzero(np.concatenate([[True], value_lines[1:] != value_lines[:-1]]))
+    number_of_columns = np.diff(np.append(line_starts, len(values)))
+
+    # The lines starting with 0 signal a new event, and the others are particles
+    is_event = values[line_starts] == 0
+    is_particle = ~is_event
+    wrong_lines = np.flatnonzero(is_particle & (number_of_columns != _PARTICLE_COLUMNS))
+    if len(wrong_lines):
+        line = text.split(b"\n")[value_lines[line_starts[wrong_lines[0]]]].decode().strip()
+        raise ValueError(f"Particle line with {number_of_columns[wrong_lines[0]]} columns instead of "
+                         f"{_PARTICLE_COLUMNS} in '{filename}': '{line}'")
+
+    # Event of each line (the particles before the first event are skipped)
+    event_index = np.cumsum(is_event) - 1
+    is_particle &= event_index >= 0
+    # The first column (position of the particle in the event) is not needed
+    particle_values = values[line_starts[is_particle, np.newaxis] + np.arange(1, _PARTICLE_COLUMNS)]
+    counts = np.bincount(event_index[is_particle], minlength=np.count_nonzero(is_event))
+    return _build_arrays(particle_values, counts)
+
+
+def _build_arrays(values: np.ndarray, counts: np.ndarray):
+    """Converts the values of the particles into the structured array sorted by pT within each event."""
+    event_index = np.repeat(np.arange(len(counts)), counts)
+    # Sorts by event and by decreasing pT inside each event
+    order = np.lexsort((-values[:, LHCO_DTYPE.names.index("pt")], event_index))
+    particles = np.empty(len(values), dtype=LHCO_DTYPE)
+    for column, info in enumerate(LHCO_DTYPE.names):
+        particles[info] = values[order, column]
+    offsets = np.zeros(len(counts) + 1, dtype=int)
+    np.cumsum(counts, out=offsets[1:])
+    return particles, offsets
+
+
+def read_LHCO_fast(filename: str, start: int = 0, stop: int = None) -> Iterator[EventView]:
+    """
+    Yields a single event at time, as an EventView. Events without particles are skipped, as in read_LHCO.
+    If start or stop are given, only the events in [start, stop) are yielded.
+    """
+    # Index of the current event
+    event_index = 0
+    for particles, offsets in parse_LHCO(filename):
+        # The particles of each type are found for all the events of the block at once
+        by_type, type_offsets = _group_by_type(particles, offsets)
+        for begin, end, event_type_offsets in zip(offsets[:-1].tolist(), offsets[1:].tolist(), type_offsets):
+            if end > begin:
+                if stop is not None and event_index >= stop:
+                    return
+                if event_index >= start:
+                    yield EventView(particles[begin:end], by_type=by_type[begin:end], type_offsets=event_type_offsets)
+                event_index += 1
+
+
+def read_LHCO_fast_with_weight(filenames: Dict[str, str], start: int = 0, stop: int = None) -> Iterator[EventView]:
+    """
+    Reads the events from the .lhco file and the weights from the .lhe files.
+    If start or stop are given, only the events in [start, stop) are read.
+    """
+    # Reads only the weights from the lhe file
+    lhe_weights = read_lhe_weights(filename=filenames["LHE"])[start:stop]
+
+    # Reads the lhco file
+    for event_lhco, event_weight in zip(read_LHCO_fast(filename=filenames["LHCO"], start=start, stop=stop),
+                                        lhe_weights.tolist()):
+        event_lhco.weights = event_weight
+        yield event_lhco
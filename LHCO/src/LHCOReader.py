@@ -2,11 +2,18 @@
 
 from typing import List, Dict
 from EventAnalysis_Framework.LHCO.src.EventInfo import Event
-from EventAnalysis_Framework.LHE.src.read_lhe import read_lhe
+from EventAnalysis_Framework.LHE.src.read_lhe_weights import read_lhe_weights
 
 
-def read_LHCO(filename: str) -> List:
-    """Yields a single event at time."""
+def read_LHCO(filename: str, start: int = 0, stop: int = None) -> List:
+    """
+    Yields a single event at time.
+    If start or stop are given, only the events in [start, stop) are yielded,
+    and the particles of the events before start are not created.
+    """
+    # Index of the current event
+    event_index = 0
+
     # Holds all the events
     with open(filename) as lhco_file:
         event_particles = []
@@ -21,7 +28,11 @@ def read_LHCO(filename: str) -> List:
             # Signal a new event
             if current_line.startswith("0"):
                 if event_particles:
-                    yield Event.from_str_particles_info(event_particles)
+                    if stop is not None and event_index >= stop:
+                        return
+                    if event_index >= start:
+                        yield Event.from_str_particles_info(event_particles)
+                    event_index += 1
                 # Reset event for the next particles
                 event_particles = []
 
@@ -30,7 +41,7 @@ def read_LHCO(filename: str) -> List:
                 event_particles.append(current_line[1:])
 
         # Add last event if it exists
-        if event_particles:
+        if event_particles and event_index >= start and (stop is None or event_index < stop):
             yield Event.from_str_particles_info(event_particles)
 
 
@@ -39,12 +50,16 @@ def read_LHCO_all_events(filaname: str):
     return [event for event in read_LHCO(filaname)]
 
 
-def read_LHCO_with_weight(filenames: Dict[str, str]):
-    """Reads the events from the .lhco file and the weights from the .lhe files"""
-    # Reads the lhe file
-    lhe_events = read_lhe(filename=filenames["LHE"])
+def read_LHCO_with_weight(filenames: Dict[str, str], start: int = 0, stop: int = None):
+    """
+    Reads the events from the .lhco file and the weights from the .lhe files.
+    If start or stop are given, only the events in [start, stop) are read.
+    """
+    # Reads only the weights from the lhe file
+    lhe_weights = read_lhe_weights(filename=filenames["LHE"])[start:stop]
 
     # Reads the lhco file
-    for event_lhco, event_lhe in zip(read_LHCO(filename=filenames["LHCO"]), lhe_events):
-        event_lhco.weights = event_lhe.eventinfo.weight
+    for event_lhco, event_weight in zip(read_LHCO(filename=filenames["LHCO"], start=start, stop=stop),
+                                        lhe_weights.tolist()):
+        event_lhco.weights = event_weight
         yield event_lhco
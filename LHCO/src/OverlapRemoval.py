@@ -0,0 +1,96 @@
+"""
+    Overlap removal between two collections of objects (e.g. jets and leptons).
+    The DeltaR between all the pairs of objects is computed at once from their eta and phi, and the objects of the
+    losing collection that are too close to any object of the winning collection are removed.
+    The collections can be:
+    - Sequences of Particle objects (e.g. event.jets).
+    - Structured arrays with the LHCO_DTYPE fields (e.g. EventView.columns("jets")), with shape (k,) for one event
+      or (number of events, k) for a batch of events padded with NaN.
+"""
+
+import numpy as np
+from typing import Callable, Sequence, Tuple, Union
+from EventAnalysis_Framework.LHCO.src.EventInfo import Particle
+from EventAnalysis_Framework.LHCO.src.FastLHCOReader import LHCO_DTYPE
+
+Collection = Union[Sequence[Particle], np.ndarray]
+
+
+def delta_r_matrix(eta1: np.ndarray, phi1: np.ndarray, eta2: np.ndarray, phi2: np.ndarray) -> np.ndarray:
+    """
+    DeltaR between all the pairs formed by one object with (eta1, phi1), with shape (..., k),
+    and one object with (eta2, phi2), with shape (..., l). Returns an (..., k, l) array.
+    """
+    delta_eta = eta1[..., :, np.newaxis] - eta2[..., np.newaxis, :]
+    # Azimuthal angle difference in range [-π, π]
+    delta_phi = np.mod(phi1[..., :, np.newaxis] - phi2[..., np.newaxis, :] + np.pi, 2 * np.pi) - np.pi
+    return np.sqrt(delta_eta**2 + delta_phi**2)
+
+
+def as_array(collection: Collection) -> np.ndarray:
+    """Converts a sequence of Particle objects into a structured array with dtype LHCO_DTYPE."""
+    if isinstance(collection, np.ndarray):
+        return collection
+    return np.array([tuple(getattr(particle, info) for info in Particle._info_slots) for particle in collection],
+                    dtype=LHCO_DTYPE)
+
+
+class OverlapRemoval:
+    """
+    Removes the objects of one collection that are closer than delta_r to any object of the other collection.
+
+    Example: jets close to the selected leptons, except the b-tagged ones
+        jet_lepton_overlap = OverlapRemoval(delta_r=0.4, winner="second", exempt=lambda jets: jets["btag"] > 0)
+        jets, leptons = jet_lepton_overlap.apply(event.jets, event.electrons + event.muons)
+    """
+
+    def __init__(self, delta_r: float = 0.4, winner: str = "second", exempt: Callable = None):
+        """
+        :param delta_r: Objects with DeltaR < delta_r overlap.
+        :param winner: Collection that is kept when two objects overlap, "first" or "second".
+        :param exempt: Receives the structured array of the losing collection and returns a boolean array with the
+                       objects that are never removed (e.g. b-tagged jets).
+        """
+        if winner not in ("first", "second"):
+            raise ValueError(f"winner must be 'first' or 'second', not '{winner}'.")
+        self.delta_r = delta_r
+        self.winner = winner
+        self.exempt = exempt
+
+    def masks(self, first: Collection, second: Collection) -> Tuple[np.ndarray, np.ndarray]:
+        """Boolean arrays with the objects of each collection that are kept."""
+        first, second = as_array(first), as_array(second)
+        # Padded entries (NaN) never overlap
+        overlap = delta_r_matrix(first["eta"], first["phi"], second["eta"], second["phi"]) < self.delta_r
+
+        if self.winner == "second":
+            loser, keep_loser = first, ~np.any(overlap, axis=-1)
+        else:
+            loser, keep_loser = second, ~np.any(overlap, axis=-2)
+        if self.exempt is not None:
+            keep_loser |= np.asarray(self.exempt(loser), dtype=bool)
+        keep_winner = np.ones((second if self.winner == "second" else first).shape, dtype=bool)
+
+        return (keep_winner, keep_loser) if self.winner == "first" else (keep_loser, keep_winner)
+
+    def apply(self, first: Collection, second: Collection) -> Tuple[Collection, Collection]:
+        """
+        Returns both collections without the removed objects.
+        Sequences of Particle objects are returned as lists. For arrays with a batch of events, the removed
+        objects are set to NaN so that the shape is preserved.
+        """
+        keep_first, keep_second = self.masks(first, second)
+        return self._filter(first, keep_first), self._filter(second, keep_second)
+
+    @staticmethod
+    def _filter(collection: Collection, keep: np.ndarray) -> Collection:
+        """Removes the objects that are not kept."""
+        if not isinstance(collection, np.ndarray):
+            return [particle for particle, keep_particle in zip(collection, keep.tolist()) if keep_particle]
+        if collection.ndim == 1:
+            return collection[keep]
+        # Batch of events
+        filtered = collection.copy()
+        for info in filtered.dtype.names:
+            filtered[info][~keep] = np.nan
+        return filtered
@@ -6,11 +6,12 @@ import json
 
 import pylhe
 import numpy as np
-from EventAnalysis_Framework.LHE.src.read_lhe import read_lhe
+from EventAnalysis_Framework.LHE.src.read_lhe import read_lhe_with_rwgt, lhe_weight_names
 from EventAnalysis_Framework.LHE.src.kinematic_funcs import build_four_momentum, eta, pT
 from EventAnalysis_Framework.LHE.src.Observables import InvariantMassObs
 from EventAnalysis_Framework.src.Histogram import WeightedHistogramManager
 from EventAnalysis_Framework.src.Analysis import EventAnalysis, EventLoop
+from EventAnalysis_Framework.src.BatchRunner import BatchRunner, Sample
 
 
 def leptons_kin_cuts(event: pylhe.LHEEvent):
@@ -24,8 +25,8 @@ def leptons_kin_cuts(event: pylhe.LHEEvent):
 
 
 def get_weights(event: pylhe.LHEEvent):
-    """Get the weights of the event"""
-    return event.weights
+    """Get the weights of the event, in the order of lhe_weight_names"""
+    return event.rwgt
 
 
 def build_filename(parameters: tuple):
@@ -109,27 +110,27 @@ if __name__ == "__main__":
         # Prefix of the lhe file
         lhe_prefix = f"Zprime-beta-{beta * 10:.0f}E-01-MXX-{MXX}-TeV-bin"
 
-        # Book the histogram
+        # Files of all the bins of the simulation
+        lhe_files = [f"{folderpath}/{foldername}/{lhe_prefix}-{bin_number}.lhe" for bin_number in range(1, nbins + 1)]
+
+        # Book the histogram (the weights of the events are in the order of the <initrwgt> block)
         histograms_mxx = WeightedHistogramManager(
             bin_edges=bin_edges, observale=InvariantMassObs(part_pids=[11]), get_weights=get_weights,
-            hist_names=list(reweight_labels[MXX].keys())
+            hist_names=list(reweight_labels[MXX].keys()), weight_names=lhe_weight_names(lhe_files[0])
         )
 
         # Performs the loop over the events
-        event_loop = EventLoop(file_reader=read_lhe, histogram=histograms_mxx)
-
-        # Launches the event analysis in each bin of the simulation
-        for bin_number in range(1, nbins + 1):
-            lhe_filename = f"{folderpath}/{foldername}/{lhe_prefix}-{bin_number}.lhe"
+        event_loop = EventLoop(file_reader=read_lhe_with_rwgt, histogram=histograms_mxx)
 
-            # Run the analysis on the file
-            current_hist, number_of_evts = event_loop.analyse_events(lhe_filename, event_analysis)
+        # Launches the event analysis in all the bins of the simulation (in units of fb)
+        sample = Sample(label=foldername, files=lhe_files, scale=1e3)
+        current_hist = BatchRunner(event_loop=event_loop, event_analysis=event_analysis, n_workers=nbins).run(
+            [sample])[foldername]
 
-            # Updates the histograms
-            for hist_name, model_param in reweight_labels[MXX].items():
-                param_values = (model_param["beta"], model_param["MXX"])
-                # In units of fb
-                histograms_model[param_values] += 1e3 * current_hist[hist_name] / number_of_evts
+        # Updates the histograms
+        for hist_name, model_param in reweight_labels[MXX].items():
+            param_values = (model_param["beta"], model_param["MXX"])
+            histograms_model[param_values] += current_hist[hist_name]
 
     # Also the SM prediction
     with open(f"{folderpath}/../NCDY-HLLHC.json") as file_:
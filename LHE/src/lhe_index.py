@@ -0,0 +1,181 @@
+"""
+    Random access to the events of a .lhe file.
+    The byte offset of every <event> tag is found once and stored in a sidecar file next to the .lhe file
+    (see src/FileCache.py). The events in any range [start, stop) can then be read from the memory-mapped file
+    without parsing the events before them, e.g. to split a single file across several processes or jobs.
+"""
+
+import re
+import gzip
+import mmap
+import pylhe
+import numpy as np
+import xml.etree.ElementTree as ET
+from typing import Iterator, List
+from EventAnalysis_Framework.src.FileCache import load_cached, save_cached
+from EventAnalysis_Framework.src.Utilities import read_metadata
+from EventAnalysis_Framework.LHE.src.read_lhe_columnar import LHEEventBatch, read_lhe_lines_columnar
+from EventAnalysis_Framework.LHE.src.read_lhe_weights import MISSING_WEIGHT
+
+# Beginning of an event
+_EVENT_START_PATTERN = re.compile(rb"<event[\s>]")
+# End of an event
+_EVENT_END = b"</event>"
+
+# Suffix of the sidecar files
+_INDEX_SUFFIX = ".index.npz"
+
+# Number of bytes fed at once to the XML parser
+_FEED_SIZE = 1 << 24
+
+
+def build_lhe_index(filename: str, use_cache: bool = True) -> np.ndarray:
+    """
+    Returns an array with the byte offset of the <event> tag of each event, followed by the offset of the end of
+    the last event. The events in [start, stop) are then in the bytes offsets[start]:offsets[stop].
+    Only uncompressed files can be indexed.
+    """
+    if filename.endswith(".gz"):
+        raise ValueError(f"Compressed file '{filename}' cannot be indexed.")
+
+    if use_cache:
+        cached = load_cached(filename, _INDEX_SUFFIX)
+        if cached is not None:
+            return cached["offsets"]
+
+    with open(filename, "rb") as lhe_file, mmap.mmap(lhe_file.fileno(), 0, access=mmap.ACCESS_READ) as content:
+        # The events start after the <init> block
+        events_start = max(content.find(b"</init>"), 0)
+        offsets = [match.start() for match in _EVENT_START_PATTERN.finditer(content, events_start)]
+        # End of the last event
+        events_end = content.rfind(_EVENT_END)
+        offsets.append(events_end + len(_EVENT_END) if offsets and events_end > offsets[-1] else len(content))
+    offsets = np.array(offsets, dtype=np.int64)
+
+    if use_cache:
+        save_cached(filename, _INDEX_SUFFIX, {"offsets": offsets})
+    return offsets
+
+
+def number_of_events(filename: str) -> int:
+    """Number of events in the file, from its index."""
+    return len(build_lhe_index(filename)) - 1
+
+
+def read_lhe_range(filename: str, start: int = 0, stop: int = None,
+                   weight_names: List[str] = None) -> Iterator[pylhe.LHEEvent]:
+    """
+    Yields the events with index in [start, stop) as pylhe.LHEEvent objects, with the same information as
+    read_lhe (particles, <rwgt> weights, attributes and comment lines).
+    If weight_names is given, the <rwgt> weights of each event are instead stored in the attribute rwgt,
+    a float64 array in the order of weight_names (MISSING_WEIGHT for missing weights), and the weights dict is
+    left empty.
+    """
+    weight_columns = None if weight_names is None else {name: index for index, name in enumerate(weight_names)}
+    for element in _iterate_elements(filename, start, stop):
+        yield _to_lhe_event(element, weight_columns)
+
+
+def read_lhe_stream(filename: str, weight_names: List[str] = None) -> Iterator[pylhe.LHEEvent]:
+    """
+    Same as read_lhe_range over the whole file, but the file is read sequentially without building its index,
+    so compressed files can also be read.
+    """
+    weight_columns = None if weight_names is None else {name: index for index, name in enumerate(weight_names)}
+    open_file = gzip.open if filename.endswith(".gz") else open
+    with open_file(filename, "rb") as lhe_file:
+        parser = ET.XMLPullParser(events=["start", "end"])
+        root = None
+        for block in iter(lambda: lhe_file.read(_FEED_SIZE), b""):
+            parser.feed(block)
+            if root is None:
+                # The first element of the file, whose children are the events
+                parser_events = parser.read_events()
+                root = next(parser_events, (None, None))[1]
+                if root is None:
+                    continue
+            for element in _completed_events(parser, root):
+                yield _to_lhe_event(element, weight_columns)
+        parser.close()
+
+
+def read_lhe_range_columnar(filename: str, start: int = 0, stop: int = None,
+                            chunk_size: int = 10000) -> Iterator[LHEEventBatch]:
+    """Yields the events with index in [start, stop) as LHEEventBatch objects with up to chunk_size events each."""
+    # The weights are in the order of the header, since the first event of the range can differ between ranges
+    weight_names = read_metadata(filename)["weight_names"] or None
+    yield from read_lhe_lines_columnar(_iterate_lines(filename, start, stop, chunk_size), chunk_size, weight_names)
+
+
+def _iterate_lines(filename: str, start: int, stop: int, block_size: int) -> Iterator[str]:
+    """Yields the lines of the events in [start, stop), decoding blocks of up to block_size events at a time."""
+    offsets = build_lhe_index(filename)
+    start, stop, _ = slice(start, stop).indices(len(offsets) - 1)
+    with open(filename, "rb") as lhe_file, mmap.mmap(lhe_file.fileno(), 0, access=mmap.ACCESS_READ) as content:
+        for block_start in range(start, stop, block_size):
+            block_stop = min(block_start + block_size, stop)
+            yield from content[offsets[block_start]:offsets[block_stop]].decode().splitlines(keepends=True)
+
+
+def _byte_range(filename: str, start: int, stop: int):
+    """Bytes of the file with the events in [start, stop)."""
+    offsets = build_lhe_index(filename)
+    number_of_evts = len(offsets) - 1
+    start, stop, _ = slice(start, stop).indices(number_of_evts)
+    stop = max(start, stop)
+    return int(offsets[start]), int(offsets[stop])
+
+
+def _iterate_elements(filename: str, start: int, stop: int) -> Iterator[ET.Element]:
+    """Parses the events in [start, stop) and yields one <event> element at a time."""
+    with open(filename, "rb") as lhe_file, mmap.mmap(lhe_file.fileno(), 0, access=mmap.ACCESS_READ) as content:
+        begin, end = _byte_range(filename, start, stop)
+        parser = ET.XMLPullParser(events=["start", "end"])
+        parser.feed(b"<events>")
+        root = next(parser.read_events())[1]
+        # Feeds the events in blocks to keep the memory bounded
+        for block_start in range(begin, end, _FEED_SIZE):
+            parser.feed(content[block_start:min(block_start + _FEED_SIZE, end)])
+            yield from _completed_events(parser, root)
+        parser.feed(b"</events>")
+        yield from _completed_events(parser, root)
+
+
+def _completed_events(parser: ET.XMLPullParser, root: ET.Element) -> Iterator[ET.Element]:
+    """Yields the <event> elements already parsed, and then removes them to free memory."""
+    for parser_event, element in parser.read_events():
+        if parser_event == "end" and element.tag == "event":
+            yield element
+            root.clear()
+
+
+def _to_lhe_event(element: ET.Element, weight_columns: dict = None) -> pylhe.LHEEvent:
+    """
+    Converts an <event> element into a pylhe.LHEEvent, in the same way as pylhe.read_lhe_with_attributes.
+    If weight_columns (column of each weight id) is given, the weights are stored in the array event.rwgt.
+    """
+    data = element.text.strip().split("\n")
+    event_info = pylhe.LHEEventInfo.fromstring(data[0])
+    particles, optional = [], []
+    for particle_line in data[1:]:
+        if not particle_line.strip().startswith("#"):
+            particles.append(pylhe.LHEParticle.fromstring(particle_line))
+        else:
+            optional.append(particle_line.strip())
+
+    weights = {}
+    rwgt = None if weight_columns is None else np.full(len(weight_columns), MISSING_WEIGHT)
+    for sub_element in element:
+        if sub_element.tag == "rwgt":
+            for weight in sub_element:
+                if weight.tag != "wgt":
+                    continue
+                if rwgt is None:
+                    weights[weight.attrib["id"]] = float(weight.text.strip())
+                elif weight.attrib["id"] in weight_columns:
+                    rwgt[weight_columns[weight.attrib["id"]]] = float(weight.text.strip())
+
+    event = pylhe.LHEEvent(event_info, particles, weights, dict(element.attrib), optional)
+    if rwgt is not None:
+        event.rwgt = rwgt
+    return event
@@ -1,9 +1,49 @@
 """Wrapper to read the lhe files."""
 
+import itertools
 import pylhe
+from typing import Iterator, List
+from EventAnalysis_Framework.src.Utilities import read_metadata
+from EventAnalysis_Framework.LHE.src.lhe_index import read_lhe_range, read_lhe_stream, number_of_events
 
 
-def read_lhe(filename: str):
-    """Returns a generator over all the events in the file."""
-    lhe_file = pylhe.read_lhe_file(filepath=filename)
-    return lhe_file.events
+def read_lhe(filename: str, start: int = 0, stop: int = None):
+    """
+    Returns a generator over all the events in the file.
+    If start or stop are given, only the events in [start, stop) are read, using the index of the file
+    (see lhe_index). The events of compressed files are skipped instead.
+    """
+    if start == 0 and stop is None:
+        lhe_file = pylhe.read_lhe_file(filepath=filename)
+        return lhe_file.events
+    if filename.endswith(".gz"):
+        return itertools.islice(read_lhe(filename), start, stop)
+    return read_lhe_range(filename, start, stop)
+
+
+def lhe_weight_names(filename: str) -> List[str]:
+    """
+    Ids of the <rwgt> weights of the file, in the order of the <initrwgt> block of the header,
+    or in the order of the first event if the header does not declare them.
+    """
+    weight_names = read_metadata(filename)["weight_names"]
+    if not weight_names:
+        # Only the first event is parsed, without indexing the file
+        first_event = next(iter(read_lhe(filename)), None)
+        weight_names = [] if first_event is None else list(first_event.weights)
+    return weight_names
+
+
+def read_lhe_with_rwgt(filename: str, start: int = 0, stop: int = None) -> Iterator[pylhe.LHEEvent]:
+    """
+    Same as read_lhe, but the <rwgt> weights of each event are stored in the attribute rwgt as a float64 array,
+    with the columns in the order of lhe_weight_names (MISSING_WEIGHT for missing weights), instead of the
+    weights dictionary, which is left empty.
+    The whole file (or any range of a compressed file) is read sequentially, and the ranges of uncompressed
+    files use the index of the file. Both give the same events.
+    """
+    weight_names = lhe_weight_names(filename)
+    if (start == 0 and stop is None) or filename.endswith(".gz"):
+        yield from itertools.islice(read_lhe_stream(filename, weight_names), start, stop)
+    else:
+        yield from read_lhe_range(filename, start, stop, weight_names)
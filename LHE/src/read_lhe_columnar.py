@@ -0,0 +1,217 @@
+"""
+    Reads the .lhe files in chunks of events stored as contiguous arrays (structure-of-arrays).
+    Observables and cuts can then be evaluated over a whole chunk at once instead of event by event.
+"""
+
+import re
+import pylhe
+import numpy as np
+from typing import List, Iterable, Iterator
+from EventAnalysis_Framework.src.Utilities import read_metadata
+from EventAnalysis_Framework.LHE.src.read_lhe_weights import MISSING_WEIGHT
+
+# Weights of the <rwgt> block, e.g. <wgt id='rwgt_1'> 1.234e-01 </wgt>
+_WEIGHT_PATTERN = re.compile(r"<wgt\s+id=['\"]?([^'\">\s]+)['\"]?\s*>\s*([^<\s]+)\s*</wgt>")
+
+
+class LHEEventBatch:
+    """
+    Chunk of events from a .lhe file.
+
+    The particles of all the events are stored in flat arrays (pid, status, px, ...), where the particles
+    of the i-th event are in the slice offsets[i]:offsets[i + 1].
+    Quantities of the event (weight, scale, ...) are arrays with one entry per event, and the <rwgt> weights
+    are stored in the (number of events x number of weights) matrix rwgt, with columns named by weight_names.
+    """
+
+    # Columns of the particle lines and of the first line of the event in the .lhe file
+    particle_fields = "pid status mother1 mother2 color1 color2 px py pz e m lifetime spin".split()
+    event_fields = "nparticles process_id weight scale aqed aqcd".split()
+    _integer_fields = "pid status mother1 mother2 color1 color2 nparticles process_id".split()
+
+    def __init__(self, particles: np.ndarray, events: np.ndarray, rwgt: np.ndarray = None,
+                 weight_names: List[str] = None):
+        """
+        :param particles: (number of particles x 13) array with the particle lines of all the events.
+        :param events: (number of events x 6) array with the first line of each event.
+        :param rwgt: (number of events x number of weights) array with the <rwgt> weights.
+        :param weight_names: ids of the <rwgt> weights, in the same order as the columns of rwgt.
+        """
+        for index, field in enumerate(self.particle_fields):
+            column = particles[:, index]
+            setattr(self, field, column.astype(int) if field in self._integer_fields else column)
+        for index, field in enumerate(self.event_fields):
+            column = events[:, index]
+            setattr(self, field, column.astype(int) if field in self._integer_fields else column)
+
+        self.weight_names = weight_names if weight_names is not None else []
+        self.rwgt = rwgt if rwgt is not None else np.zeros((len(events), len(self.weight_names)))
+
+        # Position of the particles of each event in the flat arrays
+        self.offsets = np.zeros(len(events) + 1, dtype=int)
+        np.cumsum(self.nparticles, out=self.offsets[1:])
+        # Index of the event that each particle belongs to
+        self.event_index = np.repeat(np.arange(len(events)), self.nparticles)
+
+    def __len__(self):
+        return len(self.weight)
+
+    def __getitem__(self, index) -> "LHEEventBatch":
+        """Returns a new batch with the events selected by index (boolean mask, array of indices or slice)."""
+        event_indices = np.arange(len(self))[index]
+        # Positions of the particles of the selected events in the flat arrays
+        counts = self.nparticles[event_indices]
+        particle_indices = (np.repeat(self.offsets[event_indices] - np.cumsum(counts) + counts, counts)
+                            + np.arange(counts.sum()))
+        particles = np.column_stack([getattr(self, field)[particle_indices] for field in self.particle_fields])
+        events = np.column_stack([getattr(self, field)[event_indices] for field in self.event_fields])
+        return self.__class__(particles, events, self.rwgt[event_indices], self.weight_names)
+
+    def __iter__(self) -> Iterator[pylhe.LHEEvent]:
+        """
+        Yields the events in the batch as pylhe.LHEEvent objects,
+        so that functions written for single events can also be applied to a batch.
+        Each event also holds its row of the rwgt matrix as the attribute rwgt.
+        """
+        particle_columns = np.column_stack([getattr(self, field) for field in self.particle_fields]).tolist()
+        event_columns = np.column_stack([getattr(self, field) for field in self.event_fields]).tolist()
+        for event_index, event_info in enumerate(event_columns):
+            particles = [
+                pylhe.LHEParticle(**dict(zip(pylhe.LHEParticle.fieldnames, map(float, particle_info))))
+                for particle_info in particle_columns[self.offsets[event_index]:self.offsets[event_index + 1]]
+            ]
+            event = pylhe.LHEEvent(
+                eventinfo=pylhe.LHEEventInfo(**dict(zip(pylhe.LHEEventInfo.fieldnames, map(float, event_info)))),
+                particles=particles,
+                weights=dict(zip(self.weight_names, self.rwgt[event_index].tolist()))
+            )
+            event.rwgt = self.rwgt[event_index]
+            yield event
+
+    def particles_mask(self, abs_pids: List[int], status: int = None) -> np.ndarray:
+        """Boolean mask over all the particles selecting the ones with |pid| in abs_pids (and the given status)."""
+        mask = np.isin(np.abs(self.pid), abs_pids)
+        if status is not None:
+            mask &= self.status == status
+        return mask
+
+    def momenta(self) -> np.ndarray:
+        """(number of particles x 4) array with the four-momenta (e, px, py, pz) of all the particles."""
+        return np.column_stack([self.e, self.px, self.py, self.pz])
+
+    def total_momentum(self, abs_pids: List[int]) -> np.ndarray:
+        """
+        (number of events x 4) array with the sum of the four-momenta of the particles with |pid| in abs_pids.
+        Same as kinematic_funcs.evaluate_total_momentum, but for all the events in the batch.
+        """
+        mask = self.particles_mask(abs_pids)
+        total_momentum = np.zeros((len(self), 4))
+        np.add.at(total_momentum, self.event_index[mask], self.momenta()[mask])
+        return total_momentum
+
+    def padded_momenta(self, abs_pids: List[int], n_max: int = None, status: int = None) -> np.ndarray:
+        """
+        (number of events x n_max x 4) array with the four-momenta of the particles with |pid| in abs_pids,
+        in the same order as in the file. Events with less than n_max of those particles are padded with NaN.
+        """
+        mask = self.particles_mask(abs_pids, status)
+        return self._padded(self.momenta()[mask], mask, n_max, fill_value=np.nan)
+
+    def padded_pids(self, abs_pids: List[int], n_max: int = None, status: int = None) -> np.ndarray:
+        """(number of events x n_max) array with the PIDs of the particles in padded_momenta, padded with 0."""
+        mask = self.particles_mask(abs_pids, status)
+        return self._padded(self.pid[mask], mask, n_max, fill_value=0)
+
+    def _padded(self, values: np.ndarray, mask: np.ndarray, n_max: int, fill_value) -> np.ndarray:
+        """Distributes the values of the particles selected by mask into a (number of events x n_max) grid."""
+        event_index = self.event_index[mask]
+        # Position of each selected particle among the selected particles of its event
+        counts = np.bincount(event_index, minlength=len(self))
+        position = np.arange(len(event_index)) - np.repeat(np.cumsum(counts) - counts, counts)
+        n_max = counts.max(initial=0) if n_max is None else n_max
+        # Particles beyond n_max are dropped
+        keep = position < n_max
+        padded = np.full((len(self), n_max) + values.shape[1:], fill_value, dtype=values.dtype)
+        padded[event_index[keep], position[keep]] = values[keep]
+        return padded
+
+
+def _build_batch(event_lines: List[str], particle_lines: List[str], weights: List[List[float]],
+                 weight_names: List[str]) -> LHEEventBatch:
+    """Converts the lines of a chunk of events into a LHEEventBatch."""
+    events = np.array("".join(event_lines).split(), dtype=float).reshape(-1, len(LHEEventBatch.event_fields))
+    particles = np.array("".join(particle_lines).split(), dtype=float).reshape(
+        -1, len(LHEEventBatch.particle_fields))
+    rwgt = np.array(weights, dtype=float).reshape(len(events), len(weight_names))
+    return LHEEventBatch(particles, events, rwgt, weight_names)
+
+
+def read_lhe_columnar(filename: str, chunk_size: int = 10000, weight_names: List[str] = None
+                      ) -> Iterator[LHEEventBatch]:
+    """
+    Yields the events in the file as LHEEventBatch objects with up to chunk_size events each.
+    The columns of the <rwgt> weights are given by weight_names. By default, they are in the order of the
+    <initrwgt> block of the header, or in the order of the first event if the header does not declare them.
+    The weights missing in an event are MISSING_WEIGHT.
+    """
+    if weight_names is None:
+        weight_names = read_metadata(filename)["weight_names"] or None
+    with open(filename) as lhe_file:
+        yield from read_lhe_lines_columnar(lhe_file, chunk_size, weight_names)
+
+
+def read_lhe_lines_columnar(lines: Iterable[str], chunk_size: int = 10000, weight_names: List[str] = None
+                            ) -> Iterator[LHEEventBatch]:
+    """
+    Same as read_lhe_columnar, but reading the events from the lines of a .lhe file.
+    If weight_names is None, the <rwgt> weights are stored in the order of the first event.
+    """
+    # Lines of the events in the current chunk
+    event_lines, particle_lines, weights = [], [], []
+
+    in_event = False
+    missing_particles = 0
+    for line in lines:
+        stripped_line = line.lstrip()
+
+        # Looks for the beginning of the event
+        if not in_event:
+            if stripped_line.startswith("<event"):
+                in_event = True
+                event_weights = {}
+                missing_particles = -1
+            continue
+
+        # First line of the event
+        if missing_particles < 0:
+            event_lines.append(line)
+            missing_particles = int(stripped_line.split(None, 1)[0])
+            continue
+
+        # Particles of the event (comment lines are skipped)
+        if missing_particles > 0:
+            if not stripped_line.startswith("#"):
+                particle_lines.append(line)
+                missing_particles -= 1
+            continue
+
+        # Reweighting information
+        if stripped_line.startswith("<wgt"):
+            for weight_name, weight in _WEIGHT_PATTERN.findall(line):
+                event_weights[weight_name] = float(weight)
+
+        # End of the event
+        elif stripped_line.startswith("</event"):
+            in_event = False
+            if weight_names is None:
+                weight_names = list(event_weights)
+            weights.append([event_weights.get(weight_name, MISSING_WEIGHT) for weight_name in weight_names])
+
+            # Chunk is complete
+            if len(event_lines) == chunk_size:
+                yield _build_batch(event_lines, particle_lines, weights, weight_names)
+                event_lines, particle_lines, weights = [], [], []
+
+    # Remaining events
+    if event_lines:
+        yield _build_batch(event_lines, particle_lines, weights, weight_names)
@@ -0,0 +1,97 @@
+"""
+    Reads only the weights of the events in a .lhe file.
+    Instead of parsing the events with pylhe, the raw bytes of the file are scanned for the first line of each
+    event (XWGTUP is its third field) and, if requested, for the <wgt> entries of the <rwgt> blocks.
+    The result is cached in a sidecar file next to the .lhe file (see src/FileCache.py).
+"""
+
+import re
+import gzip
+import mmap
+import numpy as np
+from typing import List, Tuple
+from EventAnalysis_Framework.src.FileCache import load_cached, save_cached
+
+# First line of the event: NUP IDPRUP XWGTUP ...
+_EVENT_HEADER_PATTERN = re.compile(rb"<event(?:\s[^>]*)?>\s*\S+\s+\S+\s+(\S+)")
+# Weights of the <rwgt> block, e.g. <wgt id='rwgt_1'> 1.234e-01 </wgt>
+_WEIGHT_PATTERN = re.compile(rb"<wgt\s+id=['\"]?([^'\">\s]+)['\"]?\s*>\s*([^<\s]+)\s*</wgt>")
+
+# Suffix of the sidecar files
+_WEIGHTS_SUFFIX = ".weights.npz"
+
+# Value of the <rwgt> weights that are missing in an event (as in WeightedHistogramManager)
+MISSING_WEIGHT = 1.
+
+
+def read_lhe_weights(filename: str, use_cache: bool = True) -> np.ndarray:
+    """Returns an array with the weight (XWGTUP) of each event in the file."""
+    return _load_weights(filename, with_rwgt=False, use_cache=use_cache)["weight"]
+
+
+def read_lhe_rwgt(filename: str, use_cache: bool = True) -> Tuple[np.ndarray, List[str]]:
+    """
+    Returns the (number of events x number of weights) matrix with the <rwgt> weights of each event,
+    and the ids of the weights (columns), in the order of the first event in the file.
+    Weights missing in an event are MISSING_WEIGHT.
+    """
+    weights = _load_weights(filename, with_rwgt=True, use_cache=use_cache)
+    return weights["rwgt"], weights["weight_names"].tolist()
+
+
+def _load_weights(filename: str, with_rwgt: bool, use_cache: bool):
+    """Reads the weights from the sidecar file if it is up to date, otherwise scans the .lhe file."""
+    if use_cache:
+        weights = load_cached(filename, _WEIGHTS_SUFFIX)
+        # The sidecars written with another value of the missing weights are scanned again
+        if weights is not None and (not with_rwgt or ("rwgt" in weights and "missing_weight" in weights
+                                                      and weights["missing_weight"] == MISSING_WEIGHT)):
+            return weights
+
+    weights = scan_lhe_weights(filename, with_rwgt)
+    if use_cache:
+        save_cached(filename, _WEIGHTS_SUFFIX, weights)
+    return weights
+
+
+def scan_lhe_weights(filename: str, with_rwgt: bool = False):
+    """
+    Scans the file for the weights of the events.
+    Returns a dictionary with the array of event weights ("weight") and, if with_rwgt,
+    the matrix with the <rwgt> weights ("rwgt") and their ids ("weight_names").
+    """
+    with open(filename, "rb") as lhe_file:
+        if filename.endswith(".gz"):
+            return _scan(gzip.GzipFile(fileobj=lhe_file).read(), with_rwgt)
+        with mmap.mmap(lhe_file.fileno(), 0, access=mmap.ACCESS_READ) as content:
+            return _scan(content, with_rwgt)
+
+
+def _scan(content, with_rwgt: bool):
+    """Finds the weights in the content of the file."""
+    # The events start after the <init> block
+    events_start = content.find(b"</init>")
+    events_start = 0 if events_start < 0 else events_start
+
+    event_starts, event_weights = [], []
+    for match in _EVENT_HEADER_PATTERN.finditer(content, events_start):
+        event_starts.append(match.start())
+        event_weights.append(match.group(1))
+    weights = {"weight": np.array(event_weights, dtype=float)}
+    if not with_rwgt:
+        return weights
+
+    # Each weight belongs to the last event that starts before it
+    weight_events, weight_columns, weight_values = [], [], []
+    weight_names = {}
+    for match in _WEIGHT_PATTERN.finditer(content, events_start):
+        weight_events.append(match.start())
+        weight_columns.append(weight_names.setdefault(match.group(1).decode(), len(weight_names)))
+        weight_values.append(match.group(2))
+    rwgt = np.full((len(event_starts), len(weight_names)), MISSING_WEIGHT)
+    rwgt[np.searchsorted(event_starts, weight_events) - 1, weight_columns] = np.array(weight_values, dtype=float)
+
+    weights["rwgt"] = rwgt
+    weights["weight_names"] = np.array(list(weight_names), dtype=str)
+    weights["missing_weight"] = np.array(MISSING_WEIGHT)
+    return weights
@@ -0,0 +1,124 @@
+"""
+    Kinematic functions for arrays of events.
+    Same functions as in kinematic_funcs, but the momenta are arrays whose last axis holds the
+    components (e, px, py, pz), e.g. (N, 4) for one particle per event or (N, k, 4) for k particles per event.
+    Missing particles can be padded with NaN, which propagates to the results.
+"""
+
+import numpy as np
+
+
+def pT(momenta) -> np.ndarray:
+    """Returns the pT of the particles."""
+    return np.sqrt(momenta[..., 1]**2 + momenta[..., 2]**2)
+
+
+def eta(momenta) -> np.ndarray:
+    """Computes the pseudo-rapidity of the particles."""
+    # Norm of the 3-momentum
+    p = np.sqrt(np.sum(momenta[..., 1:]**2, axis=-1))
+    # pseudo-rapidity
+    return -1 / 2 * np.log((p - momenta[..., 3]) / (p + momenta[..., 3]))
+
+
+def rap(momenta) -> np.ndarray:
+    """Computes the rapidity of the particles."""
+    return 0.5 * np.log((momenta[..., 0] + momenta[..., 3]) / (momenta[..., 0] - momenta[..., 3]))
+
+
+def phi(momenta) -> np.ndarray:
+    """Azimuthal angle from -pi to pi"""
+    return np.arctan2(momenta[..., 2], momenta[..., 1])
+
+
+def delta_phi(p1, p2) -> np.ndarray:
+    """Returns the azimuthal angle difference Δφ between the momenta, in range [-π, π]."""
+    dphi = phi(p1) - phi(p2)
+    dphi = np.where(dphi > np.pi, dphi - 2 * np.pi, dphi)
+    return np.where(dphi < -np.pi, dphi + 2 * np.pi, dphi)
+
+
+def delta_eta(p1, p2) -> np.ndarray:
+    """Returns the pseudo-rapidity difference"""
+    return eta(p1) - eta(p2)
+
+
+def deltaR(p1, p2) -> np.ndarray:
+    """Computes the DeltaR"""
+    return np.sqrt(delta_eta(p1, p2)**2 + delta_phi(p1, p2)**2)
+
+
+def M2(momenta) -> np.ndarray:
+    """Computes the squared invariant mass."""
+    return momenta[..., 0]**2 - np.sum(momenta[..., 1:]**2, axis=-1)
+
+
+def M(momenta) -> np.ndarray:
+    """Computes the invariant mass."""
+    return np.sqrt(M2(momenta))
+
+
+def pairwise_deltaR(p1, p2) -> np.ndarray:
+    """
+    DeltaR between all the pairs formed by one particle of p1, with shape (N, k, 4),
+    and one particle of p2, with shape (N, l, 4). Returns an (N, k, l) array.
+    """
+    return deltaR(p1[..., :, np.newaxis, :], p2[..., np.newaxis, :, :])
+
+
+def all_pairs_deltaR(momenta) -> np.ndarray:
+    """DeltaR between all the pairs of particles in each event, with shape (N, k, k). The diagonal is NaN."""
+    delta_r = pairwise_deltaR(momenta, momenta)
+    return _mask_diagonal(delta_r)
+
+
+def pair_masses(momenta) -> np.ndarray:
+    """Invariant mass of all the pairs of particles in each event, with shape (N, k, k). The diagonal is NaN."""
+    masses_squared = _mask_diagonal(M2(momenta[..., :, np.newaxis, :] + momenta[..., np.newaxis, :, :]))
+    # The diagonal is masked before the square root, and the rounding errors of massless pairs are clipped at 0
+    return np.sqrt(np.maximum(masses_squared, 0))
+
+
+def ossf_pair_masses(momenta, pids) -> np.ndarray:
+    """
+    Invariant mass of the opposite-sign same-flavour pairs in each event, with shape (N, k, k).
+    :param momenta: (N, k, 4) array with the four-momenta of the leptons.
+    :param pids: (N, k) array with the PIDs of the leptons (0 for padded entries).
+    Entries that do not correspond to an opposite-sign same-flavour pair are NaN.
+    """
+    pids = np.asarray(pids)
+    ossf = (pids[..., :, np.newaxis] == -pids[..., np.newaxis, :]) & (pids[..., :, np.newaxis] != 0)
+    return np.where(ossf, pair_masses(momenta), np.nan)
+
+
+def closest_ossf_pair(momenta, pids, target_mass: float):
+    """
+    Finds in each event the opposite-sign same-flavour pair with invariant mass closest to target_mass
+    (e.g. the Z boson candidate).
+    Returns three arrays with shape (N,): the indices i < j of the pair and its invariant mass.
+    Events without such pair have indices -1 and mass NaN.
+    """
+    masses = ossf_pair_masses(momenta, pids)
+    n_events, n_particles = masses.shape[0], masses.shape[-1]
+    no_pair = np.full(n_events, -1), np.full(n_events, -1), np.full(n_events, np.nan)
+    # Events with less than two particles (e.g. a chunk without muons)
+    if n_particles < 2:
+        return no_pair
+    # Each pair is considered only once (i < j)
+    distance = np.where(np.triu(np.ones((n_particles, n_particles), dtype=bool), k=1),
+                        np.abs(masses - target_mass), np.nan)
+    flat_distance = distance.reshape(n_events, n_particles * n_particles)
+    found = ~np.all(np.isnan(flat_distance), axis=1)
+    if not found.any():
+        return no_pair
+    best_pair = np.zeros(n_events, dtype=int)
+    best_pair[found] = np.nanargmin(flat_distance[found], axis=1)
+    first, second = np.divmod(best_pair, n_particles)
+    mass = masses.reshape(n_events, -1)[np.arange(n_events), best_pair]
+    return np.where(found, first, -1), np.where(found, second, -1), np.where(found, mass, np.nan)
+
+
+def _mask_diagonal(pair_values) -> np.ndarray:
+    """Sets the entries with the same particle twice to NaN."""
+    n_particles = pair_values.shape[-1]
+    return np.where(np.eye(n_particles, dtype=bool), np.nan, pair_values)
@@ -4,33 +4,81 @@
 
 from typing import List, Callable, Union, Dict
 from EventAnalysis_Framework.src.Histogram import Histogram
+from EventAnalysis_Framework.src.CutFlow import CutFlow
+import numpy as np
+import multiprocessing
+import itertools
+import inspect
 import copy
+import time
+
+
+def event_block(block_index: int, n_blocks: int, stop: int, start: int = 0, stride: int = 1):
+    """
+    (start, stop) of the block_index-th of n_blocks contiguous blocks of the events start, start + stride, ...
+    before stop, with the same number of events in each block. E.g. the range of the k-th of n jobs over the same
+    file, so that readers with start and stop arguments (e.g. read_lhe or read_hepmc_range) only read that block.
+    """
+    number_of_evts = len(range(start, stop, stride))
+    return tuple(min(start + stride * (number_of_evts * index // n_blocks), stop)
+                 for index in (block_index, block_index + 1))
+
+
+def _step_names(steps: List[Callable]) -> List[str]:
+    """Names of the functions (or classes of the callable objects), made unique with their position."""
+    names = []
+    for step in steps:
+        name = getattr(step, "__name__", type(step).__name__)
+        names.append(name if name not in names else f"{name}_{len(names)}")
+    return names
 
 
 class EventAnalysis:
     """
     Performs the analysis of a single event.
     Holds information about particle selections and event selection cuts.
+    It can also analyse batches of events (e.g. LHEEventBatch) with cuts that act on the whole batch.
     """
 
-    def __init__(self, cuts: List[Callable], particles_selection=None):
+    def __init__(self, cuts: List[Callable], particles_selection=None, batch_cuts: List[Callable] = None):
         """
         :param particles_selection:
             Returns an event with a list of particles selected for the analysis
         :param cuts:
             List of functions that represent the selection cuts.
             Each function must return True if the event passes the cut and False otherwise.
+        :param batch_cuts:
+            List of functions that represent selection cuts over a batch of events.
+            Each function must return a boolean array with True for the events that pass the cut.
+            They are only used by launch_batch_analysis.
         """
         self._particles_selections = particles_selection
         self._cuts = cuts
+        self._batch_cuts = batch_cuts if batch_cuts is not None else []
+
+        # Names of each step of the analysis, used by the cut flow
+        selection = [] if particles_selection is None else [particles_selection]
+        names = _step_names(self._batch_cuts + selection + self._cuts)
+        self._batch_cut_names = names[:len(self._batch_cuts)]
+        self._selection_name = names[len(self._batch_cuts)] if selection else None
+        self._cut_names = names[len(self._batch_cuts) + len(selection):]
 
-    def launch_analysis(self, event):
+    @property
+    def step_names(self) -> List[str]:
+        """Names of the steps of the analysis, in the order they are applied."""
+        selection_name = [] if self._selection_name is None else [self._selection_name]
+        return self._batch_cut_names + selection_name + self._cut_names
+
+    def launch_analysis(self, event, cut_flow: CutFlow = None):
         """
         Launches the analysis on the event.
         Returns a tuple, where the first item is a boolean indicating whether the event should be selected,
         and the second is the modified event after all the particle selections.
         This is done in case the modified event is needed by the EventLoop object for histogram booking.
+        If a CutFlow is given, the event is recorded on each step it goes through.
         """
+        if cut_flow is not None:
+            return self._launch_recorded_analysis(event, cut_flow, cut_flow.get_weight(event))
         # Creates an event with only the particles for the analysis.
         if self._particles_selections is not None:
             event = self._particles_selections(event)
@@ -39,6 +87,146 @@ class EventAnalysis:
         # Returns the boolean and the modified event
         return passed_cuts, event
 
+    def _launch_recorded_analysis(self, event, cut_flow: CutFlow, weight: float):
+        """Same as launch_analysis, but records the outcome and the time spent in each step."""
+        # Creates an event with only the particles for the analysis.
+        if self._particles_selections is not None:
+            start_time = time.perf_counter()
+            event = self._particles_selections(event)
+            cut_flow.record(self._selection_name, 1, 1, weight, time.perf_counter() - start_time)
+
+        # Applies the event selection cuts until one of them fails
+        for cut_name, cut in zip(self._cut_names, self._cuts):
+            start_time = time.perf_counter()
+            passed_cut = bool(cut(event))
+            cut_flow.record(cut_name, 1, int(passed_cut), weight if passed_cut else 0.,
+                            time.perf_counter() - start_time)
+            if not passed_cut:
+                return False, event
+
+        return True, event
+
+    def _launch_weighted_analysis(self, event, cut_flow: CutFlow, weight: float):
+        """Launches the analysis on an event of a batch, whose weight for the cut flow is already known."""
+        return self._launch_recorded_analysis(event, cut_flow, weight)
+
+    def launch_batch_analysis(self, batch, cut_flow: CutFlow = None):
+        """
+        Launches the analysis on a batch of events.
+        The batch cuts are applied first, each one only over the events that passed the previous cuts.
+        The particle selection and the single event cuts are then applied to each of the remaining events.
+        Returns a tuple, where the first item is the boolean mask of the selected events,
+        and the second is the batch with only the selected events.
+        If a CutFlow is given, the events are recorded on each step they go through.
+        """
+        # Events that passed all the cuts so far and their indices in the original batch
+        selected_batch = batch
+        selected_rows = np.arange(len(batch))
+        # Weight of each event for the cut flow
+        if cut_flow is not None:
+            weights = np.broadcast_to(np.asarray(cut_flow.get_weight(batch), dtype=float), (len(batch),))
+
+        # Applies the batch cuts
+        for cut_name, cut in zip(self._batch_cut_names, self._batch_cuts):
+            if len(selected_rows) == 0:
+                break
+            start_time = time.perf_counter()
+            passed_cut = np.asarray(cut(selected_batch), dtype=bool)
+            if cut_flow is not None:
+                cut_flow.record(cut_name, len(selected_rows), int(passed_cut.sum()),
+                                float(weights[selected_rows[passed_cut]].sum()), time.perf_counter() - start_time)
+            selected_batch, selected_rows = selected_batch[passed_cut], selected_rows[passed_cut]
+
+        # Applies the single event analysis on the remaining events
+        if len(selected_rows) and (self._cuts or self._particles_selections is not None):
+            if cut_flow is None:
+                passed_cuts = [self.launch_analysis(event)[0] for event in selected_batch]
+            else:
+                passed_cuts = [self._launch_weighted_analysis(event, cut_flow, weight)[0]
+                               for event, weight in zip(selected_batch, weights[selected_rows])]
+            passed_cuts = np.array(passed_cuts, dtype=bool)
+            selected_batch, selected_rows = selected_batch[passed_cuts], selected_rows[passed_cuts]
+
+        # Mask with the selected events
+        selected = np.zeros(len(batch), dtype=bool)
+        selected[selected_rows] = True
+        return selected, selected_batch
+
+
+class AdaptiveEventAnalysis(EventAnalysis):
+    """
+    EventAnalysis that reorders its cuts to reduce the time spent per event.
+
+    The cuts are applied in the given order on the first warmup_events events, while their cost and rejection
+    rate are measured. They are then sorted by cost over rejection rate, which minimizes the expected time per
+    event for independent cuts. An event is selected only if it passes all the cuts, so the selection does not
+    depend on the order.
+    Cuts that rely on previous ones (e.g. access the second lepton after a cut on the number of leptons) must be
+    pinned: pinned cuts keep their position and no cut is moved across them.
+    """
+
+    def __init__(self, cuts: List[Callable], particles_selection=None, batch_cuts: List[Callable] = None,
+                 warmup_events: int = 1000, pinned_cuts: List[Callable] = None):
+        """
+        :param warmup_events: Number of events used to measure the cost and rejection of the cuts.
+        :param pinned_cuts: Cuts that must keep their position in the list of cuts.
+        """
+        super().__init__(cuts=cuts, particles_selection=particles_selection, batch_cuts=batch_cuts)
+        self._pinned_cuts = pinned_cuts if pinned_cuts is not None else []
+        # Number of events left before the cuts are reordered
+        self._warmup_events = warmup_events
+        # Cost and rejection of each cut during the warm-up
+        self._profile = CutFlow()
+        self._profile.register(self._cut_names)
+
+    def launch_analysis(self, event, cut_flow: CutFlow = None):
+        """Launches the analysis on the event, measuring the cuts during the warm-up."""
+        if self._warmup_events <= 0:
+            return super().launch_analysis(event, cut_flow)
+        return self._launch_weighted_analysis(event, cut_flow, 1 if cut_flow is None else cut_flow.get_weight(event))
+
+    def _launch_weighted_analysis(self, event, cut_flow: CutFlow, weight: float):
+        """Launches the analysis on an event with a known weight, measuring the cuts during the warm-up."""
+        if self._warmup_events <= 0:
+            return super()._launch_weighted_analysis(event, cut_flow, weight)
+
+        # Records the event in the profile of the cuts (and in the cut flow, if given)
+        event_profile = CutFlow()
+        passed_cuts, event = self._launch_recorded_analysis(event, event_profile, weight)
+        self._profile.merge(event_profile)
+        if cut_flow is not None:
+            cut_flow.merge(event_profile)
+
+        # End of the warm-up
+        self._warmup_events -= 1
+        if self._warmup_events == 0:
+            self._reorder_cuts()
+
+        return passed_cuts, event
+
+    def _reorder_cuts(self):
+        """Sorts the cuts between pinned cuts by their cost per rejected event."""
+        scores = []
+        for cut_name in self._cut_names:
+            entering, passing, _, elapsed_time = self._profile[cut_name].values()
+            # Cuts that never rejected an event (or were never reached) go to the end
+            rejection = 1 - passing / entering if entering else 0.
+            scores.append(elapsed_time / entering / rejection if rejection > 0 else np.inf)
+
+        # Pinned cuts split the list into segments that are sorted independently
+        order, segment = [], []
+        for cut_index, cut in enumerate(self._cuts):
+            if cut in self._pinned_cuts:
+                order += sorted(segment, key=scores.__getitem__) + [cut_index]
+                segment = []
+            else:
+                segment.append(cut_index)
+        order += sorted(segment, key=scores.__getitem__)
+
+        self._cuts = [self._cuts[cut_index] for cut_index in order]
+        self._cut_names = [self._cut_names[cut_index] for cut_index in order]
+        print(f"INFO: Cuts reordered to {self._cut_names}")
+
 
 class EventLoop:
     """
@@ -46,43 +234,193 @@ class EventLoop:
     and manages histogram booking with the selected events.
     """
 
-    def __init__(self, file_reader: Callable, histogram: Histogram):
+    def __init__(self, file_reader: Callable, histogram: Histogram, buffer_size: int = 1000, cut_flow: CutFlow = None,
+                 number_of_events: Callable = None):
+        """
+        :param file_reader: Function that returns an iterable over the events in the file.
+        :param histogram: Template of the histogram booked with the selected events.
+        :param buffer_size: Number of selected events buffered before filling the histogram.
+        :param cut_flow: If given, the cut flow of each analysis is recorded and stored in the attribute cut_flow.
+        :param number_of_events: Returns the number of events in a file. It is used to split the file into contiguous
+                                 blocks across the workers when the file reader accepts start and stop arguments.
+                                 By default, the function number_of_events of the module of the file reader is used,
+                                 if it exists (e.g. for read_lhe and read_hepmc_range).
+        """
         # Function responsible for reading events
         self._file_reader = file_reader
+        # Function that counts the events in a file
+        if number_of_events is None:
+            number_of_events = getattr(inspect.getmodule(file_reader), "number_of_events", None)
+        self._number_of_events = number_of_events
         # Template of the histogram that should be build for each analysis
         self._histogram_template = histogram
+        # Number of selected events buffered before filling the histogram
+        self._buffer_size = buffer_size
+        # Template of the cut flow that should be recorded for each analysis
+        self._cut_flow_template = cut_flow
+        # Cut flow of the last analysis (None if the cut flow is not recorded)
+        self.cut_flow = None
 
-    def analyse_events(self, filename: Union[str, Dict[str, str]], event_analysis: EventAnalysis):
+    def analyse_events(self, filename: Union[str, Dict[str, str]], event_analysis: EventAnalysis, n_workers: int = 1,
+                       start: int = 0, stop: int = None, stride: int = 1):
         """
         Runs the analysis on events from the .lhe file and returns a histogram
         constructed from the selected events.
 
         :param filename: Path to the .lhe file storing the events.
         :param event_analysis: performs the analysis of a single event.
+        :param n_workers: Number of processes used to run the analysis.
+                          If larger than one, the events are split across a process pool and the
+                          histograms filled by each worker are summed at the end.
+        :param start, stop, stride: Only the events start, start + stride, ... before stop are analysed.
+                                    File readers that accept start and stop arguments (e.g. read_lhe,
+                                    read_LHCO or read_hepmc_range) only read the events in [start, stop),
+                                    so jobs over the same file should analyse contiguous blocks
+                                    (see event_block) rather than every n-th event.
 
-        :return: Dict with the booked histogram for each analysis.
+        :return: Tuple with the booked histogram and the number of processed events.
+                 If the EventLoop records the cut flow, the CutFlow object is stored in the attribute cut_flow.
         """
         print(f"Reading events from file: {filename}")
 
-        # Count the number of processed events
+        if n_workers > 1:
+            results = self._analyse_events_parallel(filename, event_analysis, n_workers, start, stop, stride)
+        else:
+            results = self._analyse_shard(filename, event_analysis, start, stop, stride)
+
+        analysis_hist, evt_number, self.cut_flow = results
+        return analysis_hist, evt_number
+
+    def _analyse_events_parallel(self, filename: Union[str, Dict[str, str]], event_analysis: EventAnalysis,
+                                 n_workers: int, start: int = 0, stop: int = None, stride: int = 1):
+        """
+        Splits the events in the file across a pool of processes.
+        If the file reader accepts start and stop arguments, each worker reads a contiguous block of the events.
+        Otherwise, worker k analyses every n_workers-th event starting from the k-th one.
+        The EventLoop and the EventAnalysis objects are sent to the workers, so they must be picklable.
+        """
+        shards = [(filename, event_analysis, *shard)
+                  for shard in self._shards(filename, n_workers, start, stop, stride)]
+
+        with multiprocessing.Pool(processes=n_workers) as pool:
+            results = pool.starmap(self._analyse_shard, shards)
+
+        # Sums the histograms, the number of events and the cut flows from each worker
+        analysis_hist, evt_number, cut_flow = results[0]
+        for shard_hist, shard_evt_number, shard_cut_flow in results[1:]:
+            analysis_hist.merge(shard_hist)
+            evt_number += shard_evt_number
+            if cut_flow is not None:
+                cut_flow.merge(shard_cut_flow)
+
+        return analysis_hist, evt_number, cut_flow
+
+    def _shards(self, filename: Union[str, Dict[str, str]], n_workers: int, start: int, stop: int, stride: int):
+        """(start, stop, stride) of the events analysed by each worker."""
+        if self._reader_accepts_range():
+            if stop is None and self._number_of_events is not None:
+                try:
+                    stop = self._number_of_events(filename)
+                except ValueError:
+                    # Files that cannot be indexed (e.g. compressed files)
+                    pass
+            if stop is not None:
+                return [(*event_block(shard_index, n_workers, stop, start, stride), stride)
+                        for shard_index in range(n_workers)]
+        return [(start + shard_index * stride, stop, stride * n_workers) for shard_index in range(n_workers)]
+
+    def _read_events(self, filename: Union[str, Dict[str, str]], start: int, stop: int, stride: int):
+        """
+        Iterates over the events start, start + stride, ... before stop.
+        Readers with start and stop arguments only read that range (a contiguous block of the file for each worker,
+        see _shards), the events of the other readers are skipped.
+        """
+        if (start, stop) != (0, None) and self._reader_accepts_range():
+            return itertools.islice(self._file_reader(filename, start=start, stop=stop), 0, None, stride)
+        return itertools.islice(self._file_reader(filename), start, stop, stride)
+
+    def _reader_accepts_range(self) -> bool:
+        """Checks if the file reader has start and stop arguments."""
+        try:
+            parameters = inspect.signature(self._file_reader).parameters
+        except (TypeError, ValueError):
+            return False
+        return "start" in parameters and "stop" in parameters
+
+    def _new_cut_flow(self, event_analysis: EventAnalysis):
+        """Creates an empty cut flow for the analysis, or None if the cut flow is not recorded."""
+        if self._cut_flow_template is None:
+            return None
+        cut_flow = copy.copy(self._cut_flow_template)
+        cut_flow.register(event_analysis.step_names)
+        return cut_flow
+
+    def _analyse_shard(self, filename: Union[str, Dict[str, str]], event_analysis: EventAnalysis,
+                       start: int = 0, stop: int = None, stride: int = 1):
+        """Runs the analysis on the events start, start + stride, ... before stop."""
+        # Count the number of processed and buffered events
         evt_number = 0
+        buffered_events = 0
 
-        # Generates the histogram for the current analysis
+        # Generates the histogram and the cut flow for the current analysis
         analysis_hist = copy.copy(self._histogram_template)
+        cut_flow = self._new_cut_flow(event_analysis)
 
         # Iterate over events in the file
-        for event in self._file_reader(filename):
+        for event in self._read_events(filename, start, stop, stride):
             if evt_number > 0 and evt_number % 1000 == 0:
                 print(f"INFO: Processed {evt_number} events")
 
             # Runs the analysis on the current event
-            select_event, modified_event = event_analysis.launch_analysis(event=event)
+            select_event, modified_event = event_analysis.launch_analysis(event=event, cut_flow=cut_flow)
 
-            # Updates the histogram generated for the analysis
+            # Buffers the selected event and updates the histogram when the buffer is full
             if select_event:
-                analysis_hist.update_hist(modified_event)
+                analysis_hist.buffer_event(modified_event)
+                buffered_events += 1
+                if buffered_events == self._buffer_size:
+                    analysis_hist.flush()
+                    buffered_events = 0
 
             evt_number += 1
 
+        # Books the remaining events
+        analysis_hist.flush()
+
+        # Returns the histogram created for the analysis
+        return analysis_hist, evt_number, cut_flow
+
+    def analyse_batches(self, filename: Union[str, Dict[str, str]], event_analysis: EventAnalysis):
+        """
+        Runs the analysis on batches of events and returns a histogram constructed from the selected events.
+        The file reader must yield batches of events (e.g. read_lhe_columnar), and the histogram is updated
+        with update_hist_batch.
+
+        :param filename: Path to the file storing the events.
+        :param event_analysis: performs the analysis of a batch of events.
+
+        :return: Tuple with the booked histogram and the number of processed events.
+                 If the EventLoop records the cut flow, the CutFlow object is stored in the attribute cut_flow.
+        """
+        print(f"Reading events from file: {filename}")
+
+        # Count the number of processed events
+        evt_number = 0
+
+        # Generates the histogram and the cut flow for the current analysis
+        analysis_hist = copy.copy(self._histogram_template)
+        cut_flow = self._new_cut_flow(event_analysis)
+
+        # Iterate over the batches in the file
+        for batch in self._file_reader(filename):
+            # Runs the analysis on the batch and books the selected events
+            _, selected_batch = event_analysis.launch_batch_analysis(batch=batch, cut_flow=cut_flow)
+            if len(selected_batch):
+                analysis_hist.update_hist_batch(selected_batch)
+
+            evt_number += len(batch)
+            print(f"INFO: Processed {evt_number} events")
+
         # Returns the histogram created for the analysis
+        self.cut_flow = cut_flow
         return analysis_hist, evt_number
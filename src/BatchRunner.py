@@ -0,0 +1,116 @@
+"""
+    Runs the same analysis over several samples at once.
+    Each sample is made of one or more files (e.g. the simulated bins of an EFT term), and all the files
+    are analysed concurrently over a pool of processes.
+"""
+
+from typing import List, Union, Dict
+from EventAnalysis_Framework.src.Analysis import EventAnalysis, EventLoop
+from EventAnalysis_Framework.src.Histogram import Histogram
+from EventAnalysis_Framework.src.CutFlow import CutFlow
+from EventAnalysis_Framework.src.Utilities import read_xsection
+import multiprocessing
+import copy
+
+
+class Sample:
+    """
+    Set of files whose histograms must be combined into a single one.
+    The histogram of each file is normalized by its cross-section over the number of events analysed.
+    """
+
+    def __init__(self, label: str, files: List[Union[str, Dict[str, str]]],
+                 xsections: Union[None, float, str, List[Union[None, float, str]]] = None,
+                 xsection_line: str = "#  Integrated weight (pb)  :", scale: float = 1.):
+        """
+        :param label: Name used to identify the sample.
+        :param files: Files with the events, in the same form that is passed to EventLoop.analyse_events.
+        :param xsections: Cross-section of each file. It can be a number, the path to the .lhe or banner file
+                          from which it is read, or None if the event weights already carry the cross-section.
+                          A single value (not a list) is used for all the files.
+        :param xsection_line: Line of the .lhe or banner file that holds the cross-section.
+        :param scale: Global factor applied to the sample (e.g. 1e3 to convert pb to fb, or the luminosity).
+        """
+        self.label = label
+        self.files = files
+        self.xsection_line = xsection_line
+        self.scale = scale
+        # One cross-section source for each of the files
+        self._xsections = xsections if isinstance(xsections, list) else [xsections] * len(files)
+        if len(self._xsections) != len(files):
+            raise ValueError(f"Sample '{label}': {len(files)} files but {len(self._xsections)} cross-sections.")
+
+    def normalization(self, file_index: int, number_of_evts: int) -> float:
+        """Factor that multiplies the histogram of the file with index file_index."""
+        xsection = self._xsections[file_index]
+        if isinstance(xsection, str):
+            xsection = read_xsection(xsection, default_line=self.xsection_line)
+        if xsection is None:
+            xsection = 1
+        return self.scale * xsection / number_of_evts
+
+
+class BatchRunner:
+    """Analyses all the files of a list of samples with a pool of processes."""
+
+    def __init__(self, event_loop: EventLoop, event_analysis: EventAnalysis, n_workers: int = 1):
+        """
+        :param event_loop: EventLoop used to analyse each of the files.
+        :param event_analysis: Analysis applied to all the samples.
+        :param n_workers: Number of processes. Each process analyses one file at a time.
+        """
+        self._event_loop = event_loop
+        self._event_analysis = event_analysis
+        self._n_workers = n_workers
+        # Cut flow of each sample in the last run (only if the EventLoop records the cut flow)
+        self.cut_flows: Dict[str, CutFlow] = {}
+
+    def run(self, samples: List[Sample]) -> Dict[str, Histogram]:
+        """
+        Analyses all the files and returns a dictionary with the normalized histogram of each sample.
+        If the EventLoop records the cut flow, the cut flows of the files of each sample are added (without
+        normalization) and stored in the attribute cut_flows.
+        The EventLoop and the EventAnalysis are sent to the workers, so they must be picklable.
+        """
+        # One job for each of the files
+        tasks = [(filename, sample_index, file_index) for sample_index, sample in enumerate(samples)
+                 for file_index, filename in enumerate(sample.files)]
+        # Histograms that hold the result for each sample
+        sample_hists = {sample.label: None for sample in samples}
+        self.cut_flows = {}
+
+        # Launches the analysis of all the files
+        if self._n_workers > 1:
+            with multiprocessing.Pool(processes=self._n_workers) as pool:
+                self._collect(samples, pool.imap_unordered(self._analyse_file, tasks), sample_hists, self.cut_flows)
+        else:
+            self._collect(samples, map(self._analyse_file, tasks), sample_hists, self.cut_flows)
+
+        return sample_hists
+
+    def _analyse_file(self, task):
+        """Runs the analysis on a single file."""
+        filename, sample_index, file_index = task
+        hist, number_of_evts = self._event_loop.analyse_events(filename, self._event_analysis)
+        return sample_index, file_index, hist, number_of_evts, self._event_loop.cut_flow
+
+    @staticmethod
+    def _collect(samples: List[Sample], results, sample_hists: Dict[str, Histogram], cut_flows: Dict[str, CutFlow]):
+        """
+        Normalizes the histogram of each file and adds it to the histogram of its sample.
+        The cut flows of the files are added to the cut flow of their sample.
+        """
+        for sample_index, file_index, hist, number_of_evts, cut_flow in results:
+            sample = samples[sample_index]
+            print(f"INFO: Finished file {file_index + 1}/{len(sample.files)} of sample '{sample.label}'")
+            if cut_flow is not None:
+                if sample.label in cut_flows:
+                    cut_flows[sample.label].merge(cut_flow)
+                else:
+                    cut_flows[sample.label] = cut_flow
+            # Empty histogram for the sample
+            if sample_hists[sample.label] is None:
+                sample_hists[sample.label] = copy.copy(hist)
+            # Files without events do not contribute
+            if number_of_evts > 0:
+                sample_hists[sample.label].merge(hist.scale(sample.normalization(file_index, number_of_evts)))
@@ -0,0 +1,68 @@
+"""Bookkeeping of the number of events, sum of weights and time spent in each step of the event analysis."""
+
+from typing import List, Callable, Dict
+from EventAnalysis_Framework.src.Histogram import unweighted_events
+
+
+class CutFlow:
+    """
+    Records, for each step of the analysis (particle selection and cuts):
+    the number of events entering it, the number of events passing it,
+    the sum of weights of the events passing it, and the cumulative wall time spent on it.
+    """
+
+    # Information stored for each step
+    _columns = ["entering", "passing", "sumw", "time"]
+
+    def __init__(self, get_weight: Callable = unweighted_events):
+        """
+        :param get_weight: Returns the weight of an event, as read by the file reader.
+                           In the batch analysis, it receives the batch and must return one weight per event.
+        """
+        self.get_weight = get_weight
+        # Entries of each step in the order they are applied
+        self._steps = {}
+
+    def register(self, step_names: List[str]):
+        """Adds the steps of the analysis, so that all of them are shown even if no event reaches them."""
+        for step_name in step_names:
+            self._steps.setdefault(step_name, [0, 0, 0., 0.])
+
+    def record(self, step_name: str, entering: int, passing: int, sumw: float, elapsed_time: float):
+        """Adds the events that went through the step."""
+        step = self._steps.setdefault(step_name, [0, 0, 0., 0.])
+        step[0] += entering
+        step[1] += passing
+        step[2] += sumw
+        step[3] += elapsed_time
+
+    def __getitem__(self, step_name: str) -> Dict[str, float]:
+        """Returns the information recorded for the step."""
+        return dict(zip(self._columns, self._steps[step_name]))
+
+    def steps(self) -> List[str]:
+        """Names of all the steps."""
+        return list(self._steps)
+
+    def efficiency(self, step_name: str) -> float:
+        """Fraction of the events entering the step that passed it."""
+        entering, passing = self._steps[step_name][:2]
+        return passing / entering if entering else 0.
+
+    def merge(self, other: "CutFlow"):
+        """Adds the entries of another cut flow. Returns self."""
+        for step_name in other.steps():
+            self.record(step_name, *other._steps[step_name])
+        return self
+
+    def __copy__(self):
+        """Returns an empty cut flow."""
+        return self.__class__(get_weight=self.get_weight)
+
+    def __repr__(self):
+        """Table with the cut flow."""
+        lines = [f"{'step':<30} {'entering':>10} {'passing':>10} {'eff.':>7} {'sumw':>12} {'time (s)':>10}"]
+        for step_name, (entering, passing, sumw, elapsed_time) in self._steps.items():
+            lines.append(f"{step_name:<30} {entering:>10d} {passing:>10d} {self.efficiency(step_name):>7.3f} "
+                         f"{sumw:>12.4g} {elapsed_time:>10.3f}")
+        return "\n".join(lines)
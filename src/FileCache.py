@@ -0,0 +1,57 @@
+"""
+    Sidecar files that cache information extracted from an event file (weights, byte offsets, metadata, ...).
+    The sidecar is stored next to the event file as <filename><suffix> (an .npz file), together with the size and
+    modification time of the event file, so that it is ignored as soon as the event file changes.
+"""
+
+import os
+import tempfile
+import numpy as np
+from typing import Dict, Optional
+
+# Entry of the sidecar with the size and modification time of the event file
+_KEY_ENTRY = "_file_key"
+
+
+def file_key(filename: str) -> np.ndarray:
+    """Size and modification time (in ns) that identify the current content of the file."""
+    file_stat = os.stat(filename)
+    return np.array([file_stat.st_size, file_stat.st_mtime_ns], dtype=np.int64)
+
+
+def sidecar_path(filename: str, suffix: str) -> str:
+    """Path of the sidecar file. The suffix must end with .npz, e.g. '.weights.npz'."""
+    return filename + suffix
+
+
+def load_cached(filename: str, suffix: str) -> Optional[Dict[str, np.ndarray]]:
+    """Returns the arrays stored in the sidecar, or None if it does not exist or is outdated."""
+    try:
+        with np.load(sidecar_path(filename, suffix)) as sidecar:
+            if _KEY_ENTRY not in sidecar.files or not np.array_equal(sidecar[_KEY_ENTRY], file_key(filename)):
+                return None
+            return {name: sidecar[name] for name in sidecar.files if name != _KEY_ENTRY}
+    except (OSError, ValueError):
+        return None
+
+
+def save_cached(filename: str, suffix: str, arrays: Dict[str, np.ndarray], compressed: bool = False):
+    """
+    Stores the arrays in the sidecar (compressed if requested). The file is written to a temporary file and then
+    renamed, so that processes reading the same sidecar never see it half written.
+    Nothing is saved if the directory is not writable.
+    """
+    path = sidecar_path(filename, suffix)
+    try:
+        file_descriptor, temporary_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)),
+                                                           suffix=".npz")
+    except OSError:
+        return
+    try:
+        with os.fdopen(file_descriptor, "wb") as sidecar:
+            save = np.savez_compressed if compressed else np.savez
+            save(sidecar, **arrays, **{_KEY_ENTRY: file_key(filename)})
+        os.replace(temporary_path, path)
+    except OSError:
+        if os.path.exists(temporary_path):
+            os.remove(temporary_path)
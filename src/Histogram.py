@@ -2,8 +2,10 @@
 
 from abc import ABC, abstractmethod
 import numpy as np
-from typing import List, Callable, Dict
+from typing import List, Callable, Dict, NamedTuple, Sequence, Union
+import bisect
 import copy
+import operator
 
 
 class Histogram(ABC):
@@ -14,6 +16,46 @@ class Histogram(ABC):
         """Updates the histogram with a given event."""
         raise RuntimeError("Trying to use a method from an abstract class.")
 
+    def update_hist_batch(self, batch):
+        """
+        Updates the histogram with all the events in a batch (e.g. LHEEventBatch).
+        By default, the events of the batch are booked one at a time.
+        """
+        for event in batch:
+            self.update_hist(event)
+
+    def buffer_event(self, event):
+        """
+        Stores the information of the event needed to update the histogram, which is only filled by flush.
+        Histograms without a buffer are updated right away.
+        """
+        self.update_hist(event)
+
+    def flush(self):
+        """Fills the histogram with all the buffered events."""
+        pass
+
+    def merge(self, other):
+        """Adds the content of another histogram with the same binning to this one. Returns self."""
+        raise NotImplementedError(f"{type(self).__name__} cannot be merged.")
+
+    def scale(self, factor: float):
+        """
+        Multiplies the content of the histogram by factor (e.g. xsection / number of events). Returns self.
+        By default, the histogram is multiplied as an array.
+        """
+        self *= factor
+        return self
+
+    def contents(self) -> Dict[str, Dict[str, np.ndarray]]:
+        """
+        Contents of the histogram, used to save it (see HistogramResult).
+        Returns a dictionary with an entry for each of the histograms held by the object ("" if there is only one),
+        with the bin edges ("edges") and the sum of weights in each bin ("sumw").
+        By default, the histogram is taken as an array of bin contents with the attribute bin_edges.
+        """
+        return {"": {"edges": np.asarray(self.bin_edges, dtype=float), "sumw": np.array(self, dtype=float)}}
+
     @abstractmethod
     def __copy__(self):
         """Clones an empty histogram."""
@@ -26,13 +68,27 @@ class BinIndexFinder:
     def __init__(self, bin_edges):
         self.bin_edges = bin_edges
 
+    @property
+    def bin_edges(self):
+        return self._bin_edges
+
+    @bin_edges.setter
+    def bin_edges(self, bin_edges):
+        self._bin_edges = bin_edges
+        # Copies of the edges used in the binary searches
+        self._edges_list = None if bin_edges is None else [float(edge) for edge in bin_edges]
+        self._edges_array = None if bin_edges is None else np.asarray(self._edges_list)
+
     def find_bin_index(self, observable_value: float) -> int:
-        """Finds the respective bin index for the given value of the observable."""
-        # Look for the right bin number
-        for bin_index in range(len(self.bin_edges) - 1):
-            if self.bin_edges[bin_index] <= observable_value < self.bin_edges[bin_index + 1]:
-                return bin_index
-        return -1
+        """Finds the respective bin index for the given value of the observable (-1 if outside the edges)."""
+        bin_index = bisect.bisect_right(self._edges_list, observable_value) - 1
+        return bin_index if bin_index < len(self._edges_list) - 1 else -1
+
+    def find_bin_indices(self, observable_values) -> np.ndarray:
+        """Finds the bin index for each value in the array (-1 for the values outside the edges)."""
+        bin_indices = np.searchsorted(self._edges_array, observable_values, side="right") - 1
+        bin_indices[bin_indices >= len(self._edges_array) - 1] = -1
+        return bin_indices
 
 
 def unweighted_events(event):
@@ -49,15 +105,20 @@ class ObservableHistogram(Histogram, np.ndarray, BinIndexFinder):
     def update_hist(event)
 
     where it takes a single event as the argument.
+    Arrays of observable values can be booked at once with fill_many.
+    If track_sumw2 is set, the sum of the squared weights (sumw2) and the number of entries (entries)
+    of each bin are also filled. Arrays derived from the histogram (e.g. 2 * hist) do not keep them.
     """
 
-    def __new__(cls, bin_edges: List[float], observable: Callable, get_weight: Callable = unweighted_events):
+    def __new__(cls, bin_edges: List[float], observable: Callable, get_weight: Callable = unweighted_events,
+                track_sumw2: bool = False):
         """
         The two necessary parameters for construction are:
 
         :param bin_edges: The respective bin edges for the histogram.
         :param observable: A function or callable object that computes
                            the observable for a single Event object.
+        :param track_sumw2: Fills the sum of the squared weights and the number of entries of each bin.
         """
         # Create an empty histogram
         hist = np.zeros(shape=len(bin_edges) - 1).view(cls)
@@ -65,13 +126,21 @@ class ObservableHistogram(Histogram, np.ndarray, BinIndexFinder):
         hist.bin_edges = bin_edges
         hist.observable = observable
         hist.get_weight = get_weight
+        if track_sumw2:
+            hist.sumw2 = np.zeros(len(bin_edges) - 1)
+            hist.entries = np.zeros(len(bin_edges) - 1, dtype=np.int64)
         # Return the histogram
         return hist
 
-    def __init__(self, bin_edges: List[float], observable: Callable, get_weight: Callable = unweighted_events):
+    def __init__(self, bin_edges: List[float], observable: Callable, get_weight: Callable = unweighted_events,
+                 track_sumw2: bool = False):
         BinIndexFinder.__init__(self, bin_edges=bin_edges)
 
     def __array_finalize__(self, hist):
+        # Each array holds its own buffer of observable values and weights
+        self._buffer_values, self._buffer_weights = [], []
+        # Sum of the squared weights and number of entries are only kept by the histogram that is filled
+        self.sumw2, self.entries = None, None
         if hist is None:
             return
         # Add the attributes
@@ -90,24 +159,341 @@ class ObservableHistogram(Histogram, np.ndarray, BinIndexFinder):
         # Update the histogram if the observable is inside the histogram limits
         if 0 <= bin_index < len(self):
             self[bin_index] += weight
+            if self.sumw2 is not None:
+                self.sumw2[bin_index] += weight**2
+                self.entries[bin_index] += 1
+
+    def fill_many(self, values, weights=1.):
+        """Updates the histogram with an array of observable values and their respective weights."""
+        values = np.asarray(values, dtype=float)
+        weights = np.broadcast_to(np.asarray(weights, dtype=float), values.shape)
+        bin_indices = self.find_bin_indices(values)
+        # Only the values inside the histogram limits
+        inside = bin_indices >= 0
+        bin_indices, weights = bin_indices[inside], weights[inside]
+        np.add.at(self.view(np.ndarray), bin_indices, weights)
+        if self.sumw2 is not None:
+            self.sumw2 += np.bincount(bin_indices, weights**2, minlength=len(self))
+            self.entries += np.bincount(bin_indices, minlength=len(self))
+
+    def update_hist_batch(self, batch):
+        """
+        Updates the histogram with a batch of events.
+        The observable and the weight function must take the batch and return one value per event.
+        """
+        self.fill_many(self.observable(batch), self.get_weight(batch))
+
+    def buffer_event(self, event):
+        """Stores the observable value and the weight of the event."""
+        self._buffer_values.append(self.observable(event))
+        self._buffer_weights.append(self.get_weight(event))
+
+    def flush(self):
+        """Fills the histogram with the buffered values."""
+        if self._buffer_values:
+            self.fill_many(self._buffer_values, self._buffer_weights)
+            self._buffer_values, self._buffer_weights = [], []
+
+    def merge(self, other):
+        """
+        Adds the bin contents of the other histogram.
+        The sum of the squared weights and the entries are only kept if both histograms have them.
+        """
+        self += other
+        if self.sumw2 is not None:
+            if getattr(other, "sumw2", None) is None:
+                self.sumw2, self.entries = None, None
+            else:
+                self.sumw2 += other.sumw2
+                self.entries += other.entries
+        return self
+
+    def scale(self, factor: float):
+        """Multiplies the bin contents by factor (and the sum of the squared weights by factor squared)."""
+        self *= factor
+        if self.sumw2 is not None:
+            self.sumw2 *= factor**2
+        return self
+
+    def contents(self) -> Dict[str, Dict[str, np.ndarray]]:
+        """Bin edges and bin contents of the histogram (and sumw2 and entries, if they are tracked)."""
+        hist_contents = {"edges": np.asarray(self.bin_edges, dtype=float), "sumw": np.array(self.view(np.ndarray))}
+        if self.sumw2 is not None:
+            hist_contents.update(sumw2=self.sumw2.copy(), entries=self.entries.copy())
+        return {"": hist_contents}
+
+    def __reduce__(self):
+        """Keeps the attributes of the histogram when it is pickled (e.g. sent to another process)."""
+        reconstruct, arguments, array_state = np.ndarray.__reduce__(self)
+        return reconstruct, arguments, (array_state, self.bin_edges, self.observable, self.get_weight,
+                                        self.sumw2, self.entries)
+
+    def __setstate__(self, state):
+        array_state, self.bin_edges, self.observable, self.get_weight, self.sumw2, self.entries = state
+        np.ndarray.__setstate__(self, array_state)
 
     def __copy__(self):
         """Shallow copy of the current histogram."""
         return self.__new__(self.__class__, bin_edges=self.bin_edges, observable=self.observable,
-                            get_weight=self.get_weight)
+                            get_weight=self.get_weight, track_sumw2=self.sumw2 is not None)
+
+
+class UniformAxis(NamedTuple):
+    """Axis with number_of_bins bins of the same width between low and high."""
+    number_of_bins: int
+    low: float
+    high: float
+
+
+class ObservableHistogramND(Histogram, np.ndarray):
+    """
+    N-dimensional histogram for an observable that returns a tuple of values (one for each axis).
+    It behaves like a numpy array with one dimension for each axis.
+    The edges of each axis can be a sequence of bin edges, or a UniformAxis for uniform bins.
+    Arrays with the values of each axis can be booked at once with fill_many.
+    """
+
+    def __new__(cls, bin_edges: Sequence[Union[Sequence[float], UniformAxis]], observable: Callable,
+                get_weight: Callable = unweighted_events, track_sumw2: bool = False):
+        """
+        :param bin_edges: Edges of each of the axes.
+        :param observable: A function or callable object that computes the tuple of values for a single Event.
+        :param get_weight: Returns the weight of the event.
+        :param track_sumw2: Fills the sum of the squared weights and the number of entries of each bin.
+        """
+        shape = tuple(len(edges) - 1 for edges in _axes_edges(bin_edges))
+        # Create an empty histogram
+        hist = np.zeros(shape=shape).view(cls)
+        hist.bin_edges = bin_edges
+        hist.observable = observable
+        hist.get_weight = get_weight
+        if track_sumw2:
+            hist.sumw2 = np.zeros(shape)
+            hist.entries = np.zeros(shape, dtype=np.int64)
+        return hist
+
+    def __array_finalize__(self, hist):
+        # Each array holds its own buffer of observable values and weights
+        self._buffer_values, self._buffer_weights = [], []
+        # Sum of the squared weights and number of entries are only kept by the histogram that is filled
+        self.sumw2, self.entries = None, None
+        if hist is None:
+            return
+        # Add the attributes
+        self.observable = getattr(hist, "observable", None)
+        self.bin_edges = getattr(hist, "bin_edges", None)
+        self.get_weight = getattr(hist, "get_weight", None)
+
+    @property
+    def bin_edges(self):
+        return self._bin_edges
+
+    @bin_edges.setter
+    def bin_edges(self, bin_edges):
+        self._bin_edges = bin_edges
+        # Edges of each axis as arrays
+        self.axes_edges = None if bin_edges is None else _axes_edges(bin_edges)
+
+    def find_bin_indices(self, observable_values) -> np.ndarray:
+        """
+        Finds the bin indices of the values, given as an (number of values x number of axes) array.
+        Returns an array with the same shape, where the indices of the values outside the edges are -1.
+        """
+        observable_values = np.asarray(observable_values, dtype=float).reshape(-1, len(self.axes_edges))
+        bin_indices = np.empty(observable_values.shape, dtype=np.int64)
+        for axis, (axis_spec, edges) in enumerate(zip(self.bin_edges, self.axes_edges)):
+            values = observable_values[:, axis]
+            if _is_uniform(axis_spec):
+                # Uniform bins are found without a binary search
+                number_of_bins, low, high = axis_spec
+                inside = (values >= low) & (values < high)
+                axis_indices = np.full(len(values), -1, dtype=np.int64)
+                axis_indices[inside] = np.minimum(
+                    ((values[inside] - low) * (number_of_bins / (high - low))).astype(np.int64), number_of_bins - 1)
+            else:
+                axis_indices = np.searchsorted(edges, values, side="right") - 1
+                axis_indices[axis_indices >= len(edges) - 1] = -1
+            bin_indices[:, axis] = axis_indices
+        return bin_indices
+
+    def update_hist(self, event):
+        """Updates the histogram using the Event object."""
+        self.fill_many([self.observable(event)], self.get_weight(event))
+
+    def fill_many(self, values, weights=1.):
+        """
+        Updates the histogram with many values at once.
+        :param values: (number of values x number of axes) array, or a tuple with an array of values for each axis.
+        :param weights: Weight of each of the values.
+        """
+        if isinstance(values, tuple):
+            values = np.column_stack(values)
+        bin_indices = self.find_bin_indices(values)
+        weights = np.broadcast_to(np.asarray(weights, dtype=float), (len(bin_indices),))
+        # Only the values inside the histogram limits
+        inside = np.all(bin_indices >= 0, axis=1)
+        flat_indices = np.ravel_multi_index(tuple(bin_indices[inside].T), self.shape)
+        weights = weights[inside]
+        self.view(np.ndarray)[...] += np.bincount(flat_indices, weights, minlength=self.size).reshape(self.shape)
+        if self.sumw2 is not None:
+            self.sumw2 += np.bincount(flat_indices, weights**2, minlength=self.size).reshape(self.shape)
+            self.entries += np.bincount(flat_indices, minlength=self.size).reshape(self.shape)
+
+    def update_hist_batch(self, batch):
+        """
+        Updates the histogram with a batch of events.
+        The observable must take the batch and return a tuple with an array of values for each axis,
+        and the weight function one weight per event.
+        """
+        self.fill_many(tuple(self.observable(batch)), self.get_weight(batch))
+
+    def buffer_event(self, event):
+        """Stores the observable values and the weight of the event."""
+        self._buffer_values.append(self.observable(event))
+        self._buffer_weights.append(self.get_weight(event))
+
+    def flush(self):
+        """Fills the histogram with the buffered values."""
+        if self._buffer_values:
+            self.fill_many(self._buffer_values, self._buffer_weights)
+            self._buffer_values, self._buffer_weights = [], []
+
+    def merge(self, other):
+        """
+        Adds the bin contents of the other histogram.
+        The sum of the squared weights and the entries are only kept if both histograms have them.
+        """
+        self += other
+        if self.sumw2 is not None:
+            if getattr(other, "sumw2", None) is None:
+                self.sumw2, self.entries = None, None
+            else:
+                self.sumw2 += other.sumw2
+                self.entries += other.entries
+        return self
+
+    def scale(self, factor: float):
+        """Multiplies the bin contents by factor (and the sum of the squared weights by factor squared)."""
+        self *= factor
+        if self.sumw2 is not None:
+            self.sumw2 *= factor**2
+        return self
+
+    def contents(self) -> Dict[str, Dict[str, np.ndarray]]:
+        """Bin edges of each axis (edges_0, edges_1, ...) and bin contents (and sumw2 and entries, if tracked)."""
+        hist_contents = {f"edges_{axis}": edges for axis, edges in enumerate(self.axes_edges)}
+        hist_contents["sumw"] = np.array(self.view(np.ndarray))
+        if self.sumw2 is not None:
+            hist_contents.update(sumw2=self.sumw2.copy(), entries=self.entries.copy())
+        return {"": hist_contents}
+
+    def __reduce__(self):
+        """Keeps the attributes of the histogram when it is pickled (e.g. sent to another process)."""
+        reconstruct, arguments, array_state = np.ndarray.__reduce__(self)
+        return reconstruct, arguments, (array_state, self.bin_edges, self.observable, self.get_weight,
+                                        self.sumw2, self.entries)
+
+    def __setstate__(self, state):
+        array_state, self.bin_edges, self.observable, self.get_weight, self.sumw2, self.entries = state
+        np.ndarray.__setstate__(self, array_state)
+
+    def __copy__(self):
+        """Shallow copy of the current histogram."""
+        return self.__new__(self.__class__, bin_edges=self.bin_edges, observable=self.observable,
+                            get_weight=self.get_weight, track_sumw2=self.sumw2 is not None)
+
+
+def _is_uniform(axis_spec) -> bool:
+    """Checks if the axis has uniform bins (UniformAxis)."""
+    return isinstance(axis_spec, UniformAxis)
+
+
+def _axes_edges(bin_edges) -> List[np.ndarray]:
+    """Array with the bin edges of each axis."""
+    axes_edges = []
+    for axis_spec in bin_edges:
+        if _is_uniform(axis_spec):
+            if axis_spec.number_of_bins < 1 or not axis_spec.low < axis_spec.high:
+                raise ValueError(f"{axis_spec} must have at least one bin and low < high")
+            axes_edges.append(np.linspace(axis_spec.low, axis_spec.high, axis_spec.number_of_bins + 1))
+        else:
+            axes_edges.append(np.asarray(axis_spec, dtype=float))
+    return axes_edges
 
 
 class WeightedHistogramManager(Histogram, BinIndexFinder):
-    """Builds one histogram for each reweighted events."""
+    """
+    Builds one histogram for each reweighted events.
+    All the histograms are stored as the rows of a single (number of histograms x number of bins) array,
+    so that the weights of an event are booked with a single operation.
+    If track_sumw2 is set, the sum of the squared weights of each histogram and the number of entries of each bin
+    (the same for all the histograms) are also filled.
+    """
 
-    def __init__(self, bin_edges: List[float], observale: Callable, get_weights: Callable, hist_names: List[str]):
+    def __init__(self, bin_edges: List[float], observale: Callable, get_weights: Callable, hist_names: List[str],
+                 track_sumw2: bool = False, weight_names: List[str] = None):
+        """
+        :param get_weights: Returns the weights of the event, either as a dictionary (weight name: weight) or as
+                            an array with the weights in the order of weight_names.
+                            Histograms without a weight in the dictionary are filled with weight 1.
+        :param hist_names: Names of the weights booked in the histograms.
+        :param weight_names: Names of the entries of the weights arrays returned by get_weights
+                             (the same as hist_names by default).
+        """
         BinIndexFinder.__init__(self, bin_edges=bin_edges)
         # Stores the observable needed
         self.observable = observale
         # Returns a dictionary with the different weights for the event
         self.get_weights_func = get_weights
-        # One histogram for which reweighted event
-        self._hists = {hist_name: np.zeros(len(bin_edges) - 1) for hist_name in hist_names}
+        # One histogram (row) for which reweighted event
+        self._hist_names = list(hist_names)
+        self._rows = {hist_name: row for row, hist_name in enumerate(self._hist_names)}
+        self._hists = np.zeros((len(self._hist_names), len(bin_edges) - 1))
+        # Sum of the squared weights of each histogram and number of entries in each bin
+        self._sumw2 = np.zeros(self._hists.shape) if track_sumw2 else None
+        self.entries = np.zeros(len(bin_edges) - 1, dtype=np.int64) if track_sumw2 else None
+        # Position in the weights arrays of the weight of each histogram (-1 if missing)
+        self.weight_names = self._hist_names if weight_names is None else list(weight_names)
+        self._array_columns = self._columns(self.weight_names)
+        # Observable values and weights of the buffered events
+        self._buffer_values, self._buffer_weights = [], []
+
+    def _columns(self, weight_names) -> np.ndarray:
+        """Position of the weight of each histogram in weight_names (-1 if it is not there)."""
+        positions = {weight_name: position for position, weight_name in enumerate(weight_names)}
+        return np.array([positions.get(hist_name, -1) for hist_name in self._hist_names], dtype=np.int64)
+
+    def _weights_matrix(self, values: np.ndarray) -> np.ndarray:
+        """
+        (number of events x number of histograms) array with the weight of each histogram, from the
+        (number of events x number of weight names) array of weights returned by get_weights.
+        """
+        # In case there's not weight, set it to 1
+        weights_matrix = np.ones((len(values), len(self._hist_names)))
+        found = self._array_columns >= 0
+        weights_matrix[:, found] = values[:, self._array_columns[found]]
+        return weights_matrix
+
+    def _dicts_weights_matrix(self, weights_dicts: List[dict]) -> np.ndarray:
+        """
+        (number of events x number of histograms) array with the weight of each histogram, from the dictionaries
+        of weights of the events. The weights missing in an event are 1.
+        """
+        # In case there's not weight, set it to 1
+        weights_matrix = np.ones((len(weights_dicts), len(self._hist_names)))
+        # Weight names found in any of the events
+        weight_names = set().union(*weights_dicts)
+        found = np.array([hist_name in weight_names for hist_name in self._hist_names], dtype=bool)
+        if found.any():
+            names = [hist_name for hist_name in self._hist_names if hist_name in weight_names]
+            get_values = operator.itemgetter(*names)
+            try:
+                values = [get_values(weights) for weights in weights_dicts]
+            except KeyError:
+                # Not all the events have the same weights
+                values = [[weights.get(hist_name, 1) for hist_name in names] for weights in weights_dicts]
+            weights_matrix[:, found] = np.array(values, dtype=float).reshape(len(weights_dicts), -1)
+        return weights_matrix
 
     def update_hist(self, event):
         """Updates all the histograms with the current event."""
@@ -115,23 +501,121 @@ class WeightedHistogramManager(Histogram, BinIndexFinder):
         # Check if the value is inside the limits of the histogram
         bin_index = self.find_bin_index(observable_value=observable_value)
         if 0 <= bin_index < len(self.bin_edges):
-            # Get the weights for each of the histograms
+            # Get the weights for each of the histograms (in case there's not weight, set it to 1)
             weights = self.get_weights_func(event)
-            # Updates each of the histograms
-            for hist_name, hist in self._hists.items():
-                # In case there's not weight, set it to 1
-                hist[bin_index] += weights[hist_name] if hist_name in weights else 1
+            if isinstance(weights, dict):
+                weights = [weights.get(hist_name, 1) for hist_name in self._hist_names]
+            else:
+                weights = self._weights_matrix(np.asarray(weights, dtype=float).reshape(1, -1))[0]
+            # Updates all the histograms at once
+            self._hists[:, bin_index] += weights
+            if self._sumw2 is not None:
+                self._sumw2[:, bin_index] += np.square(weights)
+                self.entries[bin_index] += 1
+
+    def _fill_many(self, bin_indices: np.ndarray, weights_matrix: np.ndarray):
+        """Adds the rows of weights_matrix (one for each event) to the bins in bin_indices."""
+        inside = bin_indices >= 0
+        bin_indices, weights_matrix = bin_indices[inside], weights_matrix[inside]
+        np.add.at(self._hists.T, bin_indices, weights_matrix)
+        if self._sumw2 is not None:
+            np.add.at(self._sumw2.T, bin_indices, weights_matrix**2)
+            self.entries += np.bincount(bin_indices, minlength=len(self.entries))
+
+    def update_hist_batch(self, batch):
+        """
+        Updates all the histograms with a batch of events.
+        The observable must return one value per event and get_weights either a dictionary with an array of
+        weights for each reweighted histogram, or a (number of events x number of weight names) array.
+        """
+        bin_indices = self.find_bin_indices(np.asarray(self.observable(batch), dtype=float))
+        weights = self.get_weights_func(batch)
+        if isinstance(weights, dict):
+            # In case there's not weight, set it to 1
+            weights_matrix = np.ones((len(bin_indices), len(self._hist_names)))
+            for row, hist_name in enumerate(self._hist_names):
+                if hist_name in weights:
+                    weights_matrix[:, row] = weights[hist_name]
+        else:
+            weights_matrix = self._weights_matrix(np.asarray(weights, dtype=float).reshape(len(bin_indices), -1))
+        self._fill_many(bin_indices, weights_matrix)
+
+    def buffer_event(self, event):
+        """
+        Stores the observable value and the weights of the event as returned by get_weights.
+        The weights are only matched to the histograms when the buffer is flushed.
+        """
+        self._buffer_values.append(self.observable(event))
+        self._buffer_weights.append(self.get_weights_func(event))
+
+    def flush(self):
+        """Fills all the histograms with the buffered events."""
+        if not self._buffer_values:
+            return
+        bin_indices = self.find_bin_indices(np.asarray(self._buffer_values, dtype=float))
+        if isinstance(self._buffer_weights[0], dict):
+            weights_matrix = self._dicts_weights_matrix(self._buffer_weights)
+        else:
+            weights_matrix = self._weights_matrix(
+                np.array(self._buffer_weights, dtype=float).reshape(len(self._buffer_weights), -1))
+        self._fill_many(bin_indices, weights_matrix)
+        self._buffer_values, self._buffer_weights = [], []
+
+    def merge(self, other):
+        """
+        Adds the content of each of the reweighted histograms of the other manager.
+        The sum of the squared weights and the entries are only kept if both managers have them.
+        """
+        other_rows = [other._rows.get(hist_name) for hist_name in self._hist_names]
+        for row, other_row in enumerate(other_rows):
+            if other_row is not None:
+                self._hists[row] += other._hists[other_row]
+        if self._sumw2 is not None:
+            if other.entries is None:
+                self._sumw2, self.entries = None, None
+            else:
+                for row, other_row in enumerate(other_rows):
+                    if other_row is not None:
+                        self._sumw2[row] += other._sumw2[other_row]
+                self.entries += other.entries
+        return self
+
+    def scale(self, factor: float):
+        """Multiplies each of the reweighted histograms by factor (and their sumw2 by factor squared)."""
+        self._hists *= factor
+        if self._sumw2 is not None:
+            self._sumw2 *= factor**2
+        return self
+
+    def contents(self) -> Dict[str, Dict[str, np.ndarray]]:
+        """Bin edges and bin contents of each of the reweighted histograms (and sumw2 and entries, if tracked)."""
+        edges = np.asarray(self.bin_edges, dtype=float)
+        contents = {hist_name: {"edges": edges, "sumw": self._hists[row].copy()}
+                    for hist_name, row in self._rows.items()}
+        if self._sumw2 is not None:
+            for hist_name, hist_contents in contents.items():
+                hist_contents.update(sumw2=self._sumw2[self._rows[hist_name]].copy(), entries=self.entries.copy())
+        return contents
+
+    def get_sumw2(self, hist_name: str):
+        """Returns the sum of the squared weights of the histogram (None if it is not tracked)."""
+        if self._sumw2 is None:
+            return None
+        if hist_name in self._rows:
+            return self._sumw2[self._rows[hist_name]]
+        return np.zeros(len(self.bin_edges) - 1)
 
     def __getitem__(self, hist_name: str):
         """Returns the histogram"""
-        if hist_name in self._hists:
-            return self._hists[hist_name]
+        if hist_name in self._rows:
+            return self._hists[self._rows[hist_name]]
         return np.zeros(len(self.bin_edges) - 1)
 
     def __copy__(self):
         """Shallow copy of the current hist."""
         return self.__class__(bin_edges=self.bin_edges, observale=self.observable,
-                              get_weights=self.get_weights_func, hist_names=list(self._hists.keys()))
+                              get_weights=self.get_weights_func, hist_names=self._hist_names,
+                              track_sumw2=self._sumw2 is not None, weight_names=self.weight_names)
 
 
 class HistogramCompound(Histogram):
@@ -146,11 +630,43 @@ class HistogramCompound(Histogram):
         for hist_name in self._hist_dict:
             self._hist_dict[hist_name].update_hist(event=event)
 
+    def update_hist_batch(self, batch):
+        """Updates all the histograms with the batch of events."""
+        for hist in self._hist_dict.values():
+            hist.update_hist_batch(batch)
+
+    def buffer_event(self, event):
+        """Buffers the event in all the histograms."""
+        for hist in self._hist_dict.values():
+            hist.buffer_event(event)
+
+    def flush(self):
+        """Fills all the histograms with their buffered events."""
+        for hist in self._hist_dict.values():
+            hist.flush()
+
     def get_hist(self, hist_name: str):
         """Returns the Histogram object associated with the key 'hist_name'"""
         if hist_name in self._hist_dict:
             return self._hist_dict[hist_name]
 
+    def merge(self, other):
+        """Merges each of the histograms with the respective one in the other compound."""
+        for hist_name, hist in self._hist_dict.items():
+            hist.merge(other.get_hist(hist_name))
+        return self
+
+    def scale(self, factor: float):
+        """Multiplies all the histograms by factor."""
+        for hist in self._hist_dict.values():
+            hist.scale(factor)
+        return self
+
+    def contents(self) -> Dict[str, Dict[str, np.ndarray]]:
+        """Contents of all the histograms, named as '<histogram name>/<name inside the histogram>'."""
+        return {f"{hist_name}/{name}" if name else hist_name: hist_contents
+                for hist_name, hist in self._hist_dict.items() for name, hist_contents in hist.contents().items()}
+
     def __copy__(self):
         """Returns a shallow clone of all histograms."""
         clone_dict = {hist_name: copy.copy(hist) for hist_name, hist in self._hist_dict.items()}
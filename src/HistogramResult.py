@@ -0,0 +1,144 @@
+"""
+    Results of an analysis that can be saved and merged later (e.g. the output of each condor job).
+    A result holds the raw (not normalized) contents of the histograms, together with the number of processed
+    events, the cross-section and the sample they belong to:
+    - Results of the same sample (e.g. shards of the same file) are merged by adding their raw contents
+      and numbers of events.
+    - Results of different samples (e.g. the bins of an EFT term) are combined by adding their normalized
+      contents, xsection * sumw / number_of_evts.
+"""
+
+import json
+import numpy as np
+from typing import Dict, Iterable, Union
+from EventAnalysis_Framework.src.Histogram import Histogram
+
+
+class HistogramResult:
+    """Raw contents of the histograms of an analysis, the number of processed events and the cross-section."""
+
+    def __init__(self, contents: Dict[str, Dict[str, np.ndarray]], number_of_evts: int, xsection: float = None,
+                 sample: str = ""):
+        """
+        :param contents: Contents of the histograms, as returned by Histogram.contents.
+        :param number_of_evts: Number of processed events.
+        :param xsection: Cross-section of the sample, or None if the event weights already carry it.
+        :param sample: Name of the sample that the events belong to.
+        """
+        self.contents = contents
+        self.number_of_evts = number_of_evts
+        self.xsection = xsection
+        self.sample = sample
+
+    @classmethod
+    def from_histogram(cls, histogram: Histogram, number_of_evts: int, xsection: float = None, sample: str = ""):
+        """Result with the contents of the histogram, as returned by EventLoop.analyse_events."""
+        return cls(histogram.contents(), number_of_evts, xsection, sample)
+
+    def merge(self, other: "HistogramResult"):
+        """Adds the raw contents and the number of events of another result of the same sample. Returns self."""
+        if other.sample != self.sample:
+            raise ValueError(f"Cannot merge results of the samples '{self.sample}' and '{other.sample}'.")
+        if (self.xsection is None) != (other.xsection is None) or (
+                self.xsection is not None and not np.isclose(self.xsection, other.xsection)):
+            raise ValueError(f"Results of the sample '{self.sample}' have different cross-sections.")
+        if self.contents.keys() != other.contents.keys():
+            raise ValueError(f"Results of the sample '{self.sample}' have different histograms.")
+
+        for hist_name, hist_contents in self.contents.items():
+            other_contents = other.contents[hist_name]
+            # Bin edges of the histogram (edges_0, edges_1, ... for multi-dimensional histograms)
+            edge_fields = [field for field in hist_contents if field.startswith("edges")]
+            if any(field not in other_contents or not np.array_equal(hist_contents[field], other_contents[field])
+                   for field in edge_fields):
+                raise ValueError(f"Histogram '{hist_name}' has different bin edges.")
+            for field in [field for field in hist_contents if field not in edge_fields]:
+                if field in other_contents:
+                    hist_contents[field] = hist_contents[field] + other_contents[field]
+                else:
+                    # Information missing in one of the results is dropped
+                    del hist_contents[field]
+        self.number_of_evts += other.number_of_evts
+        return self
+
+    def normalization(self) -> float:
+        """Factor xsection / number_of_evts that normalizes the raw contents."""
+        if self.number_of_evts == 0:
+            return 0.
+        return (1. if self.xsection is None else self.xsection) / self.number_of_evts
+
+    def normalized(self, hist_name: str = "") -> np.ndarray:
+        """Normalized contents of the histogram."""
+        return self.normalization() * self.contents[hist_name]["sumw"]
+
+    def normalized_sumw2(self, hist_name: str = "") -> np.ndarray:
+        """Normalized sum of the squared weights (the variance of the normalized contents)."""
+        return self.normalization()**2 * self.contents[hist_name]["sumw2"]
+
+    def save(self, path: str):
+        """Saves the result as a compressed .npz file, or as a .json file if the path ends with .json."""
+        if path.endswith(".json"):
+            with open(path, "w") as result_file:
+                json.dump(self._to_json(), result_file, indent=4)
+            return
+
+        arrays = {f"{field}:{hist_name}": values for hist_name, hist_contents in self.contents.items()
+                  for field, values in hist_contents.items()}
+        np.savez_compressed(path, number_of_evts=self.number_of_evts, sample=self.sample,
+                            xsection=np.nan if self.xsection is None else self.xsection, **arrays)
+
+    @classmethod
+    def load(cls, path: str) -> "HistogramResult":
+        """Loads a result saved with save."""
+        if path.endswith(".json"):
+            with open(path) as result_file:
+                return cls._from_json(json.load(result_file))
+
+        contents = {}
+        with np.load(path) as result_file:
+            for name in result_file.files:
+                if ":" in name:
+                    field, hist_name = name.split(":", 1)
+                    contents.setdefault(hist_name, {})[field] = result_file[name]
+            xsection = float(result_file["xsection"])
+            return cls(contents, int(result_file["number_of_evts"]), None if np.isnan(xsection) else xsection,
+                       str(result_file["sample"]))
+
+    def _to_json(self):
+        """Dictionary with the result, with lists instead of arrays."""
+        return {"sample": self.sample, "xsection": self.xsection, "number_of_evts": self.number_of_evts,
+                "histograms": {
+                    hist_name: {field: np.asarray(values).tolist() for field, values in hist_contents.items()}
+                    for hist_name, hist_contents in self.contents.items()
+                }}
+
+    @classmethod
+    def _from_json(cls, result):
+        """Inverse of _to_json."""
+        # The number of entries are integers, as in the .npz files
+        contents = {hist_name: {field: np.asarray(values, dtype=np.int64 if field == "entries" else float)
+                                for field, values in hist_contents.items()}
+                    for hist_name, hist_contents in result["histograms"].items()}
+        return cls(contents, result["number_of_evts"], result["xsection"], result["sample"])
+
+
+def merge_results(results: Iterable[Union[str, HistogramResult]]) -> Dict[str, HistogramResult]:
+    """
+    Merges the results (or the files where they are saved) of each sample.
+    The results are read and merged one at a time, so any number of them can be combined.
+    Returns a dictionary with the merged result of each sample.
+    """
+    merged = {}
+    for result in results:
+        if isinstance(result, str):
+            result = HistogramResult.load(result)
+        if result.sample in merged:
+            merged[result.sample].merge(result)
+        else:
+            merged[result.sample] = result
+    return merged
+
+
+def combine_samples(results: Iterable[HistogramResult], hist_name: str = "") -> np.ndarray:
+    """Sum of the normalized contents of the histogram over the results of different samples."""
+    return sum(result.normalized(hist_name) for result in results)
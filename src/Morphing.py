@@ -0,0 +1,161 @@
+"""
+    Predictions of the histograms at any point of the space of Wilson coefficients (EFT morphing).
+    The prediction is a polynomial in the coefficients,
+        prediction(c) = SM + sum_i c_i * Ci + sum_{i<=j} c_i * c_j * (Ci-Cj) + ...
+    where each term of the basis is the histogram of one EFT term, named after the product of its coefficients
+    joined by "-" (e.g. "SM", "Cphi1", "Cphi1-CBW", "Cphi1-Cphi1"), as in the analyses of the EFT terms.
+    The predictions for any number of points are computed at once as a single matrix product, and the basis can be
+    saved, so that the event files never need to be analysed again for a new point.
+"""
+
+import numpy as np
+from typing import Callable, Dict, Iterable, List, Union
+from EventAnalysis_Framework.src.HistogramResult import HistogramResult, merge_results
+
+# Name of the term without coefficients
+SM_TERM = "SM"
+
+
+def term_coefficients(term: str) -> List[str]:
+    """Coefficients of the term, e.g. ["Cphi1", "CBW"] for "Cphi1-CBW" and [] for "SM"."""
+    return [] if term == SM_TERM else term.split("-")
+
+
+def sample_term(sample: str) -> str:
+    """EFT term of a sample named as the files of the simulated bins, e.g. "Cphi1-CBW" for "Cphi1-CBW-bin-3"."""
+    return sample.rsplit("-bin-", 1)[0]
+
+
+class EFTMorphing:
+    """Basis of histograms of the EFT terms, that gives the prediction at any point of the coefficients."""
+
+    def __init__(self, basis: Dict[str, np.ndarray], basis_sumw2: Dict[str, np.ndarray] = None,
+                 bin_edges: np.ndarray = None):
+        """
+        :param basis: Histogram (normalized contents) of each EFT term.
+        :param basis_sumw2: Variance of the contents of each EFT term, if known.
+        :param bin_edges: Bin edges of the histograms, only stored together with the basis.
+        """
+        self.terms = list(basis)
+        self.basis = np.array([np.asarray(basis[term], dtype=float) for term in self.terms])
+        self.basis_sumw2 = None if basis_sumw2 is None else np.array(
+            [np.asarray(basis_sumw2[term], dtype=float) for term in self.terms])
+        self.bin_edges = None if bin_edges is None else np.asarray(bin_edges, dtype=float)
+
+        # Coefficients in the order they first appear in the terms
+        self.coefficients = []
+        for term in self.terms:
+            self.coefficients.extend(coefficient for coefficient in term_coefficients(term)
+                                     if coefficient not in self.coefficients)
+        # Power of each coefficient (columns) in each term (rows)
+        self._powers = np.zeros((len(self.terms), len(self.coefficients)), dtype=np.int64)
+        for term_index, term in enumerate(self.terms):
+            for coefficient in term_coefficients(term):
+                self._powers[term_index, self.coefficients.index(coefficient)] += 1
+
+    def design_matrix(self, points) -> np.ndarray:
+        """
+        (number of points x number of terms) matrix with the factor that multiplies each term at each point.
+        The points are either a dictionary with the value(s) of each coefficient (missing coefficients are 0),
+        or a (number of points x number of coefficients) array with the columns in the order of coefficients.
+        """
+        if isinstance(points, dict):
+            unknown = set(points) - set(self.coefficients)
+            if unknown:
+                raise ValueError(f"Unknown coefficients: {sorted(unknown)}.")
+            values = np.broadcast_arrays(*[np.atleast_1d(np.asarray(value, dtype=float))
+                                           for value in points.values()]) if points else []
+            number_of_points = len(values[0]) if points else 1
+            points_matrix = np.zeros((number_of_points, len(self.coefficients)))
+            for coefficient, value in zip(points, values):
+                points_matrix[:, self.coefficients.index(coefficient)] = value
+        else:
+            points_matrix = np.atleast_2d(np.asarray(points, dtype=float))
+            if points_matrix.shape[1] != len(self.coefficients):
+                raise ValueError(f"Points have {points_matrix.shape[1]} coefficients instead of "
+                                 f"{len(self.coefficients)}.")
+        # Product of the coefficients of each term, c_i ** power_i (0 ** 0 = 1)
+        return np.prod(points_matrix[:, np.newaxis, :] ** self._powers[np.newaxis, :, :], axis=2)
+
+    def predict(self, points) -> np.ndarray:
+        """
+        Predicted histogram at each point, as a (number of points x number of bins) array.
+        A single point given as a dictionary of numbers (or a 1D array) gives a single histogram.
+        """
+        predictions = self.design_matrix(points) @ self.basis
+        return predictions[0] if self._single_point(points) else predictions
+
+    def predict_sumw2(self, points) -> np.ndarray:
+        """Variance of the predicted histogram at each point, assuming the terms were simulated independently."""
+        if self.basis_sumw2 is None:
+            raise ValueError("The basis does not have the variance of its terms.")
+        variances = self.design_matrix(points) ** 2 @ self.basis_sumw2
+        return variances[0] if self._single_point(points) else variances
+
+    @staticmethod
+    def _single_point(points) -> bool:
+        """Checks if the points are a single point."""
+        if isinstance(points, dict):
+            return all(np.ndim(value) == 0 for value in points.values())
+        return np.ndim(points) == 1
+
+    @classmethod
+    def from_results(cls, results: Iterable[Union[str, HistogramResult]], hist_name: str = "",
+                     get_term: Callable[[str], str] = sample_term, scale: float = 1.) -> "EFTMorphing":
+        """
+        Builds the basis from the saved results of the EFT terms (see HistogramResult).
+        The results of each sample are merged, and the normalized histograms of the samples of each term
+        (e.g. its simulated bins) are added. get_term gives the EFT term of each sample.
+        """
+        basis, basis_sumw2, bin_edges = {}, {}, None
+        for sample, result in merge_results(results).items():
+            term = get_term(sample)
+            basis[term] = basis.get(term, 0.) + scale * result.normalized(hist_name)
+            if basis_sumw2 is not None and "sumw2" in result.contents[hist_name]:
+                basis_sumw2[term] = basis_sumw2.get(term, 0.) + scale**2 * result.normalized_sumw2(hist_name)
+            else:
+                basis_sumw2 = None
+            bin_edges = result.contents[hist_name].get("edges", bin_edges)
+        return cls(basis, basis_sumw2, bin_edges)
+
+    @classmethod
+    def fit(cls, points: Dict[str, Dict[str, float]], histograms: Dict[str, np.ndarray], terms: List[str],
+            bin_edges: np.ndarray = None) -> "EFTMorphing":
+        """
+        Builds the basis from histograms at known points (e.g. the reweighted histograms of a sample),
+        solving prediction(point) = histogram for the terms, in the least-squares sense if there are
+        more points than terms.
+        :param points: Values of the coefficients (e.g. {"beta": 0.5}) for each histogram name.
+                       Coefficients that are not in any term are ignored.
+        :param histograms: Histogram for each name in points.
+        :param terms: EFT terms of the basis.
+        """
+        if len(points) < len(terms):
+            raise ValueError(f"At least {len(terms)} points are needed to fit {len(terms)} terms.")
+        morphing = cls({term: np.zeros(0) for term in terms})
+        names = list(points)
+        design = morphing.design_matrix({
+            coefficient: [points[name].get(coefficient, 0.) for name in names]
+            for coefficient in morphing.coefficients
+        })
+        targets = np.array([np.asarray(histograms[name], dtype=float) for name in names])
+        basis = np.linalg.lstsq(design, targets, rcond=None)[0]
+        return cls(dict(zip(terms, basis)), bin_edges=bin_edges)
+
+    def save(self, path: str):
+        """Saves the basis as a compressed .npz file."""
+        arrays = {"terms": np.array(self.terms, dtype=str), "basis": self.basis}
+        if self.basis_sumw2 is not None:
+            arrays["basis_sumw2"] = self.basis_sumw2
+        if self.bin_edges is not None:
+            arrays["bin_edges"] = self.bin_edges
+        np.savez_compressed(path, **arrays)
+
+    @classmethod
+    def load(cls, path: str) -> "EFTMorphing":
+        """Loads a basis saved with save."""
+        with np.load(path) as basis_file:
+            terms = basis_file["terms"].tolist()
+            basis_sumw2 = dict(zip(terms, basis_file["basis_sumw2"])) if "basis_sumw2" in basis_file.files else None
+            bin_edges = basis_file["bin_edges"] if "bin_edges" in basis_file.files else None
+            return cls(dict(zip(terms, basis_file["basis"])), basis_sumw2, bin_edges)
@@ -0,0 +1,265 @@
+"""
+    Cache of the observables and cut outcomes of every event in a file, for iterative analysis development.
+    The particle selection, the cuts and the observables are evaluated once on all the events of the file, and the
+    results are stored as columns in a compressed sidecar file next to the event file (see src/FileCache.py).
+    The sidecar is keyed by the size and modification time of the event file and by a fingerprint of the
+    analysis, so it is only reused while neither of them changes. Changing the binning, or dropping the last cuts,
+    is then an array operation over the cached columns that does not read the events again.
+"""
+
+import copy
+import hashlib
+import inspect
+import sysconfig
+import numpy as np
+from typing import Callable, Dict, List, Set, Union
+from EventAnalysis_Framework.src.Analysis import _step_names
+from EventAnalysis_Framework.src.FileCache import load_cached, save_cached
+from EventAnalysis_Framework.src.Histogram import Histogram, unweighted_events
+
+
+# Outcomes of the cuts stored in the columns. The cuts are applied in order, so the cuts after the first one that
+# fails are not evaluated
+PASSED, FAILED, NOT_EVALUATED = 1, 0, -1
+
+# Directories of the standard library and the installed packages, whose code is not part of the fingerprint
+_library_paths = tuple({sysconfig.get_paths()[name] for name in ["stdlib", "platstdlib", "purelib", "platlib"]})
+
+
+def analysis_fingerprint(steps: List[Callable], version: str = "") -> str:
+    """
+    Hash of the source code of the steps of the analysis (functions, or classes and attributes of the callable
+    objects), and of the functions and classes of the analysis code that they use.
+    The version can be changed to invalidate the caches by hand (e.g. when an installed package changes).
+    """
+    digest = hashlib.sha1(version.encode())
+    seen = set()
+    for step in steps:
+        digest.update(_step_source(step, seen).encode())
+    return digest.hexdigest()[:16]
+
+
+def _step_source(step: Callable, seen: Set[int], depth: int = 0) -> str:
+    """
+    Source code of the function, or of the class of the callable object together with its attributes, followed by
+    the source code of the functions and classes it uses.
+    """
+    target = step if inspect.isroutine(step) or inspect.isclass(step) else type(step)
+    source = _source(target)
+    if target is not step and hasattr(step, "__dict__"):
+        source += _state(vars(step), seen, depth + 1)
+    return source + "".join(_helper_sources(target, seen))
+
+
+def _source(target) -> str:
+    """Source code of the function or class (its name if the source is not available)."""
+    try:
+        return inspect.getsource(target)
+    except (OSError, TypeError):
+        return getattr(target, "__qualname__", repr(target))
+
+
+def _helper_sources(target, seen: Set[int]) -> List[str]:
+    """Source code of the functions and classes of the analysis code used by the target, recursively."""
+    sources = []
+    for function in _functions(target):
+        for name in sorted(_global_names(function.__code__)):
+            helper = function.__globals__.get(name)
+            if (inspect.isroutine(helper) or inspect.isclass(helper)) and id(helper) not in seen \
+                    and _is_analysis_code(helper):
+                seen.add(id(helper))
+                sources.append(_source(helper))
+                sources += _helper_sources(helper, seen)
+    return sources
+
+
+def _functions(target) -> list:
+    """Python functions of the target (the function itself, or the methods of the class)."""
+    if inspect.isclass(target):
+        members = [getattr(member, "__func__", member) for member in vars(target).values()]
+        return [member for member in members if inspect.isfunction(member)]
+    target = getattr(target, "__func__", target)
+    return [target] if inspect.isfunction(target) else []
+
+
+def _global_names(code) -> Set[str]:
+    """Names used by the code, including the code of nested functions and comprehensions."""
+    names = set(code.co_names)
+    for constant in code.co_consts:
+        if inspect.iscode(constant):
+            names |= _global_names(constant)
+    return names
+
+
+def _is_analysis_code(target) -> bool:
+    """Whether the function or class is defined outside the standard library and the installed packages."""
+    try:
+        source_file = inspect.getsourcefile(target)
+    except TypeError:
+        return False
+    return source_file is not None and not source_file.startswith(_library_paths)
+
+
+def _state(value, seen: Set[int], depth: int) -> str:
+    """
+    Representation of a value that does not depend on memory addresses: objects (e.g. a lepton dresser held by
+    the particle selection) are represented by their class and attributes, down to a few levels.
+    """
+    if isinstance(value, dict):
+        return "{" + ", ".join(f"{key!r}: {_state(item, seen, depth)}" for key, item in value.items()) + "}"
+    if isinstance(value, (list, tuple)):
+        return "[" + ", ".join(_state(item, seen, depth) for item in value) + "]"
+    if callable(value) or hasattr(value, "__dict__"):
+        return _step_source(value, seen, depth) if depth < 4 else type(value).__qualname__
+    return repr(value)
+
+
+class EventColumns:
+    """Observable values, cut outcomes and weights of all the events of a file."""
+
+    def __init__(self, observables: Dict[str, np.ndarray], cuts: Dict[str, np.ndarray], weights: np.ndarray):
+        """
+        :param observables: Value of each observable for each event (NaN if it could not be computed).
+        :param cuts: Outcome of each cut for each event (PASSED, FAILED or NOT_EVALUATED).
+        :param weights: Weight of each event.
+        """
+        self.observables = observables
+        self.cuts = cuts
+        self.weights = weights
+
+    def __len__(self) -> int:
+        """Number of events in the file."""
+        return len(self.weights)
+
+    def selected(self, cuts: List[str] = None) -> np.ndarray:
+        """
+        Mask with the events that pass all the given cuts (by default, all the cuts).
+        Raises a ValueError if the outcome of an event is unknown, i.e. if it failed a cut that is not given and
+        the given cuts after it were not evaluated (e.g. when a cut in the middle is dropped).
+        """
+        selected = np.ones(len(self), dtype=bool)
+        not_evaluated = np.zeros(len(self), dtype=bool)
+        for cut_name in self.cuts if cuts is None else cuts:
+            selected &= self.cuts[cut_name] != FAILED
+            not_evaluated |= self.cuts[cut_name] == NOT_EVALUATED
+        if np.any(selected & not_evaluated):
+            raise ValueError(f"The cuts {cuts} were not evaluated on {np.count_nonzero(selected & not_evaluated)} "
+                             f"events that failed a previous cut. The columns must be evaluated with these cuts.")
+        return selected
+
+    def fill(self, histogram: Histogram, observable: str, cuts: List[str] = None) -> Histogram:
+        """
+        Returns an empty copy of the histogram (e.g. ObservableHistogram with new bin edges) filled with the values
+        of the observable of the events that pass the cuts.
+        """
+        selected = self.selected(cuts)
+        filled_histogram = copy.copy(histogram)
+        filled_histogram.fill_many(self.observables[observable][selected], self.weights[selected])
+        return filled_histogram
+
+
+class ObservableCache:
+    """
+    Evaluates the observables and the cuts on all the events of a file, and caches the result.
+    Observables and cuts receive the event after the particle selection, as in EventAnalysis. The cuts are applied
+    in order until one of them fails, and the following ones are recorded as NOT_EVALUATED, so cuts can rely on
+    the previous ones (e.g. access the second lepton after a cut on the number of leptons).
+    The observables are evaluated on every event. The events that do not pass all the cuts would not reach the
+    observables in EventAnalysis, so their errors (e.g. the second lepton of an event with a single lepton) are
+    recorded as NaN. The errors on the events that pass all the cuts are raised.
+    """
+
+    def __init__(self, file_reader: Callable, observables: List[Callable], cuts: List[Callable] = None,
+                 particles_selection: Callable = None, get_weight: Callable = unweighted_events, version: str = ""):
+        """
+        :param file_reader: Function that returns an iterable over the events in the file.
+        :param observables: Functions that return the value of an observable for an event.
+        :param cuts: Functions that return True if the event passes the cut.
+        :param particles_selection: Returns an event with a list of particles selected for the analysis.
+        :param get_weight: Returns the weight of an event, as read by the file reader.
+        :param version: Label that is part of the fingerprint, to invalidate the caches by hand.
+        """
+        self._file_reader = file_reader
+        self._observables = observables
+        self._cuts = cuts if cuts is not None else []
+        self._particles_selection = particles_selection
+        self._get_weight = get_weight
+
+        # Names of the columns, as in the cut flow
+        self.observable_names = _step_names(self._observables)
+        self.cut_names = _step_names(self._cuts)
+        selection = [] if particles_selection is None else [particles_selection]
+        self.fingerprint = analysis_fingerprint(selection + self._cuts + self._observables + [get_weight], version)
+
+    @property
+    def suffix(self) -> str:
+        """Suffix of the sidecar files of this analysis."""
+        return f".obs-{self.fingerprint}.npz"
+
+    def columns(self, filename: Union[str, Dict[str, str]], use_cache: bool = True) -> EventColumns:
+        """
+        Returns the columns of the events in the file, from the sidecar if it is up to date.
+        Files given as a dictionary (e.g. LHCO and LHE files) are cached next to the first of them.
+        """
+        cache_file = filename if isinstance(filename, str) else next(iter(filename.values()))
+        if use_cache:
+            cached = load_cached(cache_file, self.suffix)
+            if cached is not None:
+                return self._to_columns(cached)
+
+        arrays = self._evaluate(filename)
+        if use_cache:
+            save_cached(cache_file, self.suffix, arrays, compressed=True)
+        return self._to_columns(arrays)
+
+    def _evaluate(self, filename: Union[str, Dict[str, str]]) -> Dict[str, np.ndarray]:
+        """Reads all the events and evaluates the observables and the cuts on each of them."""
+        print(f"Reading events from file: {filename}")
+        values, passed, weights = [], [], []
+        for event in self._file_reader(filename):
+            if weights and len(weights) % 1000 == 0:
+                print(f"INFO: Processed {len(weights)} events")
+            weights.append(self._get_weight(event))
+
+            if self._particles_selection is not None:
+                event = self._particles_selection(event)
+            event_passed = _apply_cuts(self._cuts, event)
+            passed.append(event_passed)
+            values.append([_observable_value(observable, event, FAILED not in event_passed)
+                           for observable in self._observables])
+
+        return {
+            "observables": np.array(values, dtype=float).reshape(len(weights), len(self._observables)),
+            "cuts": np.array(passed, dtype=np.int8).reshape(len(weights), len(self._cuts)),
+            "weights": np.array(weights, dtype=float),
+            "observable_names": np.array(self.observable_names, dtype=str),
+            "cut_names": np.array(self.cut_names, dtype=str)
+        }
+
+    @staticmethod
+    def _to_columns(arrays: Dict[str, np.ndarray]) -> EventColumns:
+        """Splits the arrays of the sidecar into one column per observable and per cut."""
+        observables = {name: arrays["observables"][:, index]
+                       for index, name in enumerate(arrays["observable_names"].tolist())}
+        cuts = {name: arrays["cuts"][:, index] for index, name in enumerate(arrays["cut_names"].tolist())}
+        return EventColumns(observables, cuts, arrays["weights"])
+
+
+def _apply_cuts(cuts: List[Callable], event) -> List[int]:
+    """Outcome of each cut, applied in order until one of them fails."""
+    outcomes = []
+    for cut in cuts:
+        outcomes.append(PASSED if cut(event) else FAILED)
+        if outcomes[-1] == FAILED:
+            return outcomes + [NOT_EVALUATED] * (len(cuts) - len(outcomes))
+    return outcomes
+
+
+def _observable_value(observable: Callable, event, passed_cuts: bool) -> float:
+    """Value of the observable for the event, or NaN if it cannot be computed for an event that failed a cut."""
+    try:
+        return float(observable(event))
+    except Exception:
+        if passed_cuts:
+            raise
+        return np.nan
@@ -1,10 +1,132 @@
+import os
+import re
+import gzip
+import numpy as np
+from typing import Dict, Any
+from EventAnalysis_Framework.src.FileCache import file_key, load_cached, save_cached
+
+# Weights declared in the <initrwgt> block, e.g. <weight id='rwgt_1'> set param </weight>
+_WEIGHT_ID_PATTERN = re.compile(r"<weight\s+id=['\"]?([^'\">\s]+)")
+# Beginning and end of the <init> block (but not of the <initrwgt> block)
+_INIT_START_PATTERN = re.compile(r"<init[\s>]")
+_INIT_END_PATTERN = re.compile(r"</init[\s>]")
+
+# Suffix of the sidecar files with the metadata
+_METADATA_SUFFIX = ".meta.npz"
+
+# Metadata already read in this process, keyed by (path, size, mtime, xsection_line, number_of_evts_line)
+_metadata_cache = {}
 
 
 def read_xsection(path_to_file: str, default_line: str = "#  Integrated weight (pb)  :"):
     """Reads the cross-section from a .lhe or banner file"""
-    with open(path_to_file) as info_file:
+    return read_metadata(path_to_file, xsection_line=default_line)["xsection"]
+
+
+def read_metadata(path_to_file: str, xsection_line: str = "#  Integrated weight (pb)  :",
+                  number_of_evts_line: str = "#  Number of Events        :") -> Dict[str, Any]:
+    """
+    Reads the information in the header of a .lhe or banner file, without reading the events:
+    - xsection: value in the line starting with xsection_line.
+    - init_xsection, init_xsection_error: sum of the cross-sections of the processes in the <init> block,
+                                          and its error.
+    - number_of_evts: value in the line starting with number_of_evts_line.
+    - weight_names: ids of the weights declared in the <initrwgt> block.
+    Only the header is read, unless the line of the cross-section is not there (see _read_header).
+    Missing values are None. The result is cached in a sidecar file next to the file, and in memory.
+    """
+    lines = {"xsection_line": xsection_line, "number_of_evts_line": number_of_evts_line}
+    memory_key = (os.path.abspath(path_to_file), *file_key(path_to_file).tolist(), xsection_line, number_of_evts_line)
+    if memory_key in _metadata_cache:
+        return dict(_metadata_cache[memory_key])
+
+    cached = load_cached(path_to_file, _METADATA_SUFFIX)
+    if cached is not None and all(name in cached and cached[name] == line for name, line in lines.items()):
+        metadata = _from_arrays(cached)
+    else:
+        metadata = _read_header(path_to_file, xsection_line, number_of_evts_line)
+        save_cached(path_to_file, _METADATA_SUFFIX, _to_arrays(metadata, lines))
+
+    _metadata_cache[memory_key] = metadata
+    return dict(metadata)
+
+
+def _read_header(path_to_file: str, xsection_line: str, number_of_evts_line: str) -> Dict[str, Any]:
+    """
+    Reads the file line by line until the end of the <init> block, or the first event.
+    If the cross-section was not found, the rest of the file is read until it is. In banner files (any file that
+    is not a .lhe file), the rest of the file is also read until the number of events is found.
+    """
+    # Values that are looked for after the header
+    missing_values = ["xsection"] if path_to_file.endswith((".lhe", ".lhe.gz")) else ["xsection", "number_of_evts"]
+    metadata = {"xsection": None, "init_xsection": None, "init_xsection_error": None, "number_of_evts": None,
+                "weight_names": []}
+    # Cross-sections and errors of the processes in the <init> block
+    init_lines = None
+    xsections, errors = [], []
+
+    open_file = gzip.open if path_to_file.endswith(".gz") else open
+    with open_file(path_to_file, "rt") as info_file:
         for line in info_file:
-            if line.startswith(default_line):
-                _, xsection = line.split(":")
-                return float(xsection)
-    return None
+            stripped_line = line.strip()
+            if _INIT_END_PATTERN.match(stripped_line) or stripped_line.startswith("<event"):
+                break
+
+            if _read_value_lines(line, metadata, xsection_line, number_of_evts_line):
+                continue
+            if stripped_line.startswith("<weight"):
+                metadata["weight_names"].extend(_WEIGHT_ID_PATTERN.findall(stripped_line))
+            elif _INIT_START_PATTERN.match(stripped_line):
+                init_lines = 0
+            elif init_lines is not None and stripped_line and not stripped_line.startswith(("#", "<")):
+                # The first line holds the beams information, the next ones: XSECUP XERRUP XMAXUP LPRUP
+                if init_lines > 0:
+                    xsection, error = map(float, stripped_line.split()[:2])
+                    xsections.append(xsection)
+                    errors.append(error)
+                init_lines += 1
+
+        # Looks for the lines that are not in the header (e.g. after the <init> block of a banner file)
+        for line in info_file:
+            if all(metadata[name] is not None for name in missing_values):
+                break
+            _read_value_lines(line, metadata, xsection_line, number_of_evts_line)
+
+    if xsections:
+        metadata["init_xsection"] = float(np.sum(xsections))
+        metadata["init_xsection_error"] = float(np.sqrt(np.sum(np.square(errors))))
+    return metadata
+
+
+def _read_value_lines(line: str, metadata: Dict[str, Any], xsection_line: str, number_of_evts_line: str) -> bool:
+    """Reads the cross-section or the number of events if the line holds one of them. Returns True if it did."""
+    if metadata["xsection"] is None and line.startswith(xsection_line):
+        metadata["xsection"] = float(line[len(xsection_line):].strip().lstrip(":"))
+        return True
+    if metadata["number_of_evts"] is None and line.startswith(number_of_evts_line):
+        metadata["number_of_evts"] = int(float(line[len(number_of_evts_line):].strip().lstrip(":")))
+        return True
+    return False
+
+
+def _to_arrays(metadata: Dict[str, Any], lines: Dict[str, str]) -> Dict[str, np.ndarray]:
+    """
+    Converts the metadata to arrays for the sidecar file, together with the beginning of the lines of the
+    cross-section and the number of events. Missing values are stored as NaN.
+    """
+    arrays = {name: np.array(np.nan if value is None else value, dtype=float)
+              for name, value in metadata.items() if name != "weight_names"}
+    arrays["weight_names"] = np.array(metadata["weight_names"], dtype=str)
+    arrays.update({name: np.array(line) for name, line in lines.items()})
+    return arrays
+
+
+def _from_arrays(arrays: Dict[str, np.ndarray]) -> Dict[str, Any]:
+    """Inverse of _to_arrays."""
+    metadata = {name: None if np.isnan(value) else float(value)
+                for name, value in arrays.items()
+                if name not in ("weight_names", "xsection_line", "number_of_evts_line")}
+    if metadata["number_of_evts"] is not None:
+        metadata["number_of_evts"] = int(metadata["number_of_evts"])
+    metadata["weight_names"] = arrays["weight_names"].tolist()
+    return metadata
@@ -0,0 +1,45 @@
+"""
+    Compares the time spent by read_LHCO and read_LHCO_fast on a generated .lhco file.
+    It is not part of the tests, since it measures the wall-clock time: python tests/benchmark_fast_lhco_reader.py
+"""
+
+import os
+import sys
+import time
+import tempfile
+from conftest import write_lhco
+from EventAnalysis_Framework.LHCO.src.LHCOReader import read_LHCO
+from EventAnalysis_Framework.LHCO.src.FastLHCOReader import read_LHCO_fast, parse_LHCO
+
+
+def best_time(function, repetitions: int = 3) -> float:
+    """Shortest time of a few calls of function."""
+    times = []
+    for _ in range(repetitions):
+        start_time = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start_time)
+    return min(times)
+
+
+if __name__ == "__main__":
+    number_of_evts = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+
+    with tempfile.TemporaryDirectory() as folder:
+        path = os.path.join(folder, "sample.lhco")
+        write_lhco(path, number_of_evts)
+
+        timings = {
+            "read_LHCO": best_time(lambda: list(read_LHCO(path))),
+            "parse_LHCO": best_time(lambda: list(parse_LHCO(path))),
+            "read_LHCO (particles)": best_time(
+                lambda: [len(event.electrons) + len(event.jets) for event in read_LHCO(path)]
+            ),
+            "read_LHCO_fast (columns)": best_time(
+                lambda: [len(event.columns("electrons")) + len(event.columns("jets")) for event in read_LHCO_fast(path)]
+            ),
+        }
+
+    print(f"{number_of_evts} events")
+    for name, elapsed_time in timings.items():
+        print(f"{name:>25}: {elapsed_time:.3f} s")
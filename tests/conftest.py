@@ -0,0 +1,98 @@
+"""
+    Common fixtures of the tests: small .lhe and .lhco samples written in a temporary folder.
+    The modules are imported as EventAnalysis_Framework.<folder>.<module>, so the repository is registered
+    under that name if it was cloned into a folder with a different name.
+"""
+
+import os
+import sys
+import types
+import pytest
+import numpy as np
+
+_repository = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if os.path.basename(_repository) == "EventAnalysis_Framework":
+    sys.path.insert(0, os.path.dirname(_repository))
+elif "EventAnalysis_Framework" not in sys.modules:
+    package = types.ModuleType("EventAnalysis_Framework")
+    package.__path__ = [_repository]
+    sys.modules["EventAnalysis_Framework"] = package
+
+# Ids of the <rwgt> weights of the .lhe sample
+WEIGHT_NAMES = ["rwgt_1", "beta_3E-1", "beta_-3E-1"]
+
+
+def write_lhe(path: str, number_of_evts: int, weight_names=WEIGHT_NAMES, seed: int = 1):
+    """Writes a .lhe file with Drell-Yan-like e+ e- events and a <rwgt> block in each event."""
+    rng = np.random.default_rng(seed)
+    lines = ['<LesHouchesEvents version="3.0">', "<header>", "<MGGenerationInfo>",
+             f"#  Number of Events        :       {number_of_evts}",
+             "#  Integrated weight (pb)  :       0.123", "</MGGenerationInfo>", "<initrwgt>",
+             "<weightgroup name='mg_reweighting' weight_name_strategy='includeIdInWeightName'>"]
+    lines += [f"<weight id='{weight_name}'> set param </weight>" for weight_name in weight_names]
+    lines += ["</weightgroup>", "</initrwgt>", "</header>", "<init>",
+              "2212 2212 6.5e3 6.5e3 0 0 247000 247000 -4 1", "0.123 0.001 0.123 1", "</init>"]
+    for _ in range(number_of_evts):
+        pt = rng.exponential(100) + 5
+        eta1, eta2 = rng.normal(0, 2, 2)
+        phi = rng.uniform(-np.pi, np.pi)
+        p1 = np.array([pt * np.cos(phi), pt * np.sin(phi), pt * np.sinh(eta1)])
+        p2 = np.array([-pt * np.cos(phi), -pt * np.sin(phi), pt * np.sinh(eta2)])
+        p1, p2 = np.r_[p1, np.linalg.norm(p1)], np.r_[p2, np.linalg.norm(p2)]
+        total = p1 + p2
+        ea, eb = (total[3] + total[2]) / 2, (total[3] - total[2]) / 2
+        mass = np.sqrt(max(total[3]**2 - (total[:3]**2).sum(), 0))
+        weight = 0.123 / number_of_evts
+        lines += ["<event>", f" 5      1 +{weight:.7e} 9.1e+01 7.5e-03 1.1e-01",
+                  f"        2 -1    0    0  501    0 +0.0e+00 +0.0e+00 +{ea:.10e} {ea:.10e} 0.0e+00 0.0e+00 1.0e+00",
+                  f"       -2 -1    0    0    0  501 -0.0e+00 -0.0e+00 -{eb:.10e} {eb:.10e} 0.0e+00 0.0e+00 -1.0e+00",
+                  "       23  2    1    2    0    0 " + " ".join(f"{value:.10e}" for value in (*total, mass))
+                  + " 0.0e+00 0.0e+00",
+                  "       11  1    3    3    0    0 " + " ".join(f"{value:.10e}" for value in p1)
+                  + " 0.0e+00 0.0e+00 -1.0e+00",
+                  "      -11  1    3    3    0    0 " + " ".join(f"{value:.10e}" for value in p2)
+                  + " 0.0e+00 0.0e+00 1.0e+00",
+                  "<rwgt>"]
+        lines += [f"<wgt id='{weight_name}'> {weight * rng.uniform(0.5, 1.5):+.7e} </wgt>"
+                  for weight_name in weight_names]
+        lines += ["</rwgt>", "</event>"]
+    lines.append("</LesHouchesEvents>")
+    with open(path, "w") as lhe_file:
+        lhe_file.write("\n".join(lines) + "\n")
+
+
+def write_lhco(path: str, number_of_evts: int, seed: int = 1):
+    """Writes a .lhco file with a random number of leptons and jets, and the missing energy, in each event."""
+    rng = np.random.default_rng(seed)
+    lines = ["  #  typ      eta      phi      pt    jmas   ntrk   btag  had/em  dum1  dum2"]
+    line_format = "%3d %4d %8.3f %8.3f %8.2f %7.2f %6.1f %6.1f %7.2f %6.1f %6.1f"
+    for event_index in range(number_of_evts):
+        lines.append(f"  0 {event_index:13d}        0")
+        particle_index = 1
+        for _ in range(rng.integers(0, 5)):
+            typ = int(rng.choice([1, 2, 4]))
+            lines.append(line_format % (
+                particle_index, typ, rng.normal(0, 2), rng.uniform(-3.14, 3.14), rng.exponential(60) + 5,
+                rng.uniform(0, 20) if typ == 4 else 0., rng.choice([-1, 1]) if typ != 4 else rng.integers(1, 10),
+                float(rng.integers(0, 2)) if typ == 4 else 0., 0.1, 0., 0.))
+            particle_index += 1
+        lines.append(line_format % (particle_index, 6, 0., rng.uniform(-3.14, 3.14), rng.exponential(40),
+                                    0, 0, 0, 0, 0, 0))
+    with open(path, "w") as lhco_file:
+        lhco_file.write("\n".join(lines) + "\n")
+
+
+@pytest.fixture(scope="session")
+def lhe_file(tmp_path_factory) -> str:
+    """Path to a .lhe sample with 500 events."""
+    path = str(tmp_path_factory.mktemp("samples") / "sample.lhe")
+    write_lhe(path, 500)
+    return path
+
+
+@pytest.fixture(scope="session")
+def lhco_file(tmp_path_factory) -> str:
+    """Path to a .lhco sample with 500 events."""
+    path = str(tmp_path_factory.mktemp("samples") / "sample.lhco")
+    write_lhco(path, 500)
+    return path
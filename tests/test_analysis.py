@@ -0,0 +1,124 @@
+"""Tests of the event loop over single files (src/Analysis.py)."""
+
+import numpy as np
+import pytest
+from EventAnalysis_Framework.LHE.src.read_lhe import read_lhe
+from EventAnalysis_Framework.LHE.src.read_lhe_columnar import read_lhe_columnar
+from EventAnalysis_Framework.LHE.src.Observables import InvariantMassObs
+from EventAnalysis_Framework.src.Histogram import ObservableHistogram
+from EventAnalysis_Framework.src.Analysis import EventAnalysis, AdaptiveEventAnalysis, EventLoop, event_block
+from EventAnalysis_Framework.src.CutFlow import CutFlow
+
+BIN_EDGES = [0, 100, 200, 400, 800, 5000]
+
+
+def event_loop() -> EventLoop:
+    """Event loop over the .lhe files that books the invariant mass of the electrons."""
+    return EventLoop(file_reader=read_lhe, histogram=ObservableHistogram(BIN_EDGES, InvariantMassObs(part_pids=[11])))
+
+
+def test_range_readers_get_contiguous_blocks(lhe_file):
+    """Readers that accept start and stop read one contiguous block per worker."""
+    loop = event_loop()
+    assert loop._shards(lhe_file, 3, 0, None, 1) == [(0, 166, 1), (166, 333, 1), (333, 500, 1)]
+    assert loop._shards(lhe_file, 2, 10, 101, 3) == [(10, 55, 3), (55, 101, 3)]
+    # The events of compressed files cannot be indexed, so the workers take every n_workers-th event
+    assert loop._shards(lhe_file + ".gz", 2, 0, None, 1) == [(0, None, 2), (1, None, 2)]
+
+
+def test_parallel_analysis_matches_serial(lhe_file):
+    """The events analysed in parallel are the same as in a single process."""
+    loop, analysis = event_loop(), EventAnalysis(cuts=[])
+    serial_hist, serial_evts = loop.analyse_events(lhe_file, analysis, start=7, stop=450, stride=3)
+    parallel_hist, parallel_evts = loop.analyse_events(lhe_file, analysis, n_workers=3, start=7, stop=450, stride=3)
+    assert parallel_evts == serial_evts == len(range(7, 450, 3))
+    np.testing.assert_allclose(parallel_hist, serial_hist)
+
+    full_hist, full_evts = loop.analyse_events(lhe_file, analysis, n_workers=4)
+    assert full_evts == 500
+    np.testing.assert_allclose(full_hist, loop.analyse_events(lhe_file, analysis)[0])
+
+
+def test_event_blocks_cover_the_events():
+    """The contiguous blocks of the jobs cover every event once."""
+    blocks = [event_block(block_index, 4, 103, start=5, stride=2) for block_index in range(4)]
+    assert blocks[0][0] == 5 and blocks[-1][1] == 103
+    events = [event for block_start, block_stop in blocks for event in range(block_start, block_stop, 2)]
+    assert events == list(range(5, 103, 2))
+
+
+def event_weight(event) -> float:
+    """Weight of the .lhe event."""
+    return event.eventinfo.weight
+
+
+def batch_weight(batch) -> np.ndarray:
+    """Weight of each event in the batch."""
+    return batch.weight
+
+
+def batch_mass(batch) -> np.ndarray:
+    """Invariant mass of the electrons of each event in the batch."""
+    total_momentum = batch.total_momentum([11])
+    return np.sqrt(np.maximum(total_momentum[:, 0] ** 2 - np.sum(total_momentum[:, 1:] ** 2, axis=1), 0))
+
+
+def central_electrons(batch) -> np.ndarray:
+    """Batch cut on the pseudo-rapidity of the electrons."""
+    electrons = batch.particles_mask([11])
+    eta = np.arcsinh(batch.pz[electrons] / np.hypot(batch.px[electrons], batch.py[electrons]))
+    return np.bincount(batch.event_index[electrons][np.abs(eta) >= 2.5], minlength=len(batch)) == 0
+
+
+def central_electron_events(event) -> bool:
+    """Same cut as central_electrons, for a single event."""
+    return all(abs(np.arcsinh(particle.pz / np.hypot(particle.px, particle.py))) < 2.5
+               for particle in event.particles if abs(particle.id) == 11)
+
+
+def loose_mass(event) -> bool:
+    """Slow cut that rejects few events."""
+    return sum(range(5000)) > 0 and InvariantMassObs(part_pids=[11])(event) > 20
+
+
+def tight_mass(event) -> bool:
+    """Fast cut that rejects many events."""
+    return InvariantMassObs(part_pids=[11])(event) > 150
+
+
+def test_batch_analysis_matches_the_event_analysis(lhe_file):
+    """The histograms filled with batches of events are the same as filled one event at a time."""
+    event_hist, event_evts = EventLoop(
+        file_reader=read_lhe, histogram=ObservableHistogram(BIN_EDGES, InvariantMassObs([11]), event_weight)
+    ).analyse_events(lhe_file, EventAnalysis(cuts=[central_electron_events, tight_mass]))
+
+    batch_loop = EventLoop(file_reader=lambda filename: read_lhe_columnar(filename, chunk_size=64),
+                           histogram=ObservableHistogram(BIN_EDGES, batch_mass, batch_weight), cut_flow=CutFlow())
+    batch_hist, batch_evts = batch_loop.analyse_batches(
+        lhe_file, EventAnalysis(cuts=[tight_mass], batch_cuts=[central_electrons])
+    )
+    assert batch_evts == event_evts == 500
+    assert event_hist.sum() > 0
+    np.testing.assert_allclose(batch_hist, event_hist)
+    assert batch_loop.cut_flow["central_electrons"]["entering"] == 500
+    assert batch_loop.cut_flow["tight_mass"]["passing"] == np.count_nonzero(
+        [central_electron_events(event) and tight_mass(event) for event in read_lhe(lhe_file)])
+
+
+@pytest.mark.parametrize("batches", [False, True])
+def test_adaptive_analysis_reorders_the_cuts(lhe_file, batches):
+    """The cuts are reordered after the warm-up, also for batches with a cut flow, without changing the result."""
+    analysis = AdaptiveEventAnalysis(cuts=[loose_mass, tight_mass], warmup_events=100)
+    if batches:
+        loop = EventLoop(file_reader=lambda filename: read_lhe_columnar(filename, chunk_size=64),
+                         histogram=ObservableHistogram(BIN_EDGES, batch_mass), cut_flow=CutFlow())
+        hist, _ = loop.analyse_batches(lhe_file, analysis)
+    else:
+        loop = EventLoop(file_reader=read_lhe, histogram=ObservableHistogram(BIN_EDGES, InvariantMassObs([11])),
+                         cut_flow=CutFlow())
+        hist, _ = loop.analyse_events(lhe_file, analysis)
+    assert analysis._cut_names == ["tight_mass", "loose_mass"]
+
+    expected, _ = event_loop().analyse_events(lhe_file, EventAnalysis(cuts=[loose_mass, tight_mass]))
+    np.testing.assert_allclose(hist, expected)
+    assert loop.cut_flow["tight_mass"]["entering"] + loop.cut_flow["loose_mass"]["entering"] > 500
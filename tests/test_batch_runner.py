@@ -0,0 +1,57 @@
+"""Tests of the analysis of several samples (src/BatchRunner.py)."""
+
+import numpy as np
+import pytest
+from EventAnalysis_Framework.LHE.src.read_lhe import read_lhe
+from EventAnalysis_Framework.LHE.src.Observables import InvariantMassObs
+from EventAnalysis_Framework.src.Histogram import ObservableHistogram
+from EventAnalysis_Framework.src.Analysis import EventAnalysis, EventLoop
+from EventAnalysis_Framework.src.BatchRunner import BatchRunner, Sample
+from EventAnalysis_Framework.src.CutFlow import CutFlow
+
+BIN_EDGES = [0, 100, 200, 400, 800, 5000]
+
+
+def event_weight(event):
+    """Weight of the .lhe event."""
+    return event.eventinfo.weight
+
+
+def high_mass(event):
+    """Cut on the invariant mass of the electrons."""
+    return InvariantMassObs(part_pids=[11])(event) > 150
+
+
+@pytest.mark.parametrize("n_workers", [1, 2])
+def test_batch_runner_with_cut_flow(lhe_file, n_workers):
+    """The cut flows of the files of each sample are added, and the histograms are unchanged."""
+    histogram = ObservableHistogram(BIN_EDGES, InvariantMassObs(part_pids=[11]))
+    event_analysis = EventAnalysis(cuts=[high_mass])
+    event_loop = EventLoop(file_reader=read_lhe, histogram=histogram, cut_flow=CutFlow(get_weight=event_weight))
+    samples = [Sample(label="twice", files=[lhe_file, lhe_file]), Sample(label="once", files=[lhe_file])]
+
+    runner = BatchRunner(event_loop=event_loop, event_analysis=event_analysis, n_workers=n_workers)
+    sample_hists = runner.run(samples)
+
+    # Reference from a single file
+    file_hist, number_of_evts = event_loop.analyse_events(lhe_file, event_analysis)
+    file_cut_flow = event_loop.cut_flow
+    np.testing.assert_allclose(sample_hists["once"], file_hist / number_of_evts)
+    np.testing.assert_allclose(sample_hists["twice"], 2 * file_hist / number_of_evts)
+
+    assert set(runner.cut_flows) == {"once", "twice"}
+    for label, n_files in [("once", 1), ("twice", 2)]:
+        cut_flow = runner.cut_flows[label]
+        assert cut_flow.steps() == ["high_mass"]
+        assert cut_flow["high_mass"]["entering"] == n_files * number_of_evts
+        assert cut_flow["high_mass"]["passing"] == n_files * file_cut_flow["high_mass"]["passing"]
+        assert cut_flow["high_mass"]["sumw"] == pytest.approx(n_files * file_cut_flow["high_mass"]["sumw"])
+
+
+def test_event_loop_returns_two_values_with_cut_flow(lhe_file):
+    """The return value does not depend on the cut flow, which is stored in the attribute cut_flow."""
+    event_loop = EventLoop(file_reader=read_lhe, histogram=ObservableHistogram(BIN_EDGES, InvariantMassObs([11])),
+                           cut_flow=CutFlow())
+    for n_workers in [1, 2]:
+        _, number_of_evts = event_loop.analyse_events(lhe_file, EventAnalysis(cuts=[high_mass]), n_workers=n_workers)
+        assert event_loop.cut_flow["high_mass"]["entering"] == number_of_evts == 500
@@ -0,0 +1,27 @@
+"""Tests of the LHCO events (LHCO/src/EventInfo.py)."""
+
+from EventAnalysis_Framework.LHCO.src.LHCOReader import read_LHCO
+from EventAnalysis_Framework.LHCO.src.FastLHCOReader import read_LHCO_fast
+
+
+def test_particles_of_a_type_are_lists(lhco_file):
+    """The particles of each type are new lists, sorted by pT, that can be changed without changing the event."""
+    for event in list(read_LHCO(lhco_file))[:50] + list(read_LHCO_fast(lhco_file))[:50]:
+        jets = event.jets
+        assert isinstance(jets, list)
+        assert [jet.pt for jet in jets] == sorted((jet.pt for jet in jets), reverse=True)
+        jets.append(None)
+        jets.sort(key=lambda jet: jet is None)
+        assert None not in event.jets
+        assert event.jets == jets[:-1]
+
+
+def test_particles_of_a_type_follow_the_changes_of_the_event(lhco_file):
+    """The particles of each type are found again after the event is modified."""
+    event = next(iter(read_LHCO(lhco_file)))
+    number_of_particles = len(event)
+    met = event.met
+    event.remove_particles("met")
+    assert event.met == [] and len(event) == number_of_particles - len(met)
+    event.extend(met)
+    assert event.met == met
@@ -0,0 +1,66 @@
+"""Tests of the array-backed reader of .lhco files (LHCO/src/FastLHCOReader.py)."""
+
+import numpy as np
+import pytest
+from EventAnalysis_Framework.LHCO.src.EventInfo import Particle
+from EventAnalysis_Framework.LHCO.src.LHCOReader import read_LHCO
+from EventAnalysis_Framework.LHCO.src.FastLHCOReader import read_LHCO_fast, parse_LHCO
+from EventAnalysis_Framework.LHCO.src.Observables import InvariantMass
+from EventAnalysis_Framework.LHCO.analysis.TGC.CMS_WW_2009_00119 import selection_cuts
+from EventAnalysis_Framework.src.Histogram import ObservableHistogram
+from EventAnalysis_Framework.src.Analysis import EventAnalysis, EventLoop
+
+
+def particle_values(event):
+    """Information of the particles of the event, in order."""
+    return [tuple(getattr(particle, info) for info in Particle._info_slots) for particle in event]
+
+
+@pytest.mark.parametrize("block_size", [1 << 24, 1000])
+def test_same_events_as_read_lhco(lhco_file, block_size):
+    """The events are the same as read_LHCO, also when the events are split between blocks of the file."""
+    fast_events = [event for particles, offsets in parse_LHCO(lhco_file, block_size)
+                   for event in np.split(particles, offsets[1:-1]) if len(event)]
+    events = list(read_LHCO(lhco_file))
+    assert len(fast_events) == len(events)
+    for fast_event, event in zip(fast_events, events):
+        assert fast_event.tolist() == particle_values(event)
+
+    for fast_event, event in zip(read_LHCO_fast(lhco_file, 10, 20), events[10:20]):
+        assert particle_values(fast_event.electrons) == particle_values(event.electrons)
+        assert particle_values(fast_event.jets) == particle_values(event.jets)
+
+
+def test_particle_lines_are_validated(tmp_path, lhco_file):
+    """A particle line with a wrong number of columns raises an error instead of shifting the columns."""
+    with open(lhco_file) as lhco:
+        lines = lhco.read().split("\n")
+    particle_line = next(index for index, line in enumerate(lines) if line.split()[:1] == ["1"])
+    lines[particle_line] += " 0.0"
+    path = str(tmp_path / "wrong.lhco")
+    with open(path, "w") as lhco:
+        lhco.write("\n".join(lines))
+    with pytest.raises(ValueError, match="12 columns instead of 11"):
+        list(read_LHCO_fast(path))
+
+
+def analyse(file_reader, filename):
+    """Histogram of the CMS WW analysis (arXiv: 2009.00119)."""
+    event_analysis = EventAnalysis(
+        particles_selection=selection_cuts.select_objects,
+        cuts=[selection_cuts.opposite_sign_lepton_pair, selection_cuts.leptons_pt_cuts,
+              selection_cuts.missing_energy_cut, selection_cuts.lepton_pair_cuts, selection_cuts.btag_veto,
+              selection_cuts.number_of_jets]
+    )
+    histogram = ObservableHistogram([0, 100, 200, 400, 800, 5000], InvariantMass(particles=["electrons", "muons"]))
+    return EventLoop(file_reader=file_reader, histogram=histogram).analyse_events(filename, event_analysis)
+
+
+def test_cms_ww_selection_on_columns(lhco_file):
+    """The selection on the columns of the EventView gives the same histogram for both readers."""
+    hist, number_of_evts = analyse(read_LHCO, lhco_file)
+    fast_hist, fast_number_of_evts = analyse(read_LHCO_fast, lhco_file)
+    assert fast_number_of_evts == number_of_evts
+    assert hist.sum() > 0
+    np.testing.assert_allclose(fast_hist, hist)
+
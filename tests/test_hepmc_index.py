@@ -0,0 +1,62 @@
+"""Tests of the random access to the events of the HepMC files (HepMC3/src/HepMCIndex.py)."""
+
+import os
+import pyhepmc
+import numpy as np
+import pytest
+from EventAnalysis_Framework.HepMC3.src.HepMCIndex import read_hepmc_range, number_of_events
+
+
+def write_hepmc(path: str, number_of_evts: int, hepmc_format: str = "hepmc3", seed: int = 1):
+    """Writes a HepMC file with a two-body decay in each event."""
+    rng = np.random.default_rng(seed)
+    writer = pyhepmc.io.WriterAsciiHepMC2 if hepmc_format == "hepmc2" else pyhepmc.io.WriterAscii
+    with writer(path) as hepmc_file:
+        for event_number in range(number_of_evts):
+            event = pyhepmc.GenEvent(pyhepmc.Units.GEV, pyhepmc.Units.MM)
+            event.event_number = event_number
+            px, py, pz = rng.normal(0, 50, 3)
+            energy = np.sqrt(px ** 2 + py ** 2 + pz ** 2) + 100
+            mother = pyhepmc.GenParticle(pyhepmc.FourVector(0, 0, 0, 2 * energy), 23, 4)
+            daughters = [pyhepmc.GenParticle(pyhepmc.FourVector(sign * px, sign * py, sign * pz, energy), pid, 1)
+                         for sign, pid in [(1, 11), (-1, -11)]]
+            vertex = pyhepmc.GenVertex()
+            vertex.add_particle_in(mother)
+            for daughter in daughters:
+                vertex.add_particle_out(daughter)
+            event.add_vertex(vertex)
+            event.weights = [rng.uniform(0.5, 1.5)]
+            hepmc_file.write(event)
+
+
+def event_content(event: pyhepmc.GenEvent) -> tuple:
+    """Event number, weights, and pid, status and momentum of the particles."""
+    return (event.event_number, list(event.weights),
+            [(particle.pid, particle.status, particle.momentum.px, particle.momentum.py, particle.momentum.pz,
+              particle.momentum.e) for particle in event.particles])
+
+
+@pytest.mark.parametrize("hepmc_format", ["hepmc3", "hepmc2"])
+@pytest.mark.parametrize("start, stop", [(0, None), (3, 7), (-4, None), (-6, -2), (8, 100), (5, 5)])
+def test_ranges_match_pyhepmc(tmp_path, hepmc_format, start, stop):
+    """The events in [start, stop) are the same as the events read by pyhepmc.open, sliced in the same way."""
+    path = str(tmp_path / f"sample.{hepmc_format}")
+    write_hepmc(path, 12, hepmc_format)
+    with pyhepmc.open(path) as hepmc_events:
+        expected = [event_content(event) for event in hepmc_events][start:stop]
+    assert number_of_events(path) == 12
+    assert [event_content(event) for event in read_hepmc_range(path, start, stop)] == expected
+
+
+def test_index_is_rebuilt_after_the_file_changes(tmp_path):
+    """The sidecar with the index is only used while the file does not change."""
+    path = str(tmp_path / "sample.hepmc")
+    write_hepmc(path, 10)
+    assert number_of_events(path) == 10
+    assert os.path.exists(path + ".index.npz")
+
+    write_hepmc(path, 15, seed=2)
+    assert number_of_events(path) == 15
+    with pyhepmc.open(path) as hepmc_events:
+        expected = [event_content(event) for event in hepmc_events][10:]
+    assert [event_content(event) for event in read_hepmc_range(path, 10)] == expected
@@ -0,0 +1,145 @@
+"""Tests of the histograms (src/Histogram.py)."""
+
+import copy
+import numpy as np
+import pytest
+from EventAnalysis_Framework.src.Histogram import (WeightedHistogramManager, ObservableHistogram, ObservableHistogramND,
+                                                   UniformAxis)
+
+BIN_EDGES = list(np.linspace(0., 1., 11))
+
+
+def observable(event):
+    """Observable value of the test events (value, weights)."""
+    return event[0]
+
+
+def get_weights(event):
+    """Weights of the test events (value, weights)."""
+    return event[1]
+
+
+def reference_hists(events, hist_names):
+    """Histogram of each weight name filled one event at a time (weight 1 for the missing names)."""
+    hists = {hist_name: np.zeros(len(BIN_EDGES) - 1) for hist_name in hist_names}
+    for value, weights in events:
+        bin_index = np.searchsorted(BIN_EDGES, value, side="right") - 1
+        if 0 <= bin_index < len(BIN_EDGES) - 1:
+            for hist_name in hist_names:
+                hists[hist_name][bin_index] += weights.get(hist_name, 1)
+    return hists
+
+
+@pytest.mark.parametrize("number_of_weights", [12, 300])
+def test_weighted_histograms_from_dicts_and_arrays(number_of_weights):
+    """The buffered, unbuffered and batch fills give the same histograms for dictionaries and arrays of weights."""
+    rng = np.random.default_rng(number_of_weights)
+    weight_names = [f"rwgt_{index}" for index in range(number_of_weights)]
+    # The last histogram has no weight in the events
+    hist_names = weight_names[::3] + ["missing"]
+    values = rng.uniform(-0.1, 1.1, 2500)
+    weights = rng.uniform(0.5, 1.5, (len(values), number_of_weights))
+    dict_events = [(value, dict(zip(weight_names, event_weights))) for value, event_weights in zip(values, weights)]
+    array_events = list(zip(values, weights))
+    expected = reference_hists(dict_events, hist_names)
+
+    def manager(**kwargs) -> WeightedHistogramManager:
+        return WeightedHistogramManager(BIN_EDGES, observable, get_weights, hist_names, track_sumw2=True, **kwargs)
+
+    buffered_dicts, buffered_arrays = manager(), manager(weight_names=weight_names)
+    for event_index, (dict_event, array_event) in enumerate(zip(dict_events, array_events)):
+        buffered_dicts.buffer_event(dict_event)
+        buffered_arrays.buffer_event(array_event)
+        if event_index % 1000 == 999:
+            buffered_dicts.flush()
+            buffered_arrays.flush()
+    buffered_dicts.flush()
+    buffered_arrays.flush()
+
+    unbuffered = manager(weight_names=weight_names)
+    for event in dict_events[:100]:
+        unbuffered.update_hist(event)
+    for event in array_events[100:]:
+        unbuffered.update_hist(event)
+
+    batch = manager(weight_names=weight_names)
+    batch.update_hist_batch((values, weights))
+    batch_dict = manager()
+    batch_dict.update_hist_batch((values, dict(zip(weight_names, weights.T))))
+
+    for filled in [buffered_dicts, buffered_arrays, unbuffered, batch, batch_dict]:
+        for hist_name in hist_names:
+            np.testing.assert_allclose(filled[hist_name], expected[hist_name])
+        np.testing.assert_array_equal(filled.entries, buffered_dicts.entries)
+        np.testing.assert_allclose(filled.get_sumw2(hist_names[0]), buffered_dicts.get_sumw2(hist_names[0]))
+    assert buffered_dicts.entries.sum() == np.count_nonzero((values >= 0) & (values < 1))
+
+
+def test_weighted_histograms_with_missing_weights_in_some_events():
+    """The events without some of the weights are filled with weight 1 for those histograms."""
+    events = [(0.05, {"a": 2., "b": 3.}), (0.15, {"a": 4.}), (0.25, {"b": 5., "a": 6.})]
+    manager = WeightedHistogramManager(BIN_EDGES, observable, get_weights, ["a", "b"])
+    for event in events:
+        manager.buffer_event(event)
+    manager.flush()
+    np.testing.assert_allclose(manager["a"][:3], [2., 4., 6.])
+    np.testing.assert_allclose(manager["b"][:3], [3., 1., 5.])
+
+
+def test_weighted_histograms_with_weights_missing_in_the_first_event():
+    """Weights that only appear after the first buffered event are booked with their values."""
+    events = [(0.05, {"a": 2.}), (0.05, {"a": 3., "b": 5.}), (0.15, {"b": 7.})]
+    manager = WeightedHistogramManager(BIN_EDGES, observable, get_weights, ["a", "b"])
+    for event in events:
+        manager.buffer_event(event)
+    manager.flush()
+    np.testing.assert_allclose(manager["a"][:2], [5., 1.])
+    np.testing.assert_allclose(manager["b"][:2], [6., 7.])
+
+
+def test_nd_histogram_axes():
+    """Tuples of integers are bin edges, and only UniformAxis gives uniform bins."""
+    histogram = ObservableHistogramND([(0, 50, 100), UniformAxis(4, 0., 1.)], observable)
+    assert histogram.shape == (2, 4)
+    histogram.fill_many((np.array([10., 60., 100., 70.]), np.array([0.1, 0.3, 0.5, 1.])), [1., 2., 3., 4.])
+    np.testing.assert_allclose(histogram, [[1., 0., 0., 0.], [0., 2., 0., 0.]])
+    with pytest.raises(ValueError):
+        ObservableHistogramND([UniformAxis(0, 50., 100.)], observable)
+
+
+def test_observable_histogram_sumw2():
+    """The sum of the squared weights and the entries follow fill_many, update_hist, merge and scale."""
+    rng = np.random.default_rng(3)
+    values, weights = rng.uniform(-0.1, 1.1, 400), rng.uniform(-1., 2., 400)
+    bin_indices = np.searchsorted(BIN_EDGES, values, side="right") - 1
+    inside = (bin_indices >= 0) & (bin_indices < len(BIN_EDGES) - 1)
+
+    def expected(rows):
+        rows = rows & inside
+        return (np.bincount(bin_indices[rows], weights[rows], minlength=len(BIN_EDGES) - 1),
+                np.bincount(bin_indices[rows], weights[rows] ** 2, minlength=len(BIN_EDGES) - 1),
+                np.bincount(bin_indices[rows], minlength=len(BIN_EDGES) - 1))
+
+    first = ObservableHistogram(BIN_EDGES, observable, get_weight=get_weights, track_sumw2=True)
+    first.fill_many(values[:250], weights[:250])
+    second = copy.copy(first)
+    for event in zip(values[250:], weights[250:]):
+        second.update_hist(event)
+    first_rows = np.arange(len(values)) < 250
+    for histogram, rows in [(first, first_rows), (second, ~first_rows)]:
+        sumw, sumw2, entries = expected(rows)
+        np.testing.assert_allclose(histogram, sumw)
+        np.testing.assert_allclose(histogram.sumw2, sumw2)
+        np.testing.assert_array_equal(histogram.entries, entries)
+
+    first.merge(second)
+    sumw, sumw2, entries = expected(np.ones(len(values), dtype=bool))
+    np.testing.assert_allclose(first, sumw)
+    np.testing.assert_allclose(first.sumw2, sumw2)
+    np.testing.assert_array_equal(first.entries, entries)
+    first.scale(0.5)
+    np.testing.assert_allclose(first.sumw2, 0.25 * sumw2)
+
+    # The histograms without sumw2 drop it from the merged histogram
+    first.merge(ObservableHistogram(BIN_EDGES, observable, get_weight=get_weights))
+    assert first.sumw2 is None and first.entries is None
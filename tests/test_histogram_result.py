@@ -0,0 +1,91 @@
+"""Tests of the saved results of the analyses (src/HistogramResult.py)."""
+
+import numpy as np
+import pytest
+from EventAnalysis_Framework.src.Histogram import Histogram, ObservableHistogram
+from EventAnalysis_Framework.src.HistogramResult import HistogramResult, merge_results, combine_samples
+
+BIN_EDGES = [0., 1., 2., 4.]
+
+
+def value(event):
+    """Observable of the test events (value, weight)."""
+    return event[0]
+
+
+def weight(event):
+    """Weight of the test events (value, weight)."""
+    return event[1]
+
+
+def filled_histogram(events) -> ObservableHistogram:
+    """Histogram with the sum of the squared weights, filled with the events."""
+    histogram = ObservableHistogram(BIN_EDGES, value, get_weight=weight, track_sumw2=True)
+    for event in events:
+        histogram.update_hist(event)
+    return histogram
+
+
+class CountingHistogram(Histogram, np.ndarray):
+    """Histogram outside the framework that only implements update_hist and __copy__."""
+
+    def __new__(cls):
+        histogram = np.zeros(len(BIN_EDGES) - 1).view(cls)
+        histogram.bin_edges = BIN_EDGES
+        return histogram
+
+    def update_hist(self, event):
+        self[int(event[0])] += 1
+
+    def __copy__(self):
+        return self.__class__()
+
+
+def test_histograms_with_the_basic_interface():
+    """Histograms that only implement update_hist and __copy__ can still be created, scaled and saved."""
+    histogram = CountingHistogram()
+    histogram.update_hist((1.5, 1.))
+    np.testing.assert_allclose(histogram.scale(2.), [0., 2., 0.])
+    np.testing.assert_allclose(histogram.contents()[""]["sumw"], [0., 2., 0.])
+    np.testing.assert_allclose(histogram.contents()[""]["edges"], BIN_EDGES)
+    with pytest.raises(NotImplementedError):
+        histogram.merge(CountingHistogram())
+
+
+@pytest.mark.parametrize("extension", [".npz", ".json"])
+def test_save_load_and_merge(tmp_path, extension):
+    """The saved shards of a sample are merged into the result of all the events of the sample."""
+    rng = np.random.default_rng(1)
+    events = list(zip(rng.uniform(-0.5, 4.5, 300), rng.uniform(0.5, 1.5, 300)))
+    other_events = list(zip(rng.uniform(0., 4., 100), rng.uniform(0.5, 1.5, 100)))
+
+    paths = []
+    for shard_index, shard_events in enumerate([events[:120], events[120:], other_events]):
+        sample = "other" if shard_index == 2 else "signal"
+        path = str(tmp_path / f"shard_{shard_index}{extension}")
+        HistogramResult.from_histogram(filled_histogram(shard_events), len(shard_events), xsection=2.,
+                                       sample=sample).save(path)
+        paths.append(path)
+
+    merged = merge_results(paths)
+    assert set(merged) == {"signal", "other"}
+    signal = merged["signal"]
+    expected = filled_histogram(events)
+    assert signal.number_of_evts == 300 and signal.xsection == 2.
+    np.testing.assert_allclose(signal.contents[""]["edges"], BIN_EDGES)
+    np.testing.assert_allclose(signal.contents[""]["sumw"], expected)
+    np.testing.assert_allclose(signal.contents[""]["sumw2"], expected.sumw2)
+    np.testing.assert_array_equal(signal.contents[""]["entries"], expected.entries)
+    assert signal.contents[""]["entries"].dtype == np.int64
+    np.testing.assert_allclose(signal.normalized(), 2. / 300 * expected)
+    np.testing.assert_allclose(combine_samples(merged.values()),
+                               2. / 300 * expected + 2. / 100 * filled_histogram(other_events))
+
+
+def test_results_of_different_samples_are_not_merged():
+    """Only the results of the same sample and cross-section are merged."""
+    result = HistogramResult.from_histogram(filled_histogram([]), 10, xsection=1., sample="a")
+    with pytest.raises(ValueError):
+        result.merge(HistogramResult.from_histogram(filled_histogram([]), 10, xsection=1., sample="b"))
+    with pytest.raises(ValueError):
+        result.merge(HistogramResult.from_histogram(filled_histogram([]), 10, xsection=3., sample="a"))
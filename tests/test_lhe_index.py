@@ -0,0 +1,20 @@
+"""Tests of the random access to the events of .lhe files (LHE/src/lhe_index.py)."""
+
+import numpy as np
+import pytest
+from EventAnalysis_Framework.LHE.src.read_lhe_columnar import read_lhe_columnar
+from EventAnalysis_Framework.LHE.src.lhe_index import read_lhe_range_columnar
+
+
+@pytest.mark.parametrize("start, stop, chunk_size", [(0, None, 10000), (13, 412, 50), (100, 101, 7)])
+def test_range_columnar_matches_full_read(lhe_file, start, stop, chunk_size):
+    """The batches of a range have the same events as the full columnar read, in chunks of chunk_size events."""
+    full_batch = next(read_lhe_columnar(lhe_file))[start:stop]
+    batches = list(read_lhe_range_columnar(lhe_file, start, stop, chunk_size))
+    assert [len(batch) for batch in batches[:-1]] == [chunk_size] * (len(batches) - 1)
+    assert sum(len(batch) for batch in batches) == len(full_batch)
+    for field in ["weight", "nparticles", "pid", "px", "e"]:
+        np.testing.assert_array_equal(np.concatenate([getattr(batch, field) for batch in batches]),
+                                      getattr(full_batch, field))
+    np.testing.assert_array_equal(np.concatenate([batch.rwgt for batch in batches]), full_batch.rwgt)
+
@@ -0,0 +1,64 @@
+"""Tests of the EFT morphing of the histograms (src/Morphing.py)."""
+
+import numpy as np
+import pytest
+from EventAnalysis_Framework.src.HistogramResult import HistogramResult
+from EventAnalysis_Framework.src.Morphing import EFTMorphing
+
+TERMS = ["SM", "C1", "C2", "C1-C1", "C1-C2", "C2-C2"]
+
+
+def expected_prediction(basis: dict, c1: float, c2: float) -> np.ndarray:
+    """Prediction of the basis at (c1, c2), term by term."""
+    return (basis["SM"] + c1 * basis["C1"] + c2 * basis["C2"] + c1 ** 2 * basis["C1-C1"]
+            + c1 * c2 * basis["C1-C2"] + c2 ** 2 * basis["C2-C2"])
+
+
+@pytest.fixture
+def basis() -> dict:
+    """Known histograms of the EFT terms."""
+    rng = np.random.default_rng(1)
+    return {term: rng.normal(0, 1, 5) for term in TERMS}
+
+
+def test_fit_recovers_the_basis(basis, tmp_path):
+    """Fitting the histograms at known points gives back the coefficients of each term, and the predictions."""
+    rng = np.random.default_rng(2)
+    points = {f"point_{index}": {"C1": c1, "C2": c2, "unused": 1.}
+              for index, (c1, c2) in enumerate(rng.uniform(-2, 2, (9, 2)))}
+    histograms = {name: expected_prediction(basis, point["C1"], point["C2"]) for name, point in points.items()}
+    morphing = EFTMorphing.fit(points, histograms, TERMS, bin_edges=np.arange(6.))
+
+    assert morphing.terms == TERMS and morphing.coefficients == ["C1", "C2"]
+    for term_index, term in enumerate(TERMS):
+        np.testing.assert_allclose(morphing.basis[term_index], basis[term], atol=1e-10)
+
+    np.testing.assert_allclose(morphing.predict({"C1": 0.3, "C2": -1.2}), expected_prediction(basis, 0.3, -1.2))
+    new_points = rng.uniform(-3, 3, (4, 2))
+    np.testing.assert_allclose(morphing.predict(new_points),
+                               [expected_prediction(basis, c1, c2) for c1, c2 in new_points])
+    np.testing.assert_allclose(morphing.predict({"C1": [0., 1.]}),
+                               [basis["SM"], expected_prediction(basis, 1., 0.)])
+
+    path = str(tmp_path / "basis.npz")
+    morphing.save(path)
+    loaded = EFTMorphing.load(path)
+    np.testing.assert_allclose(loaded.predict(new_points), morphing.predict(new_points))
+    np.testing.assert_allclose(loaded.bin_edges, np.arange(6.))
+
+    with pytest.raises(ValueError):
+        EFTMorphing.fit(dict(list(points.items())[:5]), histograms, TERMS)
+
+
+def test_basis_from_results(basis):
+    """The basis is the sum of the normalized histograms of the bins of each term."""
+    results = []
+    for term, contents in basis.items():
+        for bin_index, fraction in enumerate([0.25, 0.75]):
+            sumw = fraction * contents * 100
+            results.append(HistogramResult({"": {"edges": np.arange(6.), "sumw": sumw, "sumw2": np.abs(sumw)}},
+                                           number_of_evts=100, xsection=1., sample=f"{term}-bin-{bin_index}"))
+    morphing = EFTMorphing.from_results(results)
+    assert sorted(morphing.terms) == sorted(TERMS)
+    np.testing.assert_allclose(morphing.predict({"C1": 0.5, "C2": 2.}), expected_prediction(basis, 0.5, 2.))
+    np.testing.assert_allclose(morphing.predict_sumw2({}), np.abs(basis["SM"]) / 100)
@@ -0,0 +1,87 @@
+"""Tests of the cache of the observables and cut outcomes (src/ObservableCache.py)."""
+
+import numpy as np
+import pytest
+from EventAnalysis_Framework.LHCO.src.LHCOReader import read_LHCO
+from EventAnalysis_Framework.src.Histogram import ObservableHistogram
+from EventAnalysis_Framework.src.Analysis import EventAnalysis, EventLoop
+from EventAnalysis_Framework.src.ObservableCache import (ObservableCache, analysis_fingerprint, _step_source, PASSED,
+                                                         FAILED, NOT_EVALUATED)
+
+BIN_EDGES = [0, 50, 100, 200, 1000]
+
+
+def has_jet(event) -> bool:
+    """Cut on the number of jets."""
+    return len(event.jets) > 0
+
+
+def hard_leading_jet(event) -> bool:
+    """Cut on the leading jet, which only exists after has_jet."""
+    return event.jets[0].pt > 30
+
+
+def jet_scale() -> float:
+    """Helper of the observable."""
+    return 1.
+
+
+def leading_jet_pt(event) -> float:
+    """Transverse momentum of the leading jet."""
+    return jet_scale() * event.jets[0].pt
+
+
+def test_cuts_stop_at_the_first_failure(lhco_file):
+    """The cuts after the first failure are not evaluated, and the histograms match the event loop."""
+    cache = ObservableCache(read_LHCO, observables=[leading_jet_pt], cuts=[has_jet, hard_leading_jet])
+    columns = cache.columns(lhco_file, use_cache=False)
+    assert len(columns) == 500
+    no_jets = columns.cuts["has_jet"] == FAILED
+    assert no_jets.any()
+    assert np.all(columns.cuts["hard_leading_jet"][no_jets] == NOT_EVALUATED)
+    assert np.all(np.isnan(columns.observables["leading_jet_pt"][no_jets]))
+    assert np.all(columns.cuts["hard_leading_jet"][columns.cuts["has_jet"] == PASSED] != NOT_EVALUATED)
+
+    histogram = ObservableHistogram(BIN_EDGES, leading_jet_pt)
+    for cuts in [[has_jet, hard_leading_jet], [has_jet]]:
+        event_loop = EventLoop(file_reader=read_LHCO, histogram=histogram)
+        expected, _ = event_loop.analyse_events(lhco_file, EventAnalysis(cuts=cuts))
+        filled = columns.fill(histogram, "leading_jet_pt", cuts=[cut.__name__ for cut in cuts])
+        np.testing.assert_allclose(filled, expected)
+
+    # The outcome of hard_leading_jet is unknown for the events without jets
+    with pytest.raises(ValueError, match="not evaluated"):
+        columns.selected(["hard_leading_jet"])
+
+
+def leading_jet_ratio(event) -> float:
+    """Observable that fails with different errors on the events without jets."""
+    if not event.jets:
+        raise ZeroDivisionError if len(event) % 2 else KeyError
+    return event.jets[0].pt / event.met[0].pt
+
+
+def test_observable_errors_on_rejected_events(lhco_file):
+    """Any error of an observable on the events that fail a cut is recorded as NaN."""
+    columns = ObservableCache(read_LHCO, observables=[leading_jet_ratio], cuts=[has_jet]).columns(lhco_file,
+                                                                                                use_cache=False)
+    no_jets = columns.cuts["has_jet"] == FAILED
+    assert np.all(np.isnan(columns.observables["leading_jet_ratio"][no_jets]))
+    assert not np.any(np.isnan(columns.observables["leading_jet_ratio"][~no_jets]))
+
+
+def test_errors_are_raised(lhco_file):
+    """Errors of the cuts, and of the observables on the selected events, are not hidden."""
+    with pytest.raises(IndexError):
+        ObservableCache(read_LHCO, observables=[], cuts=[hard_leading_jet]).columns(lhco_file, use_cache=False)
+    with pytest.raises(IndexError):
+        ObservableCache(read_LHCO, observables=[leading_jet_pt]).columns(lhco_file, use_cache=False)
+
+
+def test_fingerprint_covers_the_helpers():
+    """The fingerprint includes the source code of the functions used by the observables, but not of numpy."""
+    source = _step_source(leading_jet_pt, set())
+    assert "def jet_scale" in source
+    assert "def has_jet" not in source
+    assert _step_source(np.sum, set()) == _step_source(np.sum, set())
+    assert analysis_fingerprint([leading_jet_pt]) != analysis_fingerprint([has_jet])
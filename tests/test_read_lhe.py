@@ -0,0 +1,71 @@
+"""Tests of the readers of .lhe files (LHE/src/read_lhe.py)."""
+
+import os
+import gzip
+import shutil
+import numpy as np
+import pytest
+from conftest import WEIGHT_NAMES, write_lhe
+from EventAnalysis_Framework.LHE.src.read_lhe import read_lhe, read_lhe_with_rwgt, lhe_weight_names
+from EventAnalysis_Framework.LHE.src.read_lhe_columnar import read_lhe_columnar
+from EventAnalysis_Framework.LHE.src.read_lhe_weights import read_lhe_rwgt
+from EventAnalysis_Framework.LHE.src.lhe_index import MISSING_WEIGHT
+
+
+@pytest.fixture
+def lhe_missing_weight(tmp_path) -> str:
+    """Path to a .lhe sample whose second event does not have the weight beta_3E-1."""
+    path = str(tmp_path / "missing.lhe")
+    write_lhe(path, 20)
+    with open(path) as lhe_file:
+        lines = lhe_file.read().split("\n")
+    missing_line = [index for index, line in enumerate(lines) if "<wgt id='beta_3E-1'>" in line][1]
+    with open(path, "w") as lhe_file:
+        lhe_file.write("\n".join(lines[:missing_line] + lines[missing_line + 1:]))
+    return path
+
+
+def test_full_file_read_without_index(tmp_path):
+    """The whole file is read without building the index, and gives the same events as the ranges."""
+    path = str(tmp_path / "sample.lhe")
+    write_lhe(path, 50)
+    assert lhe_weight_names(path) == WEIGHT_NAMES
+    events = list(read_lhe_with_rwgt(path))
+    assert len(events) == 50
+    for event, reference in zip(events, read_lhe(path)):
+        np.testing.assert_array_equal(event.rwgt, [reference.weights[name] for name in WEIGHT_NAMES])
+        assert event.weights == {}
+    assert not os.path.exists(path + ".index.npz")
+
+    range_events = list(read_lhe_with_rwgt(path, 10, 20))
+    for event, range_event in zip(events[10:20], range_events):
+        np.testing.assert_array_equal(event.rwgt, range_event.rwgt)
+        assert event.weights == range_event.weights
+        assert event.eventinfo.weight == range_event.eventinfo.weight
+        assert [particle.px for particle in event.particles] == [particle.px for particle in range_event.particles]
+
+    # Compressed files are also read sequentially
+    with open(path, "rb") as lhe_file, gzip.open(path + ".gz", "wb") as compressed_file:
+        shutil.copyfileobj(lhe_file, compressed_file)
+    for event, compressed_event in zip(events[10:20], read_lhe_with_rwgt(path + ".gz", 10, 20)):
+        np.testing.assert_array_equal(event.rwgt, compressed_event.rwgt)
+
+
+@pytest.mark.parametrize("start, stop", [(0, None), (1, 3)])
+def test_missing_weights_are_one(lhe_missing_weight, start, stop):
+    """The weights missing in an event are 1, both when the whole file and when a range is read."""
+    events = list(read_lhe_with_rwgt(lhe_missing_weight, start, stop))
+    event = events[1 - start]
+    reference = next(iter(read_lhe(lhe_missing_weight, 1, 2)))
+    np.testing.assert_array_equal(event.rwgt, [reference.weights["rwgt_1"], 1., reference.weights["beta_-3E-1"]])
+    assert not np.isnan(np.array([event.rwgt for event in events])).any()
+
+
+def test_missing_weights_are_the_same_in_all_readers(lhe_missing_weight):
+    """The columnar readers and the scan of the weights also use MISSING_WEIGHT."""
+    rwgt, weight_names = read_lhe_rwgt(lhe_missing_weight, use_cache=False)
+    assert weight_names == WEIGHT_NAMES
+    assert rwgt[1, 1] == MISSING_WEIGHT
+    batch = next(iter(read_lhe_columnar(lhe_missing_weight)))
+    np.testing.assert_array_equal(batch.rwgt, rwgt)
+    np.testing.assert_array_equal(np.array([event.rwgt for event in read_lhe_with_rwgt(lhe_missing_weight)]), rwgt)
@@ -0,0 +1,95 @@
+"""Tests of the skims of the selected objects (HepMC3/src/Skim.py)."""
+
+import fastjet
+import pyhepmc
+import numpy as np
+import pytest
+from EventAnalysis_Framework.src.Analysis import EventAnalysis, EventLoop
+from EventAnalysis_Framework.HepMC3.src import Skim
+from EventAnalysis_Framework.HepMC3.src.Skim import EventSkim, KeepEventWeights, read_skim, skim_number_of_events
+
+NUMBER_OF_EVENTS = 50
+
+
+def generated_events(filename: str):
+    """Events with a few particles and three weights (the filename is not used)."""
+    rng = np.random.default_rng(1)
+    events = []
+    for event_index in range(NUMBER_OF_EVENTS):
+        event = pyhepmc.GenEvent()
+        for particle_index in range(event_index % 4):
+            px, py, pz = rng.normal(0, 50, 3)
+            momentum = pyhepmc.FourVector(px, py, pz, np.sqrt(px ** 2 + py ** 2 + pz ** 2))
+            event.add_particle(pyhepmc.GenParticle(momentum, 11 if particle_index % 2 else -13, 1))
+        event.weights = list(rng.uniform(0.5, 1.5, 3))
+        events.append(event)
+    return events
+
+
+def select_objects(event: pyhepmc.GenEvent) -> dict:
+    """Leptons, a jet made of the leptons, and the missing momentum."""
+    leptons = list(event.particles)
+    total = pyhepmc.FourVector(0, 0, 0, 0)
+    for lepton in leptons:
+        total = total + lepton.momentum
+    jet = fastjet.PseudoJet(total.px, total.py, total.pz, total.e)
+    jet.set_user_index(len(leptons) % 2)
+    return {"lepton": leptons, "jet": [jet] if leptons else [], "MET": [pyhepmc.FourVector(0, 0, 0, 0) - total]}
+
+
+def at_least_one_lepton(event: dict) -> bool:
+    """Cut on the number of leptons."""
+    return len(event["lepton"]) > 0
+
+
+def momenta(objects) -> list:
+    """(px, py, pz, e) of the objects of an event."""
+    values = []
+    for physics_object in objects:
+        if isinstance(physics_object, fastjet.PseudoJet):
+            values.append((physics_object.px(), physics_object.py(), physics_object.pz(), physics_object.E()))
+        else:
+            momentum = getattr(physics_object, "momentum", physics_object)
+            values.append((momentum.px, momentum.py, momentum.pz, momentum.e))
+    return values
+
+
+@pytest.fixture
+def skim_file(tmp_path) -> str:
+    """Path to the skim of the generated events."""
+    event_analysis = EventAnalysis(cuts=[at_least_one_lepton], particles_selection=KeepEventWeights(select_objects))
+    assert event_analysis.step_names == ["select_objects", "at_least_one_lepton"]
+    skim, number_of_evts = EventLoop(file_reader=generated_events, histogram=EventSkim()).analyse_events(
+        "generated", event_analysis
+    )
+    path = str(tmp_path / "skim.npz")
+    skim.save(path, number_of_evts)
+    return path
+
+
+def test_skim_stores_the_event_weights(skim_file):
+    """The weights of the original events are stored with their selected objects."""
+    selected = [event for event in generated_events("generated") if len(event.particles)]
+    skimmed = list(read_skim(skim_file))
+    assert skim_number_of_events(skim_file) == NUMBER_OF_EVENTS
+    assert len(skimmed) == len(selected)
+    for skimmed_event, event in zip(skimmed, selected):
+        np.testing.assert_allclose(skimmed_event.weights, event.weights)
+        reference = select_objects(event)
+        for category in reference:
+            np.testing.assert_allclose(momenta(skimmed_event[category]), momenta(reference[category]))
+        assert [lepton.pid for lepton in skimmed_event["lepton"]] == [lepton.pid for lepton in reference["lepton"]]
+        assert [jet.user_index() for jet in skimmed_event["jet"]] == [jet.user_index() for jet in reference["jet"]]
+
+
+@pytest.mark.parametrize("start, stop", [(0, None), (3, 17), (10, 11), (30, 100)])
+def test_skim_ranges(skim_file, monkeypatch, start, stop):
+    """The events in [start, stop) are the same as in the whole skim, also across the blocks of the reader."""
+    everything = list(read_skim(skim_file))
+    monkeypatch.setattr(Skim, "_read_block_size", 4)
+    events = list(read_skim(skim_file, start, stop))
+    assert len(events) == len(everything[start:stop])
+    for event, reference in zip(events, everything[start:stop]):
+        np.testing.assert_array_equal(event.weights, reference.weights)
+        for category in reference:
+            np.testing.assert_array_equal(momenta(event[category]), momenta(reference[category]))
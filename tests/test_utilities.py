@@ -0,0 +1,52 @@
+"""Tests of the metadata of the .lhe and banner files (src/Utilities.py)."""
+
+from conftest import WEIGHT_NAMES, write_lhe
+from EventAnalysis_Framework.src import Utilities
+from EventAnalysis_Framework.src.Utilities import read_metadata, read_xsection
+
+BANNER_LINES = ["<LesHouchesEvents version=\"3.0\">", "<header>", "<MGGenerationInfo>",
+                "#  Number of Events        :       1000", "#  Integrated weight (pb)  :       0.5",
+                "</MGGenerationInfo>", "</header>", "<init>", "2212 2212 6.5e3 6.5e3 0 0 247000 247000 -4 1",
+                "0.5 0.01 0.5 1", "</init>", "<MGMatchingInfo>", "#  Matched events           :       800",
+                "#  Matched Integrated weight (pb)  :       0.4", "</MGMatchingInfo>", "</LesHouchesEvents>"]
+
+
+def test_lines_after_the_header(tmp_path):
+    """The lines that are not in the header are found by reading the rest of the file."""
+    path = str(tmp_path / "banner.txt")
+    with open(path, "w") as banner_file:
+        banner_file.write("\n".join(BANNER_LINES) + "\n")
+    assert read_xsection(path) == 0.5
+    assert read_xsection(path, default_line="#  Matched Integrated weight (pb)  :") == 0.4
+    metadata = read_metadata(path, number_of_evts_line="#  Matched events           :")
+    assert metadata["number_of_evts"] == 800
+    assert metadata["init_xsection"] == 0.5
+
+
+def test_sidecar_is_keyed_by_both_lines(lhe_file):
+    """The sidecar is only reused for the same lines of the cross-section and the number of events."""
+    metadata = read_metadata(lhe_file)
+    assert metadata["xsection"] == 0.123
+    assert metadata["number_of_evts"] == 500
+    assert metadata["weight_names"] == WEIGHT_NAMES
+
+    # Only the sidecar is used from now on
+    Utilities._metadata_cache.clear()
+    assert read_metadata(lhe_file) == metadata
+    Utilities._metadata_cache.clear()
+    other_lines = read_metadata(lhe_file, number_of_evts_line="#  Matched events           :")
+    assert other_lines["number_of_evts"] is None
+    assert other_lines["xsection"] == 0.123
+
+
+def test_lhe_events_are_not_read_once_the_xsection_is_found(tmp_path):
+    """In .lhe files, the lines after the header are only read while the cross-section is missing."""
+    path = str(tmp_path / "sample.lhe")
+    write_lhe(path, 20)
+    with open(path) as lhe_file:
+        lines = [line for line in lhe_file.read().split("\n") if not line.startswith("#  Number of Events")]
+    with open(path, "w") as lhe_file:
+        lhe_file.write("\n".join(lines + ["#  Number of Events        :       20"]) + "\n")
+    metadata = read_metadata(path)
+    assert metadata["xsection"] == 0.123
+    assert metadata["number_of_evts"] is None
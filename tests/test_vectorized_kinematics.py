@@ -0,0 +1,49 @@
+"""Tests of the kinematic functions for arrays of events (LHE/src/vectorized_kinematics.py)."""
+
+import warnings
+import numpy as np
+import pytest
+from EventAnalysis_Framework.LHE.src.read_lhe_columnar import read_lhe_columnar
+from EventAnalysis_Framework.LHE.src.vectorized_kinematics import closest_ossf_pair, pair_masses
+
+
+def test_closest_ossf_pair():
+    """The pair with mass closest to the target is chosen among the opposite-sign same-flavour pairs."""
+    momenta = np.array([[[50., 0., 0., 50.], [50., 0., 0., -50.], [45., 0., 0., -45.]]])
+    first, second, mass = closest_ossf_pair(momenta, np.array([[11, -11, -11]]), target_mass=91.)
+    assert (first[0], second[0]) == (0, 2) and mass[0] == pytest.approx(np.sqrt(95.**2 - 5.**2))
+
+
+def test_pair_masses_of_massless_particles():
+    """The masses of the pairs of massless particles are not NaN by rounding, and the diagonal is NaN."""
+    rng = np.random.default_rng(1)
+    three_momenta = rng.normal(0, 100, (200, 4, 3))
+    momenta = np.concatenate([np.linalg.norm(three_momenta, axis=-1, keepdims=True), three_momenta], axis=-1)
+    momenta[:, 1] = momenta[:, 0] * 3.7
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        masses = pair_masses(momenta)
+    assert np.isnan(masses[:, range(4), range(4)]).all()
+    off_diagonal = ~np.eye(4, dtype=bool)
+    assert (masses[:, off_diagonal] >= 0).all()
+    np.testing.assert_allclose(masses[:, 0, 1], 0., atol=1e-4)
+
+
+@pytest.mark.parametrize("n_particles", [0, 1, 2])
+def test_closest_ossf_pair_without_pairs(n_particles):
+    """Events without candidates (including chunks with less than two particles) give the no-pair sentinel."""
+    momenta = np.full((3, n_particles, 4), np.nan)
+    first, second, mass = closest_ossf_pair(momenta, np.zeros((3, n_particles), dtype=int), target_mass=91.)
+    np.testing.assert_array_equal(first, -1)
+    np.testing.assert_array_equal(second, -1)
+    assert np.isnan(mass).all() and mass.shape == (3,)
+
+
+def test_closest_ossf_pair_chunk_without_muons(lhe_file):
+    """The samples have electrons only, so the padded muons of a chunk have width 0."""
+    batch = next(read_lhe_columnar(lhe_file, chunk_size=100))
+    first, _, mass = closest_ossf_pair(batch.padded_momenta([13]), batch.padded_pids([13]), target_mass=91.)
+    assert (first == -1).all() and np.isnan(mass).all()
+    # The electrons form a pair in every event
+    first, second, _ = closest_ossf_pair(batch.padded_momenta([11]), batch.padded_pids([11]), target_mass=91.)
+    assert (first == 0).all() and (second == 1).all()